@@ -35,10 +35,16 @@ TURN_START = NEIGHBORHOODS
 
 DEBUG = False
 
+# Default transition-text mode for new games. When True, operators keep effects as small
+# structured records (State.transition_events) and only format banners and last_action
+# text when a UI or log asks for them (transition_text). Headless and bot play should use it.
+LAZY_TRANSITIONS = False
+
 # Imports
+# Kept small so headless workers start fast: Select_Roles (module attribute sr), re and
+# hashlib are imported on first use, and OPERATORS is compiled on first access.
 from soluzion5 import Basic_State, Basic_Operator as Operator, ROLES_List, add_to_next_transition
-import Select_Roles as sr
-import math, random, copy
+import random, heapq, itertools, array
 
 # File-citations used from the uploaded spec (these tokens point to the uploaded doc)
 FC = {
@@ -60,9 +66,92 @@ def int_to_name(i):
         return f"Role_{i}"
 
 # ---------------- State ----------------
+# Numeric State fields. They live in one flat list (State._v) so that copying a
+# State costs a single buffer copy; each name is exposed as a normal attribute.
+STATE_FIELDS = (
+    'turn',
+    'pop_families', 'pop_youth', 'pop_chronic', 'pop_veterans', 'homeless_population',
+    'shelter_capacity', 'transitional_units', 'permanent_units',
+    'social_workers', 'outreach_teams', 'medical_vans',
+    'operating_obligations',
+    'shelter_budget', 'neighborhood_budget', 'business_budget', 'medical_budget', 'university_budget',
+    'public_support', 'economy_index', 'legal_pressure', 'policy_momentum', 'debt',
+    'construction_delay_factor', 'policy_fatigue',
+    'round',
+)
+FIELD_INDEX = {name: i for i, name in enumerate(STATE_FIELDS)}
+
+
+def _buffer_field(i):
+    def get(self):
+        return self._v[i]
+    def set(self, value):
+        self._v[i] = value
+    return property(get, set)
+
+
+# ---------------- Metric history ----------------
+# Every record_trend appends one row (a snapshot of all STATE_FIELDS) to a store shared by
+# all states of a game; a state only keeps the index of its latest row. Rows point at their
+# parent row, so branching play (search, undo) shares the common prefix.
+
+TREND_LENGTH = 10   # entries in State.trend_history (the dashboard sparkline)
+_HOMELESS = FIELD_INDEX['homeless_population']
+
+
+class HistoryStore:
+    def __init__(self):
+        self.width = len(STATE_FIELDS)
+        self.data = array.array('d')      # row-major snapshots of State._v
+        self.parents = array.array('q')   # parent row per row (-1 for a root)
+
+    def __len__(self):
+        return len(self.parents)
+
+    def append(self, parent, values):
+        self.data.extend(values)
+        self.parents.append(parent)
+        return len(self.parents) - 1
+
+    def lineage(self, row):
+        # rows from the root of row's game up to row
+        rows = []
+        parents = self.parents
+        while row >= 0:
+            rows.append(row)
+            row = parents[row]
+        rows.reverse()
+        return rows
+
+    def column(self, name, rows):
+        w = self.width
+        i = FIELD_INDEX[name]
+        data = self.data
+        return [data[r * w + i] for r in rows]
+
+    def trend(self, row, n=TREND_LENGTH):
+        # last n homeless totals ending at row, padded with the game's first value
+        w = self.width
+        data = self.data
+        parents = self.parents
+        out = []
+        while row >= 0 and len(out) < n:
+            out.append(int(data[row * w + _HOMELESS]))
+            row = parents[row]
+        if out and len(out) < n:
+            out.extend([out[-1]] * (n - len(out)))
+        out.reverse()
+        return out
+
+
 class State(Basic_State):
+    __slots__ = ('_v', 'ticks', '_jobs', '_jobs_owned', '_history', '_hist_row', '_last_action', 'last_action_url',
+                 'rng', 'last_outcome', 'lazy_text', 'transition_events')
+
     def __init__(self, old=None):
         if old is None:
+            self._v = [0] * len(STATE_FIELDS)
+
             # turn (authoritative)
             self.turn = TURN_START
 
@@ -79,8 +168,11 @@ class State(Basic_State):
             self.transitional_units = 600
             self.permanent_units = 2200
 
-            # Construction pipeline: list of (type_str, units, rounds_remaining)
-            self.construction_pipeline = []
+            # Construction pipeline: event queue of jobs keyed by the record_trend tick they
+            # finish on; construction_pipeline shows it as (type_str, units, rounds_remaining)
+            self.ticks = 0
+            self._jobs = []
+            self._jobs_owned = True
 
             # Service resources
             self.social_workers = 120
@@ -110,79 +202,105 @@ class State(Basic_State):
 
             self.last_action = ""
             self.round = 0
-            self.trend_history = [int(self.homeless_population)] * 10
+            # metric history shared by the whole game (see HistoryStore); trend_history is a view
+            self._history = HistoryStore()
+            self._hist_row = self._history.append(-1, self._v)
 
             self.last_action_url = ""
+            # (success, applied_multiplier, budget_fraction) of the operator that produced this state
+            self.last_outcome = None
+
+            # per-game random stream; create_initial_state(seed) makes it reproducible
+            self.rng = random.Random()
+
+            # transition text mode (see LAZY_TRANSITIONS); events of the transition into this state
+            self.lazy_text = LAZY_TRANSITIONS
+            self.transition_events = None
 
         else:
-            # copy constructor
-            self.turn = old.turn
-            self.pop_families = old.pop_families
-            self.pop_youth = old.pop_youth
-            self.pop_chronic = old.pop_chronic
-            self.pop_veterans = old.pop_veterans
-            self.homeless_population = old.homeless_population
-            self.shelter_capacity = old.shelter_capacity
-            self.transitional_units = old.transitional_units
-            self.permanent_units = old.permanent_units
-            self.construction_pipeline = copy.deepcopy(old.construction_pipeline)
-            self.social_workers = old.social_workers
-            self.outreach_teams = old.outreach_teams
-            self.medical_vans = old.medical_vans
-            self.operating_obligations = old.operating_obligations
-            self.shelter_budget = old.shelter_budget
-            self.neighborhood_budget = old.neighborhood_budget
-            self.business_budget = old.business_budget
-            self.medical_budget = old.medical_budget
-            self.university_budget = old.university_budget
-            self.public_support = old.public_support
-            self.economy_index = old.economy_index
-            self.legal_pressure = old.legal_pressure
-            self.policy_momentum = old.policy_momentum
-            self.debt = old.debt
-            self.construction_delay_factor = old.construction_delay_factor
-            self.policy_fatigue = old.policy_fatigue
-            self.last_action = old.last_action
-            self.round = old.round
-            self.trend_history = list(old.trend_history)
+            # copy constructor: one buffer copy for all numeric fields; the job queue is
+            # shared copy-on-write (whichever state changes it first takes a private copy)
+            self._v = old._v[:]
+            self.ticks = old.ticks
+            self._jobs = old._jobs
+            self._jobs_owned = old._jobs_owned = False
+            self._history = old._history
+            self._hist_row = old._hist_row
+            self._last_action = old._last_action
             self.last_action_url = old.last_action_url
+            self.last_outcome = old.last_outcome
+            self.lazy_text = old.lazy_text
+            self.transition_events = None
+            # successor states continue the same game, so they share its random stream
+            self.rng = old.rng
 
     # Compatibility for Select_Roles/Web_SZ5_01: numeric properties required
     @property
     def current_role_num(self):
-        return self.turn
+        return self._v[0]
 
     @property
     def current_role(self):
-        return self.turn
+        return self._v[0]
 
     @property
     def whose_turn(self):
-        return self.turn
+        return self._v[0]
+
+    @property
+    def last_action(self):
+        # in lazy mode this holds a record until someone reads it
+        a = self._last_action
+        if a.__class__ is tuple:
+            a = self._last_action = format_last_action(*a)
+        return a
+
+    @last_action.setter
+    def last_action(self, value):
+        self._last_action = value
+
+    def add_event(self, event):
+        if self.transition_events is None:
+            self.transition_events = []
+        self.transition_events.append(event)
 
     def recalc_population(self):
         self.homeless_population = max(0, int(self.pop_families + self.pop_youth +
                                     self.pop_chronic + self.pop_veterans))
 
+    @property
+    def construction_pipeline(self):
+        # pending jobs as (type_str, units, rounds_remaining), in the order they were scheduled
+        ticks = self.ticks
+        return [(t, units, due - ticks) for (due, seq, t, units) in sorted(self._jobs, key=_job_seq)]
+
+    @construction_pipeline.setter
+    def construction_pipeline(self, jobs):
+        ticks = self.ticks
+        self._jobs = [(ticks + rounds, next(_JOB_SEQ), t, units) for (t, units, rounds) in jobs]
+        heapq.heapify(self._jobs)
+        self._jobs_owned = True
+
+    def add_job(self, kind, units, rounds):
+        if not self._jobs_owned:
+            self._jobs = list(self._jobs)
+            self._jobs_owned = True
+        heapq.heappush(self._jobs, (self.ticks + rounds, next(_JOB_SEQ), kind, units))
+
     def record_trend(self):
-        # process construction pipeline: decrement rounds, add built units when finished
-        new_pipeline = []
-        built = {'shelter_capacity':0, 'transitional_units':0, 'permanent_units':0}
-        for (t, units, rounds) in self.construction_pipeline:
-            rounds -= 1
-            if rounds <= 0:
-                if t == 'shelter':
-                    self.shelter_capacity += units
-                    built['shelter_capacity'] += units
-                elif t == 'trans':
-                    self.transitional_units += units
-                    built['transitional_units'] += units
-                elif t == 'perm':
-                    self.permanent_units += units
-                    built['permanent_units'] += units
-            else:
-                new_pipeline.append((t, units, rounds))
-        self.construction_pipeline = new_pipeline
+        # process construction pipeline: only jobs finishing on this tick are touched
+        self.ticks = ticks = self.ticks + 1
+        jobs = self._jobs
+        if jobs and jobs[0][0] <= ticks:
+            if not self._jobs_owned:
+                jobs = self._jobs = list(jobs)
+                self._jobs_owned = True
+            vals = self._v
+            while jobs and jobs[0][0] <= ticks:
+                _, _, t, units = heapq.heappop(jobs)
+                i = BUILD_TARGETS.get(t)
+                if i is not None:
+                    vals[i] += units
 
         # apply operating obligations: if budgets can't cover obligations, capacity degrades
         total_operating_budget = (self.shelter_budget + self.neighborhood_budget +
@@ -194,9 +312,66 @@ class State(Basic_State):
             lost_shelter = int(self.shelter_capacity * degrade_pct * 0.05)  # small degradation
             self.shelter_capacity = max(0, self.shelter_capacity - lost_shelter)
 
-        self.trend_history.append(int(self.homeless_population))
-        if len(self.trend_history) > 10:
-            self.trend_history.pop(0)
+        self._hist_row = self._history.append(self._hist_row, self._v)
+
+    @property
+    def trend_history(self):
+        return self._history.trend(self._hist_row)
+
+    @trend_history.setter
+    def trend_history(self, values):
+        # start a new history whose homeless totals are values (other metrics as they are now)
+        store = self._history = HistoryStore()
+        n = len(values)
+        data = store.data = array.array('d', self._v) * n
+        w = store.width
+        for r, h in enumerate(values):
+            data[r * w + _HOMELESS] = h
+        store.parents = array.array('q', range(-1, n - 1))
+        self._hist_row = n - 1
+
+    def history(self, fields=None):
+        '''Full-game history of this state's line of play: {field: [value per record_trend]},
+        starting with the initial state. fields defaults to HISTORY_FIELDS.'''
+        store = self._history
+        rows = store.lineage(self._hist_row)
+        return {name: store.column(name, rows) for name in (fields or HISTORY_FIELDS)}
+
+    def detach_history(self, keep=TREND_LENGTH):
+        '''Give this state a private store holding only its last keep rows, e.g. for search
+        simulations whose rows would otherwise pile up in the game's store.'''
+        store = self._history
+        w = store.width
+        new = HistoryStore()
+        row = -1
+        rows = []
+        r = self._hist_row
+        while r >= 0 and len(rows) < keep:
+            rows.append(r)
+            r = store.parents[r]
+        for r in reversed(rows):
+            row = new.append(row, store.data[r * w:(r + 1) * w])
+        self._history = new
+        self._hist_row = row
+
+    def state_key(self, include_action=False, include_trend=False):
+        '''Canonical tuple for search and caching. Floats are rounded so the same state reached
+        by a different order of actions maps to the same key; the pipeline is treated as an
+        unordered multiset. last_action/last_action_url and the trend window are optional,
+        and the rng is never part of the key.'''
+        key = (tuple([round(v, 6) if v.__class__ is float else v for v in self._v]),
+               tuple(sorted(self.construction_pipeline)))
+        if include_action:
+            key += (self.last_action, self.last_action_url)
+        if include_trend:
+            key += (tuple(self.trend_history),)
+        return key
+
+    def fingerprint(self, include_action=False, include_trend=False):
+        # fast in-process hash of state_key. Not stable across processes: str hashes are salted
+        # per process (PYTHONHASHSEED) and the key holds strings (the pipeline's job kinds,
+        # and the action text with include_action). Persist or share state_key() instead.
+        return hash(self.state_key(include_action, include_trend))
 
     def __str__(self):
         return (f"Round {self.round} - Turn: {int_to_name(self.turn)}\n"
@@ -220,6 +395,28 @@ class State(Basic_State):
             return f"Goal: homeless {self.homeless_population}, support {self.public_support:.1f}%, legal {self.legal_pressure:.1f}"
         return ""
 
+for _i, _name in enumerate(STATE_FIELDS):
+    setattr(State, _name, _buffer_field(_i))
+del _i, _name
+
+# metrics returned by State.history() by default
+HISTORY_FIELDS = ('round', 'pop_families', 'pop_youth', 'pop_chronic', 'pop_veterans', 'homeless_population',
+                  'shelter_capacity', 'transitional_units', 'permanent_units',
+                  'shelter_budget', 'neighborhood_budget', 'business_budget', 'medical_budget', 'university_budget',
+                  'public_support', 'economy_index', 'legal_pressure', 'policy_momentum', 'debt')
+
+# construction job kinds -> buffer index of the capacity they add to when finished
+BUILD_TARGETS = {'shelter': FIELD_INDEX['shelter_capacity'],
+                 'trans': FIELD_INDEX['transitional_units'],
+                 'perm': FIELD_INDEX['permanent_units']}
+
+# job queue entries are (due tick, seq, type_str, units); seq keeps scheduling order
+_JOB_SEQ = itertools.count()
+
+
+def _job_seq(job):
+    return job[1]
+
 SESSION = None
 
 PLAYABLE_ROLES = [NEIGHBORHOODS, BUSINESS, MEDICAL, SHELTERS, UNIVERSITY]
@@ -231,42 +428,68 @@ def next_player_index(current_role_index):
     return PLAYABLE_ROLES[(idx + 1) % NUM_PLAYERS]
 
 
+# Round-boundary macro model. Shocks move fields by a uniform draw, clamped to a bound:
+# kind -> ((field, sign, uniform low, uniform high, bound), ...); inflation scales obligations.
+GRANT_MOMENTUM = 5.0
+GRANT_CHANCE = 0.25
+SHOCK_CHANCE = 0.12
+SHOCK_KINDS = ('recession', 'boom', 'inflation')
+SHOCK_MOVES = {
+    'recession': (('economy_index', -1, 6.0, 15.0, 50.0), ('public_support', -1, 1.0, 4.0, 0.0)),
+    'boom': (('economy_index', 1, 5.0, 20.0, 150.0), ('public_support', 1, 0.5, 3.0, 100.0)),
+    'inflation': (),
+}
+INFLATION_FACTOR = 1.08
+TAX_RATE = 2.5          # k$ of tax inflow per round per point of economy_index
+FATIGUE_DECAY = 0.05    # policy_fatigue removed each round
+
+
 def update_turn(state):
     # each time a full cycle completes, apply macro updates (taxes, shocks, fatigue decay)
     state.turn = next_player_index(state.turn)
     if state.turn == PLAYABLE_ROLES[0]:
-        state.round += 1
-        # budget inflow (k$): simple model — taxes proportional to economy index
-        tax_inflow = max(0.0, state.economy_index * 2.5)
-        # split inflows among budgets
-        split = tax_inflow / 5.0
-        state.shelter_budget += split
-        state.neighborhood_budget += split
-        state.business_budget += split
-        state.medical_budget += split
-        state.university_budget += split
-        # occasional grant if momentum high
-        if state.policy_momentum > 5.0 and random.random() < 0.25:
-            grant = 300.0
-            state.shelter_budget += grant
-            state.debt -= 50.0  # grant reduces need to borrow
-        # apply economic shock randomly
-        if random.random() < 0.12:
-            shock = random.choice(['recession','boom','inflation'])
-            if shock == 'recession':
-                state.economy_index = max(50.0, state.economy_index - random.uniform(6.0,15.0))
-                state.public_support = max(0.0, state.public_support - random.uniform(1.0,4.0))
-                add_to_next_transition(f"MacroShock: recession", state)
-            elif shock == 'boom':
-                state.economy_index = min(150.0, state.economy_index + random.uniform(5.0,20.0))
-                state.public_support = min(100.0, state.public_support + random.uniform(0.5,3.0))
-                add_to_next_transition(f"MacroShock: boom", state)
-            else:
-                # inflation reduces budget purchasing power (modeled as increased operating costs)
-                state.operating_obligations *= 1.08
-                add_to_next_transition(f"MacroShock: inflation", state)
-        # policy fatigue decays slowly each round
-        state.policy_fatigue = max(0.0, state.policy_fatigue - 0.05)
+        rng = state.rng
+        # occasional grant if momentum high; economic shock at random
+        grant = state.policy_momentum > GRANT_MOMENTUM and rng.random() < GRANT_CHANCE
+        shock = rng.choice(SHOCK_KINDS) if rng.random() < SHOCK_CHANCE else None
+        round_boundary(state, grant, shock, rng.uniform)
+
+
+def round_boundary(state, grant, shock, uniform):
+    '''Apply the macro update of a new round for a given grant flag and shock kind (or None).
+    uniform(lo, hi) draws shock magnitudes; with uniform=None the SHOCK_MOVES are left to
+    the caller (used for exact expectations).'''
+    state.round += 1
+    # budget inflow (k$): simple model — taxes proportional to economy index
+    tax_inflow = max(0.0, state.economy_index * TAX_RATE)
+    # split inflows among budgets
+    split = tax_inflow / 5.0
+    state.shelter_budget += split
+    state.neighborhood_budget += split
+    state.business_budget += split
+    state.medical_budget += split
+    state.university_budget += split
+    if grant:
+        state.shelter_budget += 300.0
+        state.debt -= 50.0  # grant reduces need to borrow
+    if shock is not None:
+        if uniform is not None:
+            for (field, sign, lo, hi, bound) in SHOCK_MOVES[shock]:
+                v = getattr(state, field) + sign * uniform(lo, hi)
+                setattr(state, field, max(bound, v) if sign < 0 else min(bound, v))
+        if shock == 'inflation':
+            # inflation reduces budget purchasing power (modeled as increased operating costs)
+            state.operating_obligations *= INFLATION_FACTOR
+        macro_shock_banner(state, shock)
+    # policy fatigue decays slowly each round
+    state.policy_fatigue = max(0.0, state.policy_fatigue - FATIGUE_DECAY)
+
+
+def macro_shock_banner(state, kind):
+    if state.lazy_text:
+        state.add_event(('shock', kind))
+    else:
+        add_to_next_transition(f"MacroShock: {kind}", state)
 
 
 def can_act_as(role, s):
@@ -287,6 +510,17 @@ def has_budget(news, budget_name, amt_k):
     return getattr(news, budget_name, 0.0) >= amt_k
 
 
+def can_afford(s, op, full=True):
+    '''full=True: has_budget for every item of op's cost. full=False: op_fn would apply at
+    least part of its effects (charge_budget returns a fraction > 0).'''
+    v = s._v
+    for i, amt in op.budget_checks:
+        avail = v[i] if i is not None else 0.0
+        if avail < amt and (full or avail <= 0):
+            return False
+    return True
+
+
 def charge_budget(news, budget_charges):
     '''Attempt to deduct budget amounts; if insufficient, deduct what is available and return fraction applied.''' 
     fractions = []
@@ -305,109 +539,278 @@ def charge_budget(news, budget_charges):
 
 # probabilistic operator generator with partial success
 
+EFFECT_KINDS = ('cut', 'displace', 'build')
+
+
+def compile_deltas(deltas):
+    '''Compile an operator's deltas into an execution plan, once, at definition time.
+    Steps are ('add', key, amount, round_to_int, field_index) for numeric deltas, the
+    effect tuples (cut/displace/build) as declared, and ('call', fn, takes_multiplier)
+    for any other callable.'''
+    plan = []
+    for k, v in deltas.items():
+        if isinstance(v, tuple) and v and v[0] in EFFECT_KINDS:
+            plan.append(v)
+        elif callable(v):
+            effect = getattr(v, 'effect', None)
+            plan.append(effect if effect else ('call', v, v.__code__.co_argcount >= 2))
+        elif k in FIELD_INDEX:
+            # population/unit counts change by whole numbers
+            as_int = k.startswith('pop_') or k.endswith('_units') or k.endswith('_capacity')
+            plan.append(('add', k, v, as_int, FIELD_INDEX[k]))
+    return tuple(plan)
+
+
 def make_op(name, role, cost_k, deltas, apa_source, fc_token, difficulty=0.0):
     """
     - difficulty: extra failure chance (0.0..0.8); higher means harder to succeed
     Operators now compute success_chance as a function of policy_momentum, public_support, and difficulty.
     On partial / failed attempts, apply scaled effects and record different transition banners.
     """
-    def op_fn(s, name=name, cost_k=cost_k, deltas=deltas, apa_source=apa_source, fc_token=fc_token, difficulty=difficulty):
+    plan = compile_deltas(deltas)
+    role_name = int_to_name(role)
+    source_url = source_url_of(apa_source)
+
+    def op_fn(s):
         news = State(s)
-        add_to_next_transition(f"{int_to_name(role)} -> {name}", news)
-        # charge budgets (allow partial)
-        frac = charge_budget(news, cost_k)
+        lazy = news.lazy_text
+        if not lazy:
+            add_to_next_transition(f"{role_name} -> {name}", news)
+        news.last_action_url = source_url
+        # charge budgets (allow partial); costs and difficulty are read from the operator
+        # so that tune_operator can change them
+        frac = charge_budget(news, op.cost_k)
         if frac == 0.0:
-            news.last_action = f"{int_to_name(role)} attempted '{name}' but lacked required budgets."
-            add_transition_with_sources(news, f"{int_to_name(role)} → {name} (failed)", "Action failed: no available budget.", apa_source, fc_token)
+            news.last_outcome = (False, 0.0, 0.0)
+            if lazy:
+                news.last_action = (role_name, name, None, None)
+                news.add_event(('op', role_name, name, apa_source, None, None, ()))
+            else:
+                news.last_action = format_last_action(role_name, name, None, None)
+                add_to_next_transition(effects_banner("Action failed: no available budget.", apa_source), news)
             update_turn(news)
             news.record_trend()
             return news
-        # compute success chance
-        # base influenced by policy momentum (more momentum -> higher success), public support,
-        # and policy_fatigue (reduces success). clamp between 0.05 and 0.98
-        base = 0.35 + (news.policy_momentum * 0.03) + ((news.public_support - 40.0) * 0.01)
-        base -= news.policy_fatigue * 0.05
-        success_chance = clamp(base - difficulty, 0.05, 0.98)
-        # scale success by fraction of budget applied
-        success_chance *= (0.5 + 0.5 * frac)  # if partial spending, at least half effect possible
-        roll = random.random()
-        effects = []
-        applied_multiplier = 1.0
+        success_chance = compute_success_chance(news, op.difficulty, frac)
+        roll = news.rng.random()
         if roll <= success_chance:
             # success
-            applied_multiplier = 1.0
-            outcome_text = f"Success (p={success_chance:.2f})"
+            mult = 1.0
         else:
             # partial or failure: apply fraction of effects proportional to budget fraction and a random penalty
-            applied_multiplier = frac * random.uniform(0.25, 0.75)
-            outcome_text = f"Partial/Failed (p={success_chance:.2f}, roll={roll:.2f})"
-        # apply deltas scaled by applied_multiplier. Deltas can be callables.
-        for k, v in deltas.items():
-            if callable(v):
-                # call with news and multiplier; expect textual effect or None
-                try:
-                    desc = v(news, applied_multiplier) if v.__code__.co_argcount >= 2 else v(news)
-                except Exception:
-                    # fallback: call without multiplier
-                    desc = v(news)
-                if desc:
-                    effects.append(desc)
-            else:
-                # numeric additive scaled
-                if hasattr(news, k):
-                    before = getattr(news, k)
-                    delta = v * applied_multiplier
-                    # ensure integer change for population/unit counts
-                    if isinstance(v, int) or isinstance(v, float):
-                        if k.startswith('pop_') or k.endswith('_units') or k.endswith('_capacity'):
-                            delta = int(round(delta))
-                    after = before + delta
-                    setattr(news, k, after)
-                    effects.append(f"{k}: {before} -> {after} (applied x{applied_multiplier:.2f})")
-        # special: if deltas included construction (as a tuple) allow adding to pipeline
-        # recalc derived
-        news.recalc_population()
-        # rise in policy fatigue for costly actions
-        cost_total = sum(cost_k.values()) if cost_k else 0.0
-        news.policy_fatigue += min(0.02 * (cost_total/100.0), 0.5)
-        news.policy_momentum = clamp(news.policy_momentum + 0.5 * applied_multiplier, -10.0, 50.0)
+            mult = frac * news.rng.uniform(*PARTIAL_MULT_RANGE)
+        effects = apply_outcome(news, plan, mult, op.fatigue_step)
         news.record_trend()
-        eff_text = "\n".join(effects) if effects else "(no direct numeric effect recorded)"
-        add_transition_with_sources(news, f"{int_to_name(role)} → {name} ({outcome_text})", eff_text, apa_source, fc_token)
-        news.last_action = f"{int_to_name(role)} performed '{name}' ({outcome_text})."
+        if lazy:
+            news.last_action = (role_name, name, success_chance, roll)
+            news.add_event(('op', role_name, name, apa_source, success_chance, roll, effects))
+        else:
+            news.last_action = format_last_action(role_name, name, success_chance, roll)
+            add_to_next_transition(effects_banner(effects_text(effects), apa_source), news)
+        news.last_outcome = (roll <= success_chance, mult, frac)
         update_turn(news)
         return news
-    return Operator(name, lambda s, role=role: can_act_as(role, s), op_fn)
+    op = Operator(name, lambda s, role=role: can_act_as(role, s), op_fn)
+    # keep the definition on the operator for headless tools (batch runner, policies, engines)
+    op.role = role
+    op.role_name = role_name
+    op.plan = plan
+    op.source_url = source_url
+    op.difficulty = difficulty
+    set_operator_costs(op, cost_k)
+    return op
+
+
+def set_operator_costs(op, cost_k):
+    op.cost_k = cost_k
+    # rise in policy fatigue for costly actions
+    cost_total = sum(cost_k.values()) if cost_k else 0.0
+    op.fatigue_step = min(0.02 * (cost_total/100.0), 0.5)
+    # (buffer index or None, amount) per budget item, for can_afford
+    op.budget_checks = tuple((FIELD_INDEX.get(bk), amt) for bk, amt in cost_k.items())
+
+
+def tune_operator(op, difficulty=None, cost_k=None):
+    '''Change an operator's difficulty and/or budget costs in place (balance tuning,
+    parameter sweeps); its fatigue step and budget checks follow the new costs.'''
+    if difficulty is not None:
+        op.difficulty = difficulty
+    if cost_k is not None:
+        set_operator_costs(op, dict(cost_k))
+
+
+PARTIAL_MULT_RANGE = (0.25, 0.75)   # partial/failed attempts apply frac * uniform(*range) of the effects
+
+# success-chance model (compute_success_chance)
+SUCCESS_BASE = 0.35
+MOMENTUM_WEIGHT = 0.03   # per point of policy_momentum
+SUPPORT_WEIGHT = 0.01    # per point of public_support above SUPPORT_PIVOT
+SUPPORT_PIVOT = 40.0
+FATIGUE_PENALTY = 0.05   # per point of policy_fatigue
+
+
+def compute_success_chance(news, difficulty, frac):
+    # base influenced by policy momentum (more momentum -> higher success), public support,
+    # and policy_fatigue (reduces success). clamp between 0.05 and 0.98
+    base = SUCCESS_BASE + (news.policy_momentum * MOMENTUM_WEIGHT) + ((news.public_support - SUPPORT_PIVOT) * SUPPORT_WEIGHT)
+    base -= news.policy_fatigue * FATIGUE_PENALTY
+    success_chance = clamp(base - difficulty, 0.05, 0.98)
+    # scale success by fraction of budget applied
+    return success_chance * (0.5 + 0.5 * frac)  # if partial spending, at least half effect possible
+
+
+def apply_outcome(news, plan, mult, fatigue_step):
+    '''Apply an operator's compiled plan scaled by mult, then its fatigue and momentum
+    changes. Returns the effect records (see format_effect).'''
+    effects = []
+    # apply the compiled deltas scaled by the multiplier
+    for step in plan:
+        kind = step[0]
+        if kind == 'add':
+            _, k, v, as_int, i = step
+            vals = news._v
+            before = vals[i]
+            delta = v * mult
+            if as_int:
+                delta = int(round(delta))
+            after = before + delta
+            vals[i] = after
+            effects.append(('add', k, before, after, mult))
+        elif kind == 'cut':
+            _, attr, pct = step
+            before = getattr(news, attr)
+            reduction = int(round(percent_of(before, pct) * mult))
+            setattr(news, attr, max(0, before - reduction))
+            effects.append(('cut', attr, reduction, pct, mult))
+        elif kind == 'displace':
+            _, pct, label = step
+            added = int(round(percent_of(news.homeless_population, pct) * mult))
+            news.pop_chronic = news.pop_chronic + added
+            effects.append(('displace', label, added))
+        elif kind == 'build':
+            _, t, units, text = step
+            n = int(round(units * mult))
+            schedule_construction(news, t, n)
+            effects.append(('build', text, t, n))
+        else:
+            _, fn, takes_mult = step
+            desc = fn(news, mult) if takes_mult else fn(news)
+            if desc:
+                effects.append(('text', desc))
+    # recalc derived
+    news.recalc_population()
+    news.policy_fatigue += fatigue_step
+    news.policy_momentum = clamp(news.policy_momentum + 0.5 * mult, -10.0, 50.0)
+    return effects
 
 # Utility to create construction job: adds to pipeline with modeled delay
 
 def schedule_construction(state, kind, units):
     # delays scale with construction_delay_factor and units
     rounds = max(1, int(round((units/100.0) * state.construction_delay_factor)))
-    state.construction_pipeline.append((kind, units, rounds))
+    state.add_job(kind, units, rounds)
 
 # wrapper for add_transition_with_sources (keeps original functionality)
 def add_transition_with_sources(s_new, title, effects_text, apa_text, fc_token):
-    import re
-    url_match = re.search(r'https?://[^\s]+', apa_text)
-    if url_match:
-        url = url_match.group(0)
-        if not hasattr(s_new, 'last_action_url'):
-            s_new.last_action_url = url
+    s_new.last_action_url = source_url_of(apa_text)
+    add_to_next_transition(effects_banner(effects_text, apa_text), s_new)
+
+# ---------------- Transition text ----------------
+# Operators describe what they did with small records; the text below is only built
+# when a UI or log asks for it (immediately unless the state is in lazy_text mode).
+#   ('op', role_name, op_name, apa_source, success_chance, roll, effects)
+#       success_chance is None when no budget was available
+#   ('shock', kind)                              macro shock at a round boundary
+# Effect records inside an 'op' event:
+#   ('add', field, before, after, mult)  ('cut', attr, reduction, pct, mult)
+#   ('displace', label, added)           ('build', text, kind, units)   ('text', desc)
+
+_URL_RE = None
+
+
+def source_url_of(apa_text):
+    global _URL_RE
+    if _URL_RE is None:
+        import re
+        _URL_RE = re.compile(r'https?://[^\s]+')
+    url_match = _URL_RE.search(apa_text)
+    return url_match.group(0) if url_match else ""
+
+
+def format_last_action(role_name, name, success_chance, roll):
+    if success_chance is None:
+        return f"{role_name} attempted '{name}' but lacked required budgets."
+    return f"{role_name} performed '{name}' ({format_outcome(success_chance, roll)})."
+
+
+def format_outcome(success_chance, roll):
+    if roll <= success_chance:
+        return f"Success (p={success_chance:.2f})"
+    return f"Partial/Failed (p={success_chance:.2f}, roll={roll:.2f})"
+
+
+def format_effect(e):
+    kind = e[0]
+    if kind == 'add':
+        return f"{e[1]}: {e[2]} -> {e[3]} (applied x{e[4]:.2f})"
+    if kind == 'cut':
+        return f"{e[1]}: -{e[2]} (intended {e[3]}% scaled by {e[4]:.2f})"
+    if kind == 'displace':
+        return f"{e[1]} +{e[2]}"
+    if kind == 'build':
+        return e[1].format(kind=e[2], units=e[3])
+    return e[1]
+
+
+def effects_text(effects):
+    return "\n".join(map(format_effect, effects)) if effects else "(no direct numeric effect recorded)"
+
+
+def effects_banner(body, apa_text):
+    return f"| Effects:\n{body}\n| Source: {apa_text}"
+
+
+def transition_text(s):
+    '''Banners for the transition into s, as the eager mode would have shown them.'''
+    lines = []
+    for e in s.transition_events or ():
+        if e[0] == 'shock':
+            lines.append(f"MacroShock: {e[1]}")
+            continue
+        _, role_name, name, apa_source, success_chance, roll, effects = e
+        lines.append(f"{role_name} -> {name}")
+        if success_chance is None:
+            lines.append(effects_banner("Action failed: no available budget.", apa_source))
         else:
-            s_new.last_action_url = url
-        banner = f"| Effects:\n{effects_text}\n| Source: {apa_text}"
-    else:
-        s_new.last_action_url = ""
-        banner = f"| Effects:\n{effects_text}\n| Source: {apa_text}"
-    add_to_next_transition(banner, s_new)
+            lines.append(effects_banner(effects_text(effects), apa_source))
+    return lines
 
 # ---------------- Operators (updated realism) ----------------
 # For readability: each operator includes an APA-like source string that
 # refers to the relevant documents from your uploaded spec (filecite tokens included below).
 
-# Helper delta callables accept (news, multiplier) to support scaled effects
+# Operators are declared as plain data in OPERATOR_TABLE. Besides plain numbers
+# (additive deltas scaled by the outcome multiplier), a delta can be one of these
+# effect tuples:
+#   cut_pct(attr, pct)             reduce a subpopulation by pct% (scaled)
+#   displace_pct(pct, label)       punitive pushout: pct% of the homeless population joins pop_chronic
+#   build_units(kind, units[, text])  schedule a construction job in the pipeline
+# make_op compiles the deltas once into an execution plan (see compile_deltas).
+
+def cut_pct(attr, pct):
+    return ('cut', attr, pct)
+
 
+def displace_pct(pct, label):
+    return ('displace', pct, label)
+
+
+def build_units(kind, units, text="Scheduled {kind} +{units}"):
+    return ('build', kind, units, text)
+
+
+# Helper delta callable for custom operators: accepts (news, multiplier) to support scaled effects.
+# Its effect tag lets make_op compile it like cut_pct.
 def pop_reduction_factory(attr, pct):
     def fn(news, mult=1.0):
         before = getattr(news, attr)
@@ -415,666 +818,605 @@ def pop_reduction_factory(attr, pct):
         reduction = int(round(reduction * mult))
         setattr(news, attr, max(0, before - reduction))
         return f"{attr}: -{reduction} (intended {pct}% scaled by {mult:.2f})"
+    fn.effect = cut_pct(attr, pct)
     return fn
 
-# ---- SHELTERS (12 operators) ----
-shelters_ops = []
-
-# 1 Emergency Expansion (now schedules construction and has higher difficulty)
-shelters_ops.append(make_op(
-    "Emergency Expansion (beds +300)",
-    SHELTERS,
-    {'shelter_budget': 360.0},
-    {'shelter_capacity': 300, 'pop_families': pop_reduction_factory('pop_families', 10), 'pop_veterans': pop_reduction_factory('pop_veterans', 12)},
-    "U.S. Department of Housing and Urban Development. Annual Homeless Assessment Report (AHAR). HUD Exchange. https://www.hudexchange.info/programs/hdx/ahar/",
-    FC['shelters'],
-    difficulty=0.15
-))
-
-# We'll schedule construction inside the op by wrapping a callable delta
-
-def schedule_shelter_construction(news, mult=1.0):
-    units = int(round(300 * mult))
-    schedule_construction(news, 'shelter', units)
-    return f"Scheduled construction: shelter +{units} (pipeline)"
-
-# Replace the numeric shelter_capacity delta with scheduling callable in op 1
-shelters_ops[-1] = make_op(
-    "Emergency Expansion (beds +300)",
-    SHELTERS,
-    {'shelter_budget': 360.0},
-    {'_construction_job': schedule_shelter_construction, 'pop_families': pop_reduction_factory('pop_families', 10), 'pop_veterans': pop_reduction_factory('pop_veterans', 12)},
-    "U.S. Department of Housing and Urban Development. Annual Homeless Assessment Report (AHAR). HUD Exchange. https://www.hudexchange.info/programs/hdx/ahar/",
-    FC['shelters'],
-    difficulty=0.20
-)
+OPERATOR_TABLE = [
+    # ---- SHELTERS (12 operators) ----
+    # 1 Emergency Expansion (schedules construction; higher difficulty)
+    {'name': "Emergency Expansion (beds +300)",
+     'role': SHELTERS,
+     'cost': {'shelter_budget': 360.0},
+     'deltas': {'_construction_job': build_units('shelter', 300, "Scheduled construction: {kind} +{units} (pipeline)"), 'pop_families': cut_pct('pop_families', 10), 'pop_veterans': cut_pct('pop_veterans', 12)},
+     'source': "U.S. Department of Housing and Urban Development. Annual Homeless Assessment Report (AHAR). HUD Exchange. https://www.hudexchange.info/programs/hdx/ahar/",
+     'fc': FC['shelters'],
+     'difficulty': 0.20},
+
+    # 2 Community Partnership
+    {'name': "Community Partnership (vols & caseworkers)",
+     'role': SHELTERS,
+     'cost': {'shelter_budget': 100.0},
+     'deltas': {'social_workers': 6, 'pop_chronic': cut_pct('pop_chronic', 1.5), 'policy_momentum': 0.6},
+     'source': "Homeless Services Research Institute. Community Partnership Evaluation Studies. https://www.hsri.org/projects/evaluating-samhsa-four-homelessness-programs-and-resources",
+     'fc': FC['shelters'],
+     'difficulty': 0.05},
+
+    # 3 Housing First Pilot (perm +150)
+    {'name': "Housing First Pilot (perm +150)",
+     'role': SHELTERS,
+     'cost': {'shelter_budget': 520.0},
+     'deltas': {'_construction_job': build_units('perm', 150), 'pop_chronic': cut_pct('pop_chronic', 8), 'public_support': 2.5, 'economy_index': -1.5},
+     'source': "Conrad N. Hilton Foundation. Chronic Homelessness Initiative Evaluation. https://www.hiltonfoundation.org/learning/evaluation-of-housing-for-health-permanent-supportive-housing-program/",
+     'fc': FC['shelters'],
+     'difficulty': 0.18},
+
+    # 4 Volunteer Training
+    {'name': "Volunteer Training (social workers +3)",
+     'role': SHELTERS,
+     'cost': {'shelter_budget': 40.0},
+     'deltas': {'social_workers': 3, 'public_support': 1.0},
+     'source': "Homeless Services Research Institute. Caseworker Training Impact Study. https://www.hsri.org/projects/evaluating-samhsa-four-homelessness-programs-and-resources",
+     'fc': FC['shelters'],
+     'difficulty': 0.02},
+
+    # 5 Rent Assistance Fund
+    {'name': "Rent Assistance Fund (prevention)",
+     'role': SHELTERS,
+     'cost': {'shelter_budget': 260.0},
+     'deltas': {'pop_families': cut_pct('pop_families', 6), 'pop_youth': cut_pct('pop_youth', 4), 'policy_momentum': 1.0, 'public_support': 1.8},
+     'source': "U.S. Department of Housing and Urban Development. Rapid Re-Housing Brief. HUD Exchange. https://www.hudexchange.info/resource/3891/rapid-re-housing-brief/",
+     'fc': FC['shelters'],
+     'difficulty': 0.07},
+
+    # 6 Defer Maintenance (gain budget, lose beds)
+    {'name': "Defer Maintenance (gain budget, lose beds)",
+     'role': SHELTERS,
+     'cost': {},
+     'deltas': {'shelter_budget': 60.0, 'shelter_capacity': -40, 'public_support': -2.5, 'legal_pressure': 2.0},
+     'source': "U.S. Department of Housing and Urban Development. Shelter Standards and Maintenance Requirements. HUD.gov.",
+     'fc': FC['shelters'],
+     'difficulty': 0.01},
+
+    # 7 Rapid Rehousing Boost
+    {'name': "Rapid Rehousing Boost",
+     'role': SHELTERS,
+     'cost': {'shelter_budget': 260.0},
+     'deltas': {'transitional_units': 60, 'pop_families': cut_pct('pop_families', 9), 'policy_momentum': 1.2},
+     'source': "National Low Income Housing Coalition. The Gap: A Shortage of Affordable Homes. NLIHC. https://nlihc.org/gap",
+     'fc': FC['shelters'],
+     'difficulty': 0.09},
+
+    # 8 Add Outreach Vans
+    {'name': "Add Outreach Vans",
+     'role': SHELTERS,
+     'cost': {'shelter_budget': 110.0},
+     'deltas': {'outreach_teams': 2, 'pop_youth': cut_pct('pop_youth', 6)},
+     'source': "Commonwealth Fund. Mobile Health Services for Homeless Populations. https://www.commonwealthfund.org/publications/case-study/2021/aug/how-medical-respite-care-program-offers-pathway-health-housing",
+     'fc': FC['shelters'],
+     'difficulty': 0.04},
+
+    # 9 Intensify Case Management
+    {'name': "Intensify Case Management",
+     'role': SHELTERS,
+     'cost': {'shelter_budget': 140.0},
+     'deltas': {'social_workers': 5, 'policy_momentum': 0.9, 'pop_chronic': cut_pct('pop_chronic', 5)},
+     'source': "Homeless Services Research Institute. Case Management and Housing Stability Study. https://www.hsri.org/projects/evaluating-samhsa-four-homelessness-programs-and-resources",
+     'fc': FC['shelters'],
+     'difficulty': 0.06},
+
+    # 10 Sanction Encampment
+    {'name': "Sanction Encampment (sanctioned services)",
+     'role': SHELTERS,
+     'cost': {'shelter_budget': 180.0},
+     'deltas': {'shelter_capacity': 80, 'public_support': -1.0, 'legal_pressure': -2.5},
+     'source': "PubMed Central. Sanctioned Encampments and Harm Reduction. https://www.ncbi.nlm.nih.gov/pmc/articles/PMC8427990/",
+     'fc': FC['shelters'],
+     'difficulty': 0.12},
+
+    # 11 Partner: Medical Support
+    {'name': "Partner: Medical Support (onsite clinics)",
+     'role': SHELTERS,
+     'cost': {'shelter_budget': 160.0, 'medical_budget': 80.0},
+     'deltas': {'medical_vans': 1, 'pop_chronic': cut_pct('pop_chronic', 7)},
+     'source': "Commonwealth Fund. Integrating Health Care and Housing Services. https://www.commonwealthfund.org/publications/case-study/2021/aug/how-medical-respite-care-program-offers-pathway-health-housing",
+     'fc': FC['shelters'],
+     'difficulty': 0.08},
+
+    # 12 Evaluation & Data Sharing
+    {'name': "Evaluation & Data Sharing (with Univ)",
+     'role': SHELTERS,
+     'cost': {'shelter_budget': 80.0, 'university_budget': 70.0},
+     'deltas': {'policy_momentum': 1.6, 'public_support': 0.8},
+     'source': "United States Interagency Council on Homelessness. Data-Driven Decision Making. https://www.usich.gov/",
+     'fc': FC['shelters'],
+     'difficulty': 0.03},
+
+    # ---- NEIGHBORHOODS (12 operators) ----
+    {'name': "Media Campaign (reframe homelessness)",
+     'role': NEIGHBORHOODS,
+     'cost': {'neighborhood_budget': 140.0},
+     'deltas': {'public_support': 6.0, 'legal_pressure': -3.0},
+     'source': "SAGE Journals. Reframing Homelessness in Public Discourse. https://journals.sagepub.com/doi/10.1177/0739456X241265499",
+     'fc': FC['neigh'],
+     'difficulty': 0.06},
+
+    {'name': "Block New Low-Income Development (NIMBY action)",
+     'role': NEIGHBORHOODS,
+     'cost': {'neighborhood_budget': 60.0},
+     'deltas': {'permanent_units': -50, 'public_support': 2.0, 'legal_pressure': 4.0},
+     'source': "Berkeley Law Policy Advocacy Clinic. Homeless Exclusion and Legal Conflict Study. UC Berkeley School of Law. https://www.law.berkeley.edu/article/clinic-study-details-how-business-districts-target-homeless-people/",
+     'fc': FC['neigh'],
+     'difficulty': 0.04},
+
+    {'name': "Local Voucher Matching Fund",
+     'role': NEIGHBORHOODS,
+     'cost': {'neighborhood_budget': 200.0},
+     'deltas': {'pop_families': cut_pct('pop_families', 7), 'permanent_units': 20, 'policy_momentum': 0.8, 'public_support': 3.0},
+     'source': "U.S. Department of Housing and Urban Development. Housing Choice Voucher Program. https://www.hud.gov/program_offices/public_indian_housing/programs/hcv",
+     'fc': FC['neigh'],
+     'difficulty': 0.08},
+
+    {'name': "Civic Forum (reduce tensions)",
+     'role': NEIGHBORHOODS,
+     'cost': {'neighborhood_budget': 30.0},
+     'deltas': {'legal_pressure': -2.0, 'public_support': 1.0},
+     'source': "SAGE Journals. Community Engagement and Homelessness Response. https://journals.sagepub.com/doi/10.1177/10986111241289390",
+     'fc': FC['neigh'],
+     'difficulty': 0.02},
+
+    {'name': "Fund Private Security (pushout)",
+     'role': NEIGHBORHOODS,
+     'cost': {'neighborhood_budget': 120.0},
+     'deltas': {'public_support': 3.0, 'pop_chronic': displace_pct(0.6, 'chronic'), 'legal_pressure': 2.0},
+     'source': "Berkeley Law Policy Advocacy Clinic. The Criminalization of Homelessness in California. UC Berkeley School of Law. https://www.law.berkeley.edu/article/clinic-study-details-how-business-districts-target-homeless-people/",
+     'fc': FC['neigh'],
+     'difficulty': 0.10},
+
+    {'name': "Infrastructure Grants (convert trans->perm)",
+     'role': NEIGHBORHOODS,
+     'cost': {'neighborhood_budget': 300.0},
+     'deltas': {'transitional_units': -80, 'permanent_units': 72, 'pop_families': cut_pct('pop_families', 1), 'policy_momentum': 1.5},
+     'source': "RTI International. Capital Funding and Affordable Housing Development. https://www.rti.org/publication/a-review-of-the-literature-on-neighborhood-impacts-of-permanent-s",
+     'fc': FC['neigh'],
+     'difficulty': 0.14},
+
+    {'name': "Community Food & Outreach Sponsorship",
+     'role': NEIGHBORHOODS,
+     'cost': {'neighborhood_budget': 80.0},
+     'deltas': {'outreach_teams': 1, 'public_support': 1.2, 'pop_youth': cut_pct('pop_youth', 3)},
+     'source': "PubMed Central. Community Outreach Programs. https://www.ncbi.nlm.nih.gov/pmc/articles/PMC8427990/",
+     'fc': FC['neigh'],
+     'difficulty': 0.03},
+
+    {'name': "Neighborhood Rapid Response to Eviction Spikes",
+     'role': NEIGHBORHOODS,
+     'cost': {'neighborhood_budget': 240.0},
+     'deltas': {'pop_families': cut_pct('pop_families', 10), 'policy_momentum': 1.0},
+     'source': "National Low Income Housing Coalition. Eviction Prevention Programs. https://nlihc.org/",
+     'fc': FC['neigh'],
+     'difficulty': 0.09},
+
+    {'name': "Public Space Design (reduce congregation)",
+     'role': NEIGHBORHOODS,
+     'cost': {'neighborhood_budget': 160.0},
+     'deltas': {'public_support': 1.6, 'legal_pressure': -1.2},
+     'source': "Taylor & Francis Online. Hostile Architecture and Public Space Management. https://www.tandfonline.com/doi/full/10.1080/10439463.2024.2362730",
+     'fc': FC['neigh'],
+     'difficulty': 0.05},
+
+    {'name': "Property Value Assistance (tax incentive to support programs)",
+     'role': NEIGHBORHOODS,
+     'cost': {'neighborhood_budget': 220.0},
+     'deltas': {'permanent_units': 30, 'public_support': 0.9},
+     'source': "Housing Infrastructure Canada. Neighborhood Housing Incentives. https://housing-infrastructure.canada.ca/homelessness-sans-abri/reports-rapports/shelter-cap-hebergement-2024-eng.html",
+     'fc': FC['neigh'],
+     'difficulty': 0.08},
+
+    {'name': "Neighborhood-led Transitional Housing Project",
+     'role': NEIGHBORHOODS,
+     'cost': {'neighborhood_budget': 300.0},
+     'deltas': {'transitional_units': 90, 'pop_families': cut_pct('pop_families', 6), 'policy_momentum': 1.2},
+     'source': "U.S. Department of Housing and Urban Development. Transitional Housing Evaluation. HUD Exchange. https://www.huduser.gov/portal/publications/pdf/lifeaftertransition.pdf",
+     'fc': FC['neigh'],
+     'difficulty': 0.12},
+
+    {'name': "Neighborhood Monitoring & Data (complaint tracking)",
+     'role': NEIGHBORHOODS,
+     'cost': {'neighborhood_budget': 40.0},
+     'deltas': {'legal_pressure': -0.8, 'public_support': 0.4},
+     'source': "SAGE Journals. Data & Transparent Monitoring. https://journals.sagepub.com/doi/10.1177/0739456X241265499",
+     'fc': FC['neigh'],
+     'difficulty': 0.02},
+
+    # ---- BUSINESS (12 operators) ----
+    {'name': "Tax Incentives for Affordable Housing",
+     'role': BUSINESS,
+     'cost': {'business_budget': 260.0},
+     'deltas': {'_construction_job': build_units('perm', 120), 'economy_index': 1.8, 'public_support': 1.2},
+     'source': "National Alliance to End Homelessness. Developer Incentives and Housing Supply. https://endhomelessness.org/state-of-homelessness/",
+     'fc': FC['business'],
+     'difficulty': 0.12},
+
+    {'name': "Fund Job Readiness Programs",
+     'role': BUSINESS,
+     'cost': {'business_budget': 180.0},
+     'deltas': {'pop_families': cut_pct('pop_families', 5), 'pop_youth': cut_pct('pop_youth', 12), 'public_support': 2.2},
+     'source': "National Alliance to End Homelessness. Employment and Housing Stability. https://endhomelessness.org/",
+     'fc': FC['business'],
+     'difficulty': 0.06},
+
+    {'name': "Clean & Sweep (sanitation)",
+     'role': BUSINESS,
+     'cost': {'business_budget': 80.0},
+     'deltas': {'public_support': 2.5, 'pop_chronic': displace_pct(0.4, 'displaced'), 'legal_pressure': 1.5},
+     'source': "National Alliance to End Homelessness. Encampment Clearances: Best Practices. https://endhomelessness.org/blog/punitive-policies-will-never-solve-homelessness-the-evidence-is-clear/",
+     'fc': FC['business'],
+     'difficulty': 0.09},
+
+    {'name': "Public-Private Transitional Housing",
+     'role': BUSINESS,
+     'cost': {'business_budget': 360.0},
+     'deltas': {'transitional_units': 90, 'pop_families': cut_pct('pop_families', 4), 'public_support': 1.8},
+     'source': "PubMed Central. Public-Private Partnerships in Housing. https://www.ncbi.nlm.nih.gov/pmc/articles/PMC8899911",
+     'fc': FC['business'],
+     'difficulty': 0.11},
+
+    {'name': "Lobby for Restrictive Ordinances",
+     'role': BUSINESS,
+     'cost': {'business_budget': 140.0},
+     'deltas': {'legal_pressure': 5.0, 'economy_index': 0.8, 'pop_chronic': displace_pct(0.7, 'displaced')},
+     'source': "Berkeley Law Policy Advocacy Clinic. Anti-Homeless Ordinances and Constitutional Challenges. UC Berkeley School of Law. https://www.law.berkeley.edu/article/clinic-study-details-how-business-districts-target-homeless-people/",
+     'fc': FC['business'],
+     'difficulty': 0.16},
+
+    {'name': "Volunteer Street Ambassadors",
+     'role': BUSINESS,
+     'cost': {'business_budget': 100.0},
+     'deltas': {'outreach_teams': 2, 'public_support': 1.5, 'pop_youth': cut_pct('pop_youth', 5)},
+     'source': "Taylor & Francis Online. Ambassador Programs and Service Connection. https://www.tandfonline.com/doi/full/10.1080/10439463.2024.2362730",
+     'fc': FC['business'],
+     'difficulty': 0.03},
+
+    {'name': "Clean Streets + Social Service Coupling",
+     'role': BUSINESS,
+     'cost': {'business_budget': 220.0},
+     'deltas': {'public_support': 2.8, 'pop_chronic': cut_pct('pop_chronic', 2)},
+     'source': "PubMed Central. Coupled Services and Displacement Reduction. https://www.ncbi.nlm.nih.gov/pmc/articles/PMC8356292/",
+     'fc': FC['business'],
+     'difficulty': 0.07},
+
+    {'name': "Small Business Microgrants to Hire",
+     'role': BUSINESS,
+     'cost': {'business_budget': 140.0},
+     'deltas': {'economy_index': 1.2, 'public_support': 1.0},
+     'source': "PubMed Central. Hiring Incentives and Employment Pathways. https://www.ncbi.nlm.nih.gov/pmc/articles/PMC8356292/",
+     'fc': FC['business'],
+     'difficulty': 0.02},
+
+    {'name': "Sponsor Transitional Unit Conversions",
+     'role': BUSINESS,
+     'cost': {'business_budget': 280.0},
+     'deltas': {'transitional_units': 70, 'policy_momentum': 0.9},
+     'source': "PubMed Central. Business Sponsorship Case Studies. https://www.ncbi.nlm.nih.gov/pmc/articles/PMC8899911",
+     'fc': FC['business'],
+     'difficulty': 0.08},
+
+    {'name': "Support Low-Barrier Shelters",
+     'role': BUSINESS,
+     'cost': {'business_budget': 180.0},
+     'deltas': {'shelter_capacity': 120, 'pop_chronic': cut_pct('pop_chronic', 3), 'public_support': 0.6},
+     'source': "PubMed Central. Low-Barrier Shelter Models and Health Outcomes. https://www.ncbi.nlm.nih.gov/pmc/articles/PMC7983925/",
+     'fc': FC['business'],
+     'difficulty': 0.05},
+
+    {'name': "Coalition with Shelters for Employer Placement",
+     'role': BUSINESS,
+     'cost': {'business_budget': 160.0},
+     'deltas': {'pop_families': cut_pct('pop_families', 3), 'policy_momentum': 0.5},
+     'source': "Homeless Services Research Institute. Employment Partnership Outcomes. https://www.hsri.org/projects/evaluating-samhsa-four-homelessness-programs-and-resources",
+     'fc': FC['business'],
+     'difficulty': 0.04},
+
+    {'name': "Sponsor University Pilot (housing innovation)",
+     'role': BUSINESS,
+     'cost': {'business_budget': 240.0, 'university_budget': 50.0},
+     'deltas': {'transitional_units': 40, 'policy_momentum': 1.0},
+     'source': "Conrad N. Hilton Foundation. Housing Innovation Grant Programs. https://www.hiltonfoundation.org/learning/evaluation-of-housing-for-health-permanent-supportive-housing-program",
+     'fc': FC['business'],
+     'difficulty': 0.07},
+
+    # ---- MEDICAL (12 operators) ----
+    {'name': "Deploy Mobile Clinics",
+     'role': MEDICAL,
+     'cost': {'medical_budget':200.0},
+     'deltas': {'medical_vans': 2, 'pop_chronic': cut_pct('pop_chronic', 6), 'public_support': 2.8},
+     'source': "Commonwealth Fund. Mobile Health Clinics for Homeless Populations. https://www.commonwealthfund.org/publications/case-study/2021/aug/how-medical-respite-care-program-offers-pathway-health-housing",
+     'fc': FC['medical'],
+     'difficulty': 0.06},
+
+    {'name': "Medicaid & Benefits Enrollment Drive",
+     'role': MEDICAL,
+     'cost': {'medical_budget':160.0},
+     'deltas': {'pop_chronic': cut_pct('pop_chronic', 7), 'policy_momentum': 1.2},
+     'source': "Substance Abuse and Mental Health Services Administration. Benefits Enrollment and Housing Stability. https://www.samhsa.gov/",
+     'fc': FC['medical'],
+     'difficulty': 0.05},
+
+    {'name': "Substance Use Treatment Expansion",
+     'role': MEDICAL,
+     'cost': {'medical_budget':320.0},
+     'deltas': {'pop_chronic': cut_pct('pop_chronic', 12), 'public_support': -1.0, 'policy_momentum': 2.8},
+     'source': "Homeless Services Research Institute. Substance Use Treatment and Housing First Models. https://www.hsri.org/projects/evaluating-samhsa-four-homelessness-programs-and-resources",
+     'fc': FC['medical'],
+     'difficulty': 0.18},
+
+    {'name': "Medical Respite & Recovery Beds",
+     'role': MEDICAL,
+     'cost': {'medical_budget':260.0},
+     'deltas': {'shelter_capacity': 80, 'pop_chronic': cut_pct('pop_chronic', 5)},
+     'source': "Commonwealth Fund. Medical Respite Programs for Homeless Populations. https://www.commonwealthfund.org/publications/case-study/2021/aug/how-medical-respite-care-program-offers-pathway-health-housing",
+     'fc': FC['medical'],
+     'difficulty': 0.10},
+
+    {'name': "Behavioral Health Outreach Teams",
+     'role': MEDICAL,
+     'cost': {'medical_budget':220.0},
+     'deltas': {'outreach_teams': 2, 'pop_youth': cut_pct('pop_youth', 8), 'policy_momentum': 1.3},
+     'source': "Substance Abuse and Mental Health Services Administration. Behavioral Health Outreach Models. https://www.samhsa.gov/",
+     'fc': FC['medical'],
+     'difficulty': 0.09},
+
+    {'name': "Hospital Discharge Coordination",
+     'role': MEDICAL,
+     'cost': {'medical_budget':120.0},
+     'deltas': {'pop_chronic': cut_pct('pop_chronic', 3), 'public_support': 0.7},
+     'source': "Commonwealth Fund. Hospital Discharge Planning and Homelessness Prevention. https://www.commonwealthfund.org/public/publications/case-study/2021/aug/how-medical-respite-care-program-offers-pathway-health-housing",
+     'fc': FC['medical'],
+     'difficulty': 0.04},
+
+    {'name': "Expand Telehealth for Unhoused",
+     'role': MEDICAL,
+     'cost': {'medical_budget':90.0},
+     'deltas': {'policy_momentum': 0.6, 'public_support': 0.5},
+     'source': "PubMed Central. Telehealth Access for Homeless Populations. https://www.ncbi.nlm.nih.gov/pmc/articles/PMC6153151",
+     'fc': FC['medical'],
+     'difficulty': 0.03},
+
+    {'name': "Create Medical-Legal Partnerships",
+     'role': MEDICAL,
+     'cost': {'medical_budget':100.0},
+     'deltas': {'legal_pressure': -1.5, 'policy_momentum': 0.7},
+     'source': "PubMed Central. Medical-Legal Partnerships and Housing Stability. https://www.ncbi.nlm.nih.gov/pmc/articles/PMC8356292",
+     'fc': FC['medical'],
+     'difficulty': 0.04},
+
+    {'name': "Partner with Shelters for Onsite Clinics",
+     'role': MEDICAL,
+     'cost': {'medical_budget':140.0},
+     'deltas': {'medical_vans': 1, 'pop_chronic': cut_pct('pop_chronic', 4)},
+     'source': "PubMed Central. Shelter-Based Health Services. https://www.ncbi.nlm.nih.gov/pmc/articles/PMC8356292",
+     'fc': FC['medical'],
+     'difficulty': 0.05},
+
+    {'name': "Performance-based Funding for Treatment Outcomes",
+     'role': MEDICAL,
+     'cost': {'medical_budget':240.0},
+     'deltas': {'policy_momentum': 1.8, 'public_support': -0.8},
+     'source': "Homeless Services Research Institute. Performance-Based Contracting in Health Services. https://www.hsri.org/projects/evaluating-samhsa-four-homelessness-programs-and-resources",
+     'fc': FC['medical'],
+     'difficulty': 0.12},
+
+    {'name': "Veterans Health Focus",
+     'role': MEDICAL,
+     'cost': {'medical_budget':160.0},
+     'deltas': {'pop_veterans': cut_pct('pop_veterans', 10), 'policy_momentum': 1.0},
+     'source': "U.S. Department of Veterans Affairs. Ending Veteran Homelessness. https://www.va.gov/homeless/",
+     'fc': FC['medical'],
+     'difficulty': 0.06},
+
+    {'name': "Evaluation of Health Interventions (data)",
+     'role': MEDICAL,
+     'cost': {'medical_budget':80.0, 'university_budget': 60.0},
+     'deltas': {'policy_momentum': 1.4, 'public_support': 0.6},
+     'source': "Homeless Services Research Institute. Health Intervention Evaluation Framework. https://www.hsri.org/projects/evaluating-samhsa-four-homelessness-programs-and-resources",
+     'fc': FC['medical'],
+     'difficulty': 0.03},
+
+    # ---- UNIVERSITY (12 operators) ----
+    {'name': "Research & Program Evaluation",
+     'role': UNIVERSITY,
+     'cost': {'university_budget': 100.0},
+     'deltas': {'policy_momentum': 1.5},
+     'source': "PubMed Central. Academic Research and Homeless Policy. https://www.ncbi.nlm.nih.gov/pmc/articles/PMC1525292/",
+     'fc': FC['university'],
+     'difficulty': 0.03},
+
+    {'name': "Service-Learning & Workforce Integration",
+     'role': UNIVERSITY,
+     'cost': {'university_budget': 110.0},
+     'deltas': {'social_workers': 5, 'pop_youth': cut_pct('pop_youth', 10), 'public_support': 1.2},
+     'source': "United States Interagency Council on Homelessness. Service-Learning and Capacity Expansion. https://www.usich.gov/sites/default/files/document/Evidence-Behind-Approaches-That-End-Homelessness-Brief-2019.pdf",
+     'fc': FC['university'],
+     'difficulty': 0.04},
+
+    {'name': "Housing Innovation Lab (modular units)",
+     'role': UNIVERSITY,
+     'cost': {'university_budget': 260.0},
+     'deltas': {'_construction_job': build_units('trans', 70), 'pop_chronic': cut_pct('pop_chronic', 3), 'policy_momentum': 2.0},
+     'source': "Conrad N. Hilton Foundation. Housing Innovation Grant Programs. https://www.hiltonfoundation.org/learning/evaluation-of-housing-for-health-permanent-supportive-housing-program",
+     'fc': FC['university'],
+     'difficulty': 0.10},
+
+    {'name': "Reputation Management (PR)",
+     'role': UNIVERSITY,
+     'cost': {'university_budget': 80.0},
+     'deltas': {'public_support': 0.6, 'policy_momentum': -0.4},
+     'source': "PubMed Central. University-Community Relations. https://www.ncbi.nlm.nih.gov/pmc/articles/PMC1525292/",
+     'fc': FC['university'],
+     'difficulty': 0.02},
+
+    {'name': "Open Data & Dashboard (public transparency)",
+     'role': UNIVERSITY,
+     'cost': {'university_budget': 70.0},
+     'deltas': {'policy_momentum': 0.8, 'public_support': 0.5},
+     'source': "United States Interagency Council on Homelessness. Data Standards and Systems. https://www.usich.gov/",
+     'fc': FC['university'],
+     'difficulty': 0.02},
+
+    {'name': "Student Outreach & Volunteer Corps",
+     'role': UNIVERSITY,
+     'cost': {'university_budget': 90.0},
+     'deltas': {'outreach_teams': 2, 'pop_youth': cut_pct('pop_youth', 6), 'public_support': 1.0},
+     'source': "United States Interagency Council on Homelessness. Student Volunteer Programs. https://www.usich.gov/sites/default/files/document/Evidence-Behind-Approaches-That-End-Homelessness-Brief-2019.pdf",
+     'fc': FC['university'],
+     'difficulty': 0.03},
+
+    {'name': "Policy Incubator with City (pilot)",
+     'role': UNIVERSITY,
+     'cost': {'university_budget': 220.0, 'neighborhood_budget': 60.0},
+     'deltas': {'permanent_units': 30, 'policy_momentum': 1.6},
+     'source': "United States Interagency Council on Homelessness. University-City Collaborations. https://www.usich.gov/sites/default/files/document/Evidence-Behind-Approaches-That-End-Homelessness-Brief-2019.pdf",
+     'fc': FC['university'],
+     'difficulty': 0.08},
+
+    {'name': "Deploy Evaluation Fellows to Shelters",
+     'role': UNIVERSITY,
+     'cost': {'university_budget': 110.0},
+     'deltas': {'social_workers': 2, 'policy_momentum': 1.0},
+     'source': "Homeless Services Research Institute. Fellowship Program Evaluations. https://www.hsri.org/projects/evaluating-samhsa-four-homelessness-programs-and-resources",
+     'fc': FC['university'],
+     'difficulty': 0.03},
+
+    {'name': "Community-engaged Research on Displacement",
+     'role': UNIVERSITY,
+     'cost': {'university_budget': 140.0},
+     'deltas': {'policy_momentum': 1.8, 'public_support': 0.5},
+     'source': "PubMed Central. Community-Based Participatory Research. https://www.ncbi.nlm.nih.gov/pmc/articles/PMC1525292/",
+     'fc': FC['university'],
+     'difficulty': 0.05},
+
+    {'name': "Leverage Philanthropy for PSH",
+     'role': UNIVERSITY,
+     'cost': {'university_budget': 260.0},
+     'deltas': {'_construction_job': build_units('perm', 50), 'policy_momentum': 1.2},
+     'source': "Conrad N. Hilton Foundation. Permanent Supportive Housing Initiative Evaluation. https://www.hiltonfoundation.org/learning/evaluation-of-housing-for-health-permanent-supportive-housing-program",
+     'fc': FC['university'],
+     'difficulty': 0.09},
+
+    {'name': "Student-led Rapid Rehousing Pilot",
+     'role': UNIVERSITY,
+     'cost': {'university_budget': 120.0},
+     'deltas': {'transitional_units': 40, 'pop_youth': cut_pct('pop_youth', 8)},
+     'source': "National Low Income Housing Coalition. Student-led Housing Programs. https://nlihc.org/sites/default/files/Housing-First-Evidence.pdf",
+     'fc': FC['university'],
+     'difficulty': 0.06},
+
+    {'name': "Academic Advocacy Campaign",
+     'role': UNIVERSITY,
+     'cost': {'university_budget': 80.0},
+     'deltas': {'public_support': 0.9, 'policy_momentum': 0.6},
+     'source': "National Low Income Housing Coalition. Advocacy Toolkit. https://nlihc.org/",
+     'fc': FC['university'],
+     'difficulty': 0.03},
+]
+
+def compile_operator(spec):
+    op = make_op(spec['name'], spec['role'], spec['cost'], spec['deltas'], spec['source'], spec['fc'],
+                 spec['difficulty'])
+    op.spec = spec
+    return op
+
+
+def compile_operator_table(table=None):
+    return [compile_operator(spec) for spec in (OPERATOR_TABLE if table is None else table)]
 
-# 2 Community Partnership
-shelters_ops.append(make_op(
-    "Community Partnership (vols & caseworkers)",
-    SHELTERS,
-    {'shelter_budget': 100.0},
-    {'social_workers': 6, 'pop_chronic': pop_reduction_factory('pop_chronic', 1.5), 'policy_momentum': 0.6},
-    "Homeless Services Research Institute. Community Partnership Evaluation Studies. https://www.hsri.org/projects/evaluating-samhsa-four-homelessness-programs-and-resources",
-    FC['shelters'],
-    difficulty=0.05
-))
-
-# 3 Housing First Pilot (perm +150)
-shelters_ops.append(make_op(
-    "Housing First Pilot (perm +150)",
-    SHELTERS,
-    {'shelter_budget': 520.0},
-    {'_construction_job': lambda news, mult=1.0: (schedule_construction(news,'perm', int(round(150*mult))) or f"Scheduled perm +{int(round(150*mult))}"),
-     'pop_chronic': pop_reduction_factory('pop_chronic', 8), 'public_support': 2.5, 'economy_index': -1.5},
-    "Conrad N. Hilton Foundation. Chronic Homelessness Initiative Evaluation. https://www.hiltonfoundation.org/learning/evaluation-of-housing-for-health-permanent-supportive-housing-program/",
-    FC['shelters'],
-    difficulty=0.18
-))
-
-# 4 Volunteer Training
-shelters_ops.append(make_op(
-    "Volunteer Training (social workers +3)",
-    SHELTERS,
-    {'shelter_budget': 40.0},
-    {'social_workers': 3, 'public_support': 1.0},
-    "Homeless Services Research Institute. Caseworker Training Impact Study. https://www.hsri.org/projects/evaluating-samhsa-four-homelessness-programs-and-resources",
-    FC['shelters'],
-    difficulty=0.02
-))
-
-# 5 Rent Assistance Fund
-shelters_ops.append(make_op(
-    "Rent Assistance Fund (prevention)",
-    SHELTERS,
-    {'shelter_budget': 260.0},
-    {'pop_families': pop_reduction_factory('pop_families', 6), 'pop_youth': pop_reduction_factory('pop_youth', 4), 'policy_momentum': 1.0, 'public_support': 1.8},
-    "U.S. Department of Housing and Urban Development. Rapid Re-Housing Brief. HUD Exchange. https://www.hudexchange.info/resource/3891/rapid-re-housing-brief/",
-    FC['shelters'],
-    difficulty=0.07
-))
-
-# 6 Defer Maintenance (gain budget, lose beds)
-shelters_ops.append(make_op(
-    "Defer Maintenance (gain budget, lose beds)",
-    SHELTERS,
-    {},
-    {'shelter_budget': 60.0, 'shelter_capacity': -40, 'public_support': -2.5, 'legal_pressure': 2.0},
-    "U.S. Department of Housing and Urban Development. Shelter Standards and Maintenance Requirements. HUD.gov.",
-    FC['shelters'],
-    difficulty=0.01
-))
-
-# 7 Rapid Rehousing Boost
-shelters_ops.append(make_op(
-    "Rapid Rehousing Boost",
-    SHELTERS,
-    {'shelter_budget': 260.0},
-    {'transitional_units': 60, 'pop_families': pop_reduction_factory('pop_families', 9), 'policy_momentum': 1.2},
-    "National Low Income Housing Coalition. The Gap: A Shortage of Affordable Homes. NLIHC. https://nlihc.org/gap",
-    FC['shelters'],
-    difficulty=0.09
-))
-
-# 8 Add Outreach Vans
-shelters_ops.append(make_op(
-    "Add Outreach Vans",
-    SHELTERS,
-    {'shelter_budget': 110.0},
-    {'outreach_teams': 2, 'pop_youth': pop_reduction_factory('pop_youth',6)},
-    "Commonwealth Fund. Mobile Health Services for Homeless Populations. https://www.commonwealthfund.org/publications/case-study/2021/aug/how-medical-respite-care-program-offers-pathway-health-housing",
-    FC['shelters'],
-    difficulty=0.04
-))
-
-# 9 Intensify Case Management
-shelters_ops.append(make_op(
-    "Intensify Case Management",
-    SHELTERS,
-    {'shelter_budget': 140.0},
-    {'social_workers': 5, 'policy_momentum': 0.9, 'pop_chronic': pop_reduction_factory('pop_chronic',5)},
-    "Homeless Services Research Institute. Case Management and Housing Stability Study. https://www.hsri.org/projects/evaluating-samhsa-four-homelessness-programs-and-resources",
-    FC['shelters'],
-    difficulty=0.06
-))
-
-# 10 Sanction Encampment
-shelters_ops.append(make_op(
-    "Sanction Encampment (sanctioned services)",
-    SHELTERS,
-    {'shelter_budget': 180.0},
-    {'shelter_capacity': 80, 'public_support': -1.0, 'legal_pressure': -2.5},
-    "PubMed Central. Sanctioned Encampments and Harm Reduction. https://www.ncbi.nlm.nih.gov/pmc/articles/PMC8427990/",
-    FC['shelters'],
-    difficulty=0.12
-))
-
-# 11 Partner: Medical Support
-shelters_ops.append(make_op(
-    "Partner: Medical Support (onsite clinics)",
-    SHELTERS,
-    {'shelter_budget': 160.0, 'medical_budget': 80.0},
-    {'medical_vans': 1, 'pop_chronic': pop_reduction_factory('pop_chronic',7)},
-    "Commonwealth Fund. Integrating Health Care and Housing Services. https://www.commonwealthfund.org/publications/case-study/2021/aug/how-medical-respite-care-program-offers-pathway-health-housing",
-    FC['shelters'],
-    difficulty=0.08
-))
-
-# 12 Evaluation & Data Sharing
-shelters_ops.append(make_op(
-    "Evaluation & Data Sharing (with Univ)",
-    SHELTERS,
-    {'shelter_budget': 80.0, 'university_budget': 70.0},
-    {'policy_momentum': 1.6, 'public_support': 0.8},
-    "United States Interagency Council on Homelessness. Data-Driven Decision Making. https://www.usich.gov/",
-    FC['shelters'],
-    difficulty=0.03
-))
-
-# ---- NEIGHBORHOODS (12 operators) ----
-neighbor_ops = []
-
-neighbor_ops.append(make_op(
-    "Media Campaign (reframe homelessness)",
-    NEIGHBORHOODS,
-    {'neighborhood_budget': 140.0},
-    {'public_support': 6.0, 'legal_pressure': -3.0},
-    "SAGE Journals. Reframing Homelessness in Public Discourse. https://journals.sagepub.com/doi/10.1177/0739456X241265499",
-    FC['neigh'],
-    difficulty=0.06
-))
-
-neighbor_ops.append(make_op(
-    "Block New Low-Income Development (NIMBY action)",
-    NEIGHBORHOODS,
-    {'neighborhood_budget': 60.0},
-    {'permanent_units': -50, 'public_support': 2.0, 'legal_pressure': 4.0},
-    "Berkeley Law Policy Advocacy Clinic. Homeless Exclusion and Legal Conflict Study. UC Berkeley School of Law. https://www.law.berkeley.edu/article/clinic-study-details-how-business-districts-target-homeless-people/",
-    FC['neigh'],
-    difficulty=0.04
-))
-
-neighbor_ops.append(make_op(
-    "Local Voucher Matching Fund",
-    NEIGHBORHOODS,
-    {'neighborhood_budget': 200.0},
-    {'pop_families': pop_reduction_factory('pop_families',7), 'permanent_units': 20, 'policy_momentum': 0.8, 'public_support': 3.0},
-    "U.S. Department of Housing and Urban Development. Housing Choice Voucher Program. https://www.hud.gov/program_offices/public_indian_housing/programs/hcv",
-    FC['neigh'],
-    difficulty=0.08
-))
-
-neighbor_ops.append(make_op(
-    "Civic Forum (reduce tensions)",
-    NEIGHBORHOODS,
-    {'neighborhood_budget': 30.0},
-    {'legal_pressure': -2.0, 'public_support': 1.0},
-    "SAGE Journals. Community Engagement and Homelessness Response. https://journals.sagepub.com/doi/10.1177/10986111241289390",
-    FC['neigh'],
-    difficulty=0.02
-))
-
-neighbor_ops.append(make_op(
-    "Fund Private Security (pushout)",
-    NEIGHBORHOODS,
-    {'neighborhood_budget': 120.0},
-    {'public_support': 3.0, 'pop_chronic': lambda news, mult=1.0: (setattr(news, 'pop_chronic', news.pop_chronic + int(round(percent_of(news.homeless_population,0.6) * mult))) or f"chronic +{int(round(percent_of(news.homeless_population,0.6) * mult))}"), 'legal_pressure': 2.0},
-    "Berkeley Law Policy Advocacy Clinic. The Criminalization of Homelessness in California. UC Berkeley School of Law. https://www.law.berkeley.edu/article/clinic-study-details-how-business-districts-target-homeless-people/",
-    FC['neigh'],
-    difficulty=0.10
-))
-
-neighbor_ops.append(make_op(
-    "Infrastructure Grants (convert trans->perm)",
-    NEIGHBORHOODS,
-    {'neighborhood_budget': 300.0},
-    {'transitional_units': -80, 'permanent_units': 72, 'pop_families': pop_reduction_factory('pop_families',1), 'policy_momentum': 1.5},
-    "RTI International. Capital Funding and Affordable Housing Development. https://www.rti.org/publication/a-review-of-the-literature-on-neighborhood-impacts-of-permanent-s",
-    FC['neigh'],
-    difficulty=0.14
-))
-
-neighbor_ops.append(make_op(
-    "Community Food & Outreach Sponsorship",
-    NEIGHBORHOODS,
-    {'neighborhood_budget': 80.0},
-    {'outreach_teams': 1, 'public_support': 1.2, 'pop_youth': pop_reduction_factory('pop_youth',3)},
-    "PubMed Central. Community Outreach Programs. https://www.ncbi.nlm.nih.gov/pmc/articles/PMC8427990/",
-    FC['neigh'],
-    difficulty=0.03
-))
-
-neighbor_ops.append(make_op(
-    "Neighborhood Rapid Response to Eviction Spikes",
-    NEIGHBORHOODS,
-    {'neighborhood_budget': 240.0},
-    {'pop_families': pop_reduction_factory('pop_families',10), 'policy_momentum': 1.0},
-    "National Low Income Housing Coalition. Eviction Prevention Programs. https://nlihc.org/",
-    FC['neigh'],
-    difficulty=0.09
-))
-
-neighbor_ops.append(make_op(
-    "Public Space Design (reduce congregation)",
-    NEIGHBORHOODS,
-    {'neighborhood_budget': 160.0},
-    {'public_support': 1.6, 'legal_pressure': -1.2},
-    "Taylor & Francis Online. Hostile Architecture and Public Space Management. https://www.tandfonline.com/doi/full/10.1080/10439463.2024.2362730",
-    FC['neigh'],
-    difficulty=0.05
-))
-
-neighbor_ops.append(make_op(
-    "Property Value Assistance (tax incentive to support programs)",
-    NEIGHBORHOODS,
-    {'neighborhood_budget': 220.0},
-    {'permanent_units': 30, 'public_support': 0.9},
-    "Housing Infrastructure Canada. Neighborhood Housing Incentives. https://housing-infrastructure.canada.ca/homelessness-sans-abri/reports-rapports/shelter-cap-hebergement-2024-eng.html",
-    FC['neigh'],
-    difficulty=0.08
-))
-
-neighbor_ops.append(make_op(
-    "Neighborhood-led Transitional Housing Project",
-    NEIGHBORHOODS,
-    {'neighborhood_budget': 300.0},
-    {'transitional_units': 90, 'pop_families': pop_reduction_factory('pop_families',6), 'policy_momentum': 1.2},
-    "U.S. Department of Housing and Urban Development. Transitional Housing Evaluation. HUD Exchange. https://www.huduser.gov/portal/publications/pdf/lifeaftertransition.pdf",
-    FC['neigh'],
-    difficulty=0.12
-))
-
-neighbor_ops.append(make_op(
-    "Neighborhood Monitoring & Data (complaint tracking)",
-    NEIGHBORHOODS,
-    {'neighborhood_budget': 40.0},
-    {'legal_pressure': -0.8, 'public_support': 0.4},
-    "SAGE Journals. Data & Transparent Monitoring. https://journals.sagepub.com/doi/10.1177/0739456X241265499",
-    FC['neigh'],
-    difficulty=0.02
-))
-
-# ---- BUSINESS (12 operators) ----
-business_ops = []
-
-business_ops.append(make_op(
-    "Tax Incentives for Affordable Housing",
-    BUSINESS,
-    {'business_budget': 260.0},
-    {'_construction_job': lambda news, mult=1.0: (schedule_construction(news,'perm', int(round(120*mult))) or f"Scheduled perm +{int(round(120*mult))}"), 'economy_index': 1.8, 'public_support': 1.2},
-    "National Alliance to End Homelessness. Developer Incentives and Housing Supply. https://endhomelessness.org/state-of-homelessness/",
-    FC['business'],
-    difficulty=0.12
-))
-
-business_ops.append(make_op(
-    "Fund Job Readiness Programs",
-    BUSINESS,
-    {'business_budget': 180.0},
-    {'pop_families': pop_reduction_factory('pop_families',5), 'pop_youth': pop_reduction_factory('pop_youth',12), 'public_support': 2.2},
-    "National Alliance to End Homelessness. Employment and Housing Stability. https://endhomelessness.org/",
-    FC['business'],
-    difficulty=0.06
-))
-
-business_ops.append(make_op(
-    "Clean & Sweep (sanitation)",
-    BUSINESS,
-    {'business_budget': 80.0},
-    {'public_support': 2.5, 'pop_chronic': lambda news, mult=1.0: (setattr(news, 'pop_chronic', news.pop_chronic + int(round(percent_of(news.homeless_population,0.4) * mult))) or f"displaced +{int(round(percent_of(news.homeless_population,0.4) * mult))}"), 'legal_pressure': 1.5},
-    "National Alliance to End Homelessness. Encampment Clearances: Best Practices. https://endhomelessness.org/blog/punitive-policies-will-never-solve-homelessness-the-evidence-is-clear/",
-    FC['business'],
-    difficulty=0.09
-))
-
-business_ops.append(make_op(
-    "Public-Private Transitional Housing",
-    BUSINESS,
-    {'business_budget': 360.0},
-    {'transitional_units': 90, 'pop_families': pop_reduction_factory('pop_families',4), 'public_support': 1.8},
-    "PubMed Central. Public-Private Partnerships in Housing. https://www.ncbi.nlm.nih.gov/pmc/articles/PMC8899911",
-    FC['business'],
-    difficulty=0.11
-))
-
-business_ops.append(make_op(
-    "Lobby for Restrictive Ordinances",
-    BUSINESS,
-    {'business_budget': 140.0},
-    {'legal_pressure': 5.0, 'economy_index': 0.8, 'pop_chronic': lambda news, mult=1.0: (setattr(news, 'pop_chronic', news.pop_chronic + int(round(percent_of(news.homeless_population,0.7) * mult))) or f"displaced +{int(round(percent_of(news.homeless_population,0.7) * mult))}" )},
-    "Berkeley Law Policy Advocacy Clinic. Anti-Homeless Ordinances and Constitutional Challenges. UC Berkeley School of Law. https://www.law.berkeley.edu/article/clinic-study-details-how-business-districts-target-homeless-people/",
-    FC['business'],
-    difficulty=0.16
-))
-
-business_ops.append(make_op(
-    "Volunteer Street Ambassadors",
-    BUSINESS,
-    {'business_budget': 100.0},
-    {'outreach_teams': 2, 'public_support': 1.5, 'pop_youth': pop_reduction_factory('pop_youth',5)},
-    "Taylor & Francis Online. Ambassador Programs and Service Connection. https://www.tandfonline.com/doi/full/10.1080/10439463.2024.2362730",
-    FC['business'],
-    difficulty=0.03
-))
-
-business_ops.append(make_op(
-    "Clean Streets + Social Service Coupling",
-    BUSINESS,
-    {'business_budget': 220.0},
-    {'public_support': 2.8, 'pop_chronic': pop_reduction_factory('pop_chronic',2)},
-    "PubMed Central. Coupled Services and Displacement Reduction. https://www.ncbi.nlm.nih.gov/pmc/articles/PMC8356292/",
-    FC['business'],
-    difficulty=0.07
-))
-
-business_ops.append(make_op(
-    "Small Business Microgrants to Hire",
-    BUSINESS,
-    {'business_budget': 140.0},
-    {'economy_index': 1.2, 'public_support': 1.0},
-    "PubMed Central. Hiring Incentives and Employment Pathways. https://www.ncbi.nlm.nih.gov/pmc/articles/PMC8356292/",
-    FC['business'],
-    difficulty=0.02
-))
-
-business_ops.append(make_op(
-    "Sponsor Transitional Unit Conversions",
-    BUSINESS,
-    {'business_budget': 280.0},
-    {'transitional_units': 70, 'policy_momentum': 0.9},
-    "PubMed Central. Business Sponsorship Case Studies. https://www.ncbi.nlm.nih.gov/pmc/articles/PMC8899911",
-    FC['business'],
-    difficulty=0.08
-))
-
-business_ops.append(make_op(
-    "Support Low-Barrier Shelters",
-    BUSINESS,
-    {'business_budget': 180.0},
-    {'shelter_capacity': 120, 'pop_chronic': pop_reduction_factory('pop_chronic',3), 'public_support': 0.6},
-    "PubMed Central. Low-Barrier Shelter Models and Health Outcomes. https://www.ncbi.nlm.nih.gov/pmc/articles/PMC7983925/",
-    FC['business'],
-    difficulty=0.05
-))
-
-business_ops.append(make_op(
-    "Coalition with Shelters for Employer Placement",
-    BUSINESS,
-    {'business_budget': 160.0},
-    {'pop_families': pop_reduction_factory('pop_families',3), 'policy_momentum': 0.5},
-    "Homeless Services Research Institute. Employment Partnership Outcomes. https://www.hsri.org/projects/evaluating-samhsa-four-homelessness-programs-and-resources",
-    FC['business'],
-    difficulty=0.04
-))
-
-business_ops.append(make_op(
-    "Sponsor University Pilot (housing innovation)",
-    BUSINESS,
-    {'business_budget': 240.0, 'university_budget': 50.0},
-    {'transitional_units': 40, 'policy_momentum': 1.0},
-    "Conrad N. Hilton Foundation. Housing Innovation Grant Programs. https://www.hiltonfoundation.org/learning/evaluation-of-housing-for-health-permanent-supportive-housing-program",
-    FC['business'],
-    difficulty=0.07
-))
-
-# ---- MEDICAL (12 operators) ----
-medical_ops = []
-
-medical_ops.append(make_op(
-    "Deploy Mobile Clinics",
-    MEDICAL,
-    {'medical_budget':200.0},
-    {'medical_vans':2, 'pop_chronic': pop_reduction_factory('pop_chronic',6), 'public_support':2.8},
-    "Commonwealth Fund. Mobile Health Clinics for Homeless Populations. https://www.commonwealthfund.org/publications/case-study/2021/aug/how-medical-respite-care-program-offers-pathway-health-housing",
-    FC['medical'],
-    difficulty=0.06
-))
-
-medical_ops.append(make_op(
-    "Medicaid & Benefits Enrollment Drive",
-    MEDICAL,
-    {'medical_budget':160.0},
-    {'pop_chronic': pop_reduction_factory('pop_chronic',7), 'policy_momentum':1.2},
-    "Substance Abuse and Mental Health Services Administration. Benefits Enrollment and Housing Stability. https://www.samhsa.gov/",
-    FC['medical'],
-    difficulty=0.05
-))
-
-medical_ops.append(make_op(
-    "Substance Use Treatment Expansion",
-    MEDICAL,
-    {'medical_budget':320.0},
-    {'pop_chronic': pop_reduction_factory('pop_chronic',12), 'public_support':-1.0, 'policy_momentum':2.8},
-    "Homeless Services Research Institute. Substance Use Treatment and Housing First Models. https://www.hsri.org/projects/evaluating-samhsa-four-homelessness-programs-and-resources",
-    FC['medical'],
-    difficulty=0.18
-))
-
-medical_ops.append(make_op(
-    "Medical Respite & Recovery Beds",
-    MEDICAL,
-    {'medical_budget':260.0},
-    {'shelter_capacity': 80, 'pop_chronic': pop_reduction_factory('pop_chronic',5)},
-    "Commonwealth Fund. Medical Respite Programs for Homeless Populations. https://www.commonwealthfund.org/publications/case-study/2021/aug/how-medical-respite-care-program-offers-pathway-health-housing",
-    FC['medical'],
-    difficulty=0.10
-))
-
-medical_ops.append(make_op(
-    "Behavioral Health Outreach Teams",
-    MEDICAL,
-    {'medical_budget':220.0},
-    {'outreach_teams':2, 'pop_youth': pop_reduction_factory('pop_youth',8), 'policy_momentum':1.3},
-    "Substance Abuse and Mental Health Services Administration. Behavioral Health Outreach Models. https://www.samhsa.gov/",
-    FC['medical'],
-    difficulty=0.09
-))
-
-medical_ops.append(make_op(
-    "Hospital Discharge Coordination",
-    MEDICAL,
-    {'medical_budget':120.0},
-    {'pop_chronic': pop_reduction_factory('pop_chronic',3), 'public_support':0.7},
-    "Commonwealth Fund. Hospital Discharge Planning and Homelessness Prevention. https://www.commonwealthfund.org/public/publications/case-study/2021/aug/how-medical-respite-care-program-offers-pathway-health-housing",
-    FC['medical'],
-    difficulty=0.04
-))
-
-medical_ops.append(make_op(
-    "Expand Telehealth for Unhoused",
-    MEDICAL,
-    {'medical_budget':90.0},
-    {'policy_momentum':0.6, 'public_support':0.5},
-    "PubMed Central. Telehealth Access for Homeless Populations. https://www.ncbi.nlm.nih.gov/pmc/articles/PMC6153151",
-    FC['medical'],
-    difficulty=0.03
-))
-
-medical_ops.append(make_op(
-    "Create Medical-Legal Partnerships",
-    MEDICAL,
-    {'medical_budget':100.0},
-    {'legal_pressure': -1.5, 'policy_momentum': 0.7},
-    "PubMed Central. Medical-Legal Partnerships and Housing Stability. https://www.ncbi.nlm.nih.gov/pmc/articles/PMC8356292",
-    FC['medical'],
-    difficulty=0.04
-))
-
-medical_ops.append(make_op(
-    "Partner with Shelters for Onsite Clinics",
-    MEDICAL,
-    {'medical_budget':140.0},
-    {'medical_vans':1, 'pop_chronic': pop_reduction_factory('pop_chronic',4)},
-    "PubMed Central. Shelter-Based Health Services. https://www.ncbi.nlm.nih.gov/pmc/articles/PMC8356292",
-    FC['medical'],
-    difficulty=0.05
-))
-
-medical_ops.append(make_op(
-    "Performance-based Funding for Treatment Outcomes",
-    MEDICAL,
-    {'medical_budget':240.0},
-    {'policy_momentum':1.8, 'public_support': -0.8},
-    "Homeless Services Research Institute. Performance-Based Contracting in Health Services. https://www.hsri.org/projects/evaluating-samhsa-four-homelessness-programs-and-resources",
-    FC['medical'],
-    difficulty=0.12
-))
-
-medical_ops.append(make_op(
-    "Veterans Health Focus",
-    MEDICAL,
-    {'medical_budget':160.0},
-    {'pop_veterans': pop_reduction_factory('pop_veterans',10), 'policy_momentum':1.0},
-    "U.S. Department of Veterans Affairs. Ending Veteran Homelessness. https://www.va.gov/homeless/",
-    FC['medical'],
-    difficulty=0.06
-))
-
-medical_ops.append(make_op(
-    "Evaluation of Health Interventions (data)",
-    MEDICAL,
-    {'medical_budget':80.0, 'university_budget': 60.0},
-    {'policy_momentum':1.4, 'public_support': 0.6},
-    "Homeless Services Research Institute. Health Intervention Evaluation Framework. https://www.hsri.org/projects/evaluating-samhsa-four-homelessness-programs-and-resources",
-    FC['medical'],
-    difficulty=0.03
-))
-
-# ---- UNIVERSITY (12 operators) ----
-uni_ops = []
-
-uni_ops.append(make_op(
-    "Research & Program Evaluation",
-    UNIVERSITY,
-    {'university_budget': 100.0},
-    {'policy_momentum': 1.5},
-    "PubMed Central. Academic Research and Homeless Policy. https://www.ncbi.nlm.nih.gov/pmc/articles/PMC1525292/",
-    FC['university'],
-    difficulty=0.03
-))
-
-uni_ops.append(make_op(
-    "Service-Learning & Workforce Integration",
-    UNIVERSITY,
-    {'university_budget': 110.0},
-    {'social_workers': 5, 'pop_youth': pop_reduction_factory('pop_youth',10), 'public_support': 1.2},
-    "United States Interagency Council on Homelessness. Service-Learning and Capacity Expansion. https://www.usich.gov/sites/default/files/document/Evidence-Behind-Approaches-That-End-Homelessness-Brief-2019.pdf",
-    FC['university'],
-    difficulty=0.04
-))
-
-uni_ops.append(make_op(
-    "Housing Innovation Lab (modular units)",
-    UNIVERSITY,
-    {'university_budget': 260.0},
-    {'_construction_job': lambda news, mult=1.0: (schedule_construction(news,'trans', int(round(70*mult))) or f"Scheduled trans +{int(round(70*mult))}"), 'pop_chronic': pop_reduction_factory('pop_chronic',3), 'policy_momentum': 2.0},
-    "Conrad N. Hilton Foundation. Housing Innovation Grant Programs. https://www.hiltonfoundation.org/learning/evaluation-of-housing-for-health-permanent-supportive-housing-program",
-    FC['university'],
-    difficulty=0.10
-))
-
-uni_ops.append(make_op(
-    "Reputation Management (PR)",
-    UNIVERSITY,
-    {'university_budget': 80.0},
-    {'public_support': 0.6, 'policy_momentum': -0.4},
-    "PubMed Central. University-Community Relations. https://www.ncbi.nlm.nih.gov/pmc/articles/PMC1525292/",
-    FC['university'],
-    difficulty=0.02
-))
-
-uni_ops.append(make_op(
-    "Open Data & Dashboard (public transparency)",
-    UNIVERSITY,
-    {'university_budget': 70.0},
-    {'policy_momentum': 0.8, 'public_support': 0.5},
-    "United States Interagency Council on Homelessness. Data Standards and Systems. https://www.usich.gov/",
-    FC['university'],
-    difficulty=0.02
-))
-
-uni_ops.append(make_op(
-    "Student Outreach & Volunteer Corps",
-    UNIVERSITY,
-    {'university_budget': 90.0},
-    {'outreach_teams': 2, 'pop_youth': pop_reduction_factory('pop_youth',6), 'public_support': 1.0},
-    "United States Interagency Council on Homelessness. Student Volunteer Programs. https://www.usich.gov/sites/default/files/document/Evidence-Behind-Approaches-That-End-Homelessness-Brief-2019.pdf",
-    FC['university'],
-    difficulty=0.03
-))
-
-uni_ops.append(make_op(
-    "Policy Incubator with City (pilot)",
-    UNIVERSITY,
-    {'university_budget': 220.0, 'neighborhood_budget': 60.0},
-    {'permanent_units': 30, 'policy_momentum': 1.6},
-    "United States Interagency Council on Homelessness. University-City Collaborations. https://www.usich.gov/sites/default/files/document/Evidence-Behind-Approaches-That-End-Homelessness-Brief-2019.pdf",
-    FC['university'],
-    difficulty=0.08
-))
-
-uni_ops.append(make_op(
-    "Deploy Evaluation Fellows to Shelters",
-    UNIVERSITY,
-    {'university_budget': 110.0},
-    {'social_workers': 2, 'policy_momentum': 1.0},
-    "Homeless Services Research Institute. Fellowship Program Evaluations. https://www.hsri.org/projects/evaluating-samhsa-four-homelessness-programs-and-resources",
-    FC['university'],
-    difficulty=0.03
-))
-
-uni_ops.append(make_op(
-    "Community-engaged Research on Displacement",
-    UNIVERSITY,
-    {'university_budget': 140.0},
-    {'policy_momentum': 1.8, 'public_support': 0.5},
-    "PubMed Central. Community-Based Participatory Research. https://www.ncbi.nlm.nih.gov/pmc/articles/PMC1525292/",
-    FC['university'],
-    difficulty=0.05
-))
-
-uni_ops.append(make_op(
-    "Leverage Philanthropy for PSH",
-    UNIVERSITY,
-    {'university_budget': 260.0},
-    {'_construction_job': lambda news, mult=1.0: (schedule_construction(news,'perm', int(round(50*mult))) or f"Scheduled perm +{int(round(50*mult))}"), 'policy_momentum': 1.2},
-    "Conrad N. Hilton Foundation. Permanent Supportive Housing Initiative Evaluation. https://www.hiltonfoundation.org/learning/evaluation-of-housing-for-health-permanent-supportive-housing-program",
-    FC['university'],
-    difficulty=0.09
-))
-
-uni_ops.append(make_op(
-    "Student-led Rapid Rehousing Pilot",
-    UNIVERSITY,
-    {'university_budget': 120.0},
-    {'transitional_units': 40, 'pop_youth': pop_reduction_factory('pop_youth',8)},
-    "National Low Income Housing Coalition. Student-led Housing Programs. https://nlihc.org/sites/default/files/Housing-First-Evidence.pdf",
-    FC['university'],
-    difficulty=0.06
-))
-
-uni_ops.append(make_op(
-    "Academic Advocacy Campaign",
-    UNIVERSITY,
-    {'university_budget': 80.0},
-    {'public_support': 0.9, 'policy_momentum': 0.6},
-    "National Low Income Housing Coalition. Advocacy Toolkit. https://nlihc.org/",
-    FC['university'],
-    difficulty=0.03
-))
 
 # Aggregate operators
-SHELTERS_OPS = shelters_ops
-NEIGHBOR_OPS = neighbor_ops
-BUSINESS_OPS = business_ops
-MEDICAL_OPS = medical_ops
-UNIVERSITY_OPS = uni_ops
+# OPERATORS, the per-role lists and the role indexes are built the first time any of them
+# is read (module __getattr__ below); afterwards they are ordinary module globals.
+OPERATOR_LISTS = {'SHELTERS_OPS': SHELTERS, 'NEIGHBOR_OPS': NEIGHBORHOODS, 'BUSINESS_OPS': BUSINESS,
+                  'MEDICAL_OPS': MEDICAL, 'UNIVERSITY_OPS': UNIVERSITY}
+OPERATOR_INDEXES = ('OPERATORS', 'ROLE_OPERATORS', 'ROLE_OPERATOR_INDICES')
+
+
+def get_operators():
+    ops = globals().get('OPERATORS')
+    if ops is None:
+        g = globals()
+        ops = compile_operator_table()
+        for list_name, role in OPERATOR_LISTS.items():
+            g[list_name] = [op for op in ops if op.role == role]
+        # role -> that role's operators / their indices into OPERATORS (in OPERATORS order)
+        g['ROLE_OPERATORS'] = {role: [op for op in ops if op.role == role] for role in range(len(ROLE_NAMES))}
+        g['ROLE_OPERATOR_INDICES'] = {role: [i for i, op in enumerate(ops) if op.role == role]
+                                      for role in range(len(ROLE_NAMES))}
+        g['OPERATORS'] = ops
+    return ops
+
+
+def role_operators(role):
+    index = globals().get('ROLE_OPERATORS')
+    if index is None:
+        get_operators()
+        index = globals()['ROLE_OPERATORS']
+    return index.get(role, [])
+
+
+def role_operator_indices(role):
+    index = globals().get('ROLE_OPERATOR_INDICES')
+    if index is None:
+        get_operators()
+        index = globals()['ROLE_OPERATOR_INDICES']
+    return index.get(role, [])
+
+
+def applicable_operators(s, budget=None):
+    '''Operators whose precondition holds in s: the acting role's slice of OPERATORS, found
+    by index instead of testing all 60 preconditions (do not modify the returned list).
+    budget='full' keeps only operators the role can pay in full, budget='partial' those
+    that would apply at least part of their effects (see can_afford).'''
+    ops = role_operators(s.turn)
+    if budget is None:
+        return ops
+    if budget == 'full':
+        return [op for op in ops if can_afford(s, op, True)]
+    if budget == 'partial':
+        return [op for op in ops if can_afford(s, op, False)]
+    raise ValueError(f"unknown budget filter {budget!r}; expected None, 'full' or 'partial'")
+
+
+def __getattr__(name):
+    if name in OPERATOR_INDEXES or name in OPERATOR_LISTS:
+        get_operators()
+        return globals()[name]
+    if name == 'sr':
+        import Select_Roles
+        globals()['sr'] = Select_Roles
+        return Select_Roles
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+# ---------------- Seeding ----------------
+# Every game owns a random.Random stream (State.rng). Seeds are split by hashing, so a
+# batch seed yields independent per-game seeds and any single game can be replayed
+# from its own seed without rerunning the batch.
+
+def derive_seed(seed, *path):
+    '''Deterministically derive a 64-bit child seed from seed and a path of labels/indices.'''
+    import hashlib
+    h = hashlib.blake2b(repr((seed,) + path).encode(), digest_size=8)
+    return int.from_bytes(h.digest(), 'big')
+
+
+def spawn_seeds(seed, n):
+    return [derive_seed(seed, i) for i in range(n)]
 
-OPERATORS = SHELTERS_OPS + NEIGHBOR_OPS + BUSINESS_OPS + MEDICAL_OPS + UNIVERSITY_OPS
 
 # INITIAL STATE
-def create_initial_state():
+def create_initial_state(seed=None, lazy_text=None):
     s = State()
+    s.rng = random.Random(seed)
+    if lazy_text is not None:
+        s.lazy_text = lazy_text
     s.recalc_population()
     s.record_trend()
     return s
@@ -1094,6 +1436,12 @@ ROLES.max_num_of_roles_to_play = 25
 # STATE_VIS hook
 BRIFL_SVG = True
 render_state = None
-def use_BRIFL_SVG():
+def use_BRIFL_SVG(fast=True, cached=True):
+    # fast=True uses the string-template renderer (byte-identical output, no svgwrite DOM per frame);
+    # cached=True serves repeat renders of the same dashboard from vis.RENDER_CACHE
     global render_state
-    from CityWithoutWalls_SVG_VIS_FOR_BRIFL import render_state
+    import CityWithoutWalls_SVG_VIS_FOR_BRIFL as vis
+    render_state = vis.render_state_fast if fast else vis.render_state
+    if cached:
+        vis.RENDER_CACHE.renderer = render_state
+        render_state = vis.render_state_cached
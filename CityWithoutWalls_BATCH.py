@@ -0,0 +1,237 @@
+'''CityWithoutWalls_BATCH.py
+
+Headless batch runner for CityWithoutWalls.
+ - Plays full games from create_initial_state() without the SOLUZION front end.
+ - Each playable role is driven by a pluggable policy: policy(state, ops, rng) -> operator,
+   where ops is the list of operators applicable in state. Stateful policies (planners)
+   may also define reset(), called when a game starts, and observe(op_index, success),
+   called after every move of any role.
+ - Games are spread across a ProcessPoolExecutor (one worker per core by default) and
+   results are streamed back as they finish.
+ - Every game has its own seed (derived from the batch seed) for both the game's random
+   stream and its policies' stream, so play_game(result['seed'], policies) reproduces it
+   when the policies are deterministic (no wall-clock budgets, fixed iteration counts).
+ - With record=True (--log FILE) each result carries its compact binary game log
+   (CityWithoutWalls_LOG); replay_game(result['log']) rebuilds the game exactly from it,
+   without the policies, whatever they were.
+
+Run from the command line:
+    python CityWithoutWalls_BATCH.py --games 2000 --max-rounds 50
+'''
+
+import os, sys, time, random
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import CityWithoutWalls as prob
+
+DEFAULT_MAX_ROUNDS = 50
+
+# metrics reported for the final state of each game
+FINAL_METRICS = ['homeless_population', 'pop_families', 'pop_youth', 'pop_chronic', 'pop_veterans',
+                 'shelter_capacity', 'transitional_units', 'permanent_units',
+                 'shelter_budget', 'neighborhood_budget', 'business_budget', 'medical_budget', 'university_budget',
+                 'public_support', 'economy_index', 'legal_pressure', 'policy_momentum', 'policy_fatigue', 'debt']
+
+
+# ---------------- Policies ----------------
+# Policies must be module-level functions so they can be pickled to worker processes.
+
+def random_policy(state, ops, rng):
+    return rng.choice(ops)
+
+
+def cheapest_policy(state, ops, rng):
+    # prefer the action with the lowest total budget cost (ties broken at random)
+    costs = [sum(op_cost(op).values()) for op in ops]
+    lo = min(costs)
+    return rng.choice([op for op, c in zip(ops, costs) if c == lo])
+
+
+def op_cost(op):
+    return getattr(op, 'cost_k', {}) or {}
+
+
+POLICIES = {'random': random_policy, 'cheapest': cheapest_policy}
+
+
+def applicable_ops(state):
+    return prob.applicable_operators(state)
+
+
+_OP_INDEX = None   # id(operator) -> index into OPERATORS, built on first use
+
+
+def op_index(op):
+    global _OP_INDEX
+    if _OP_INDEX is None:
+        _OP_INDEX = {id(o): i for i, o in enumerate(prob.OPERATORS)}
+    return _OP_INDEX[id(op)]
+
+
+# ---------------- Single game ----------------
+
+def iter_game(seed, policies=None, max_rounds=DEFAULT_MAX_ROUNDS):
+    '''Generator behind play_game: yields (None, initial state), then (op index, state)
+    after every move, until the game is won or max_rounds full rounds have passed.'''
+    policies = policies or {}
+    policy_rng = random.Random(prob.derive_seed(seed, 'policy'))
+    # nobody reads transition banners here: keep effects as records (see transition_text)
+    s = prob.create_initial_state(seed, lazy_text=True)
+    distinct = list({id(p): p for p in policies.values()}.values())
+    for p in distinct:
+        if hasattr(p, 'reset'):
+            p.reset()
+    observers = [p for p in distinct if hasattr(p, 'observe')]
+    yield None, s
+    while not s.is_goal() and s.round < max_rounds:
+        policy = policies.get(s.turn, random_policy)
+        op = policy(s, applicable_ops(s), policy_rng)
+        s = op.state_transf(s)
+        index = op_index(op)
+        for p in observers:
+            p.observe(index, s.last_outcome[0])
+        yield index, s
+
+
+def play_game(seed, policies=None, max_rounds=DEFAULT_MAX_ROUNDS, record=False):
+    '''Play one full game and return a result dict.
+    policies: dict role -> policy; roles that are missing use random_policy.
+    The game is won as soon as the state satisfies is_goal(); it is lost when
+    max_rounds full rounds pass without reaching the goal.
+    record: also return the game's binary log record as result['log'] (bytes).'''
+    log = None
+    if record:
+        import CityWithoutWalls_LOG
+        log = CityWithoutWalls_LOG.GameLog(seed)
+    turns = 0
+    for op_index, s in iter_game(seed, policies, max_rounds):
+        if op_index is not None:
+            turns += 1
+            if log is not None:
+                log.record(op_index, s)
+    result = game_result(seed, s, turns)
+    if log is not None:
+        result['log'] = log.to_bytes()
+    return result
+
+
+def game_result(seed, s, turns):
+    return {
+        'seed': seed,
+        'won': s.is_goal(),
+        'rounds': s.round,
+        'turns': turns,
+        'metrics': {k: getattr(s, k) for k in FINAL_METRICS},
+    }
+
+
+def replay_game(log):
+    '''Result of a recorded game, rebuilt from its move log without the policies: log is
+    result['log'] of play_game(record=True) (bytes) or a CityWithoutWalls_LOG.GameLog.
+    Exact for any policy, including time-budgeted planners such as MCTSPolicy, whose moves
+    differ when play_game(seed) is run again.'''
+    import CityWithoutWalls_LOG
+    if isinstance(log, (bytes, bytearray)):
+        log = CityWithoutWalls_LOG.GameLog.from_bytes(log)[0]
+    s = CityWithoutWalls_LOG.Replayer(log).final_state()
+    return game_result(log.seed, s, len(log))
+
+
+def _play_chunk(seeds, policies, max_rounds, record):
+    return [play_game(seed, policies, max_rounds, record) for seed in seeds]
+
+
+# ---------------- Batches ----------------
+
+def run_batch(n_games, policies=None, max_rounds=DEFAULT_MAX_ROUNDS, base_seed=0,
+              workers=None, chunk_size=None, record=False):
+    '''Generator: play n_games across a process pool and yield result dicts as they finish
+    (completion order, not seed order). Game i is played with seed derive_seed(base_seed, i).'''
+    workers = workers or os.cpu_count() or 1
+    if chunk_size is None:
+        # a few chunks per worker keeps every core busy without paying per-game IPC
+        chunk_size = max(1, min(50, n_games // (workers * 4) or 1))
+    seeds = prob.spawn_seeds(base_seed, n_games)
+    chunks = [seeds[i:i + chunk_size] for i in range(0, n_games, chunk_size)]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(_play_chunk, chunk, policies, max_rounds, record) for chunk in chunks]
+        for fut in as_completed(futures):
+            for result in fut.result():
+                yield result
+
+
+class BatchSummary:
+    '''Running aggregate over streamed game results.'''
+    def __init__(self):
+        self.games = 0
+        self.wins = 0
+        self.total_rounds = 0
+        self.metric_sums = {k: 0.0 for k in FINAL_METRICS}
+        self.start = time.perf_counter()
+
+    def add(self, result):
+        self.games += 1
+        self.wins += 1 if result['won'] else 0
+        self.total_rounds += result['rounds']
+        for k, v in result['metrics'].items():
+            self.metric_sums[k] += v
+
+    @property
+    def elapsed(self):
+        return time.perf_counter() - self.start
+
+    @property
+    def games_per_second(self):
+        return self.games / self.elapsed if self.elapsed > 0 else 0.0
+
+    def as_dict(self):
+        n = max(1, self.games)
+        return {
+            'games': self.games,
+            'wins': self.wins,
+            'win_rate': self.wins / n,
+            'mean_rounds': self.total_rounds / n,
+            'mean_metrics': {k: v / n for k, v in self.metric_sums.items()},
+            'elapsed_s': self.elapsed,
+            'games_per_second': self.games_per_second,
+        }
+
+    def __str__(self):
+        return (f"{self.games} games, win rate {self.wins / max(1, self.games):.1%}, "
+                f"mean rounds {self.total_rounds / max(1, self.games):.1f}, "
+                f"{self.games_per_second:.1f} games/s")
+
+
+def main(argv=None):
+    import argparse
+    ap = argparse.ArgumentParser(description="Headless CityWithoutWalls batch runner")
+    ap.add_argument('--games', type=int, default=1000)
+    ap.add_argument('--max-rounds', type=int, default=DEFAULT_MAX_ROUNDS)
+    ap.add_argument('--seed', type=int, default=0)
+    ap.add_argument('--workers', type=int, default=None)
+    ap.add_argument('--policy', choices=sorted(POLICIES), default='random')
+    ap.add_argument('--log', help="append every game's binary log to this archive file")
+    args = ap.parse_args(argv)
+
+    policy = POLICIES[args.policy]
+    policies = {role: policy for role in prob.PLAYABLE_ROLES}
+    summary = BatchSummary()
+    report_every = max(1, args.games // 10)
+    writer = None
+    if args.log:
+        import CityWithoutWalls_LOG
+        writer = CityWithoutWalls_LOG.LogWriter(args.log)
+    for result in run_batch(args.games, policies, args.max_rounds, args.seed, args.workers, record=bool(writer)):
+        summary.add(result)
+        if writer is not None:
+            writer.write_record(result['log'])
+        if summary.games % report_every == 0:
+            print(summary, file=sys.stderr)
+    if writer is not None:
+        writer.close()
+    print(summary)
+    return summary
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,306 @@
+'''CityWithoutWalls_BENCH.py
+
+Offline benchmark suite for the simulation and rendering hot paths:
+ - state_copy           State(old) on a mid-game state
+ - op/<name>            one op_fn call for each of the 60 operators
+ - update_turn_round    update_turn on the last role of a round (taxes, grants, shocks)
+ - record_trend_loaded  record_trend with 200 pending construction jobs
+ - game_<N>_rounds      a full seeded game of N rounds (random play, no early stop at the goal)
+ - render_state*        the svgwrite dashboard, the template renderer and the cached renderer
+ - lookahead_*          64 sampled outcomes of every operator of the acting role: op_fn calls vs VECTOR.lookahead
+ - fast_forward_null    VECTOR.project: 1000 seeds, 50 do-nothing rounds
+ - cold_*               fresh interpreter: import CityWithoutWalls, then the first OPERATORS
+                        access (reported against COLD_START_TARGET_MS; run with bytecode
+                        caching enabled, or the numbers include compiling the source)
+Every benchmark takes several timed samples; results report ops/sec and per-call
+percentiles (microseconds) and are written as JSON, so builds can be compared:
+    python CityWithoutWalls_BENCH.py --out bench.json
+    python CityWithoutWalls_BENCH.py --out new.json --compare bench.json
+Simulation benchmarks run in lazy_text mode (no banners are pushed to the front end).
+'''
+
+import os, sys, json, time, random, platform, itertools, subprocess
+
+import CityWithoutWalls as prob
+
+GAME_ROUNDS = (50, 200, 1000)
+DEFAULT_THRESHOLD = 0.10   # relative ops/sec drop reported as a regression by --compare
+COLD_START_TARGET_MS = 15.0   # p50 of import + first OPERATORS access in a new worker process
+
+
+# ---------------- Timing ----------------
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    k = (len(sorted_values) - 1) * pct / 100.0
+    lo = int(k)
+    hi = min(lo + 1, len(sorted_values) - 1)
+    return sorted_values[lo] + (sorted_values[hi] - sorted_values[lo]) * (k - lo)
+
+
+def measure(fn, make_arg=None, number=1000, repeat=20, warmup=1):
+    '''Time fn over repeat samples of number calls each. With make_arg, a fresh argument
+    is prepared for every call before the sample's clock starts (for functions that
+    mutate their input). Returns a result dict (per-call times in microseconds).'''
+    samples = []
+    for r in range(warmup + repeat):
+        if make_arg is not None:
+            args = [make_arg() for _ in range(number)]
+            t0 = time.perf_counter_ns()
+            for a in args:
+                fn(a)
+            elapsed = time.perf_counter_ns() - t0
+        else:
+            t0 = time.perf_counter_ns()
+            for _ in range(number):
+                fn()
+            elapsed = time.perf_counter_ns() - t0
+        if r >= warmup:
+            samples.append(elapsed / number / 1000.0)
+    return summarize(samples, number)
+
+
+def summarize(samples, number=1):
+    '''Result dict for per-call sample times (microseconds), each the mean of number calls.'''
+    samples = sorted(samples)
+    repeat = len(samples)
+    total_us = sum(samples) * number
+    return {
+        'ops_per_sec': number * repeat / (total_us / 1e6) if total_us else 0.0,
+        'mean_us': total_us / (number * repeat),
+        'min_us': samples[0],
+        'p50_us': percentile(samples, 50),
+        'p90_us': percentile(samples, 90),
+        'p99_us': percentile(samples, 99),
+        'max_us': samples[-1],
+        'number': number,
+        'repeat': repeat,
+    }
+
+
+# ---------------- Fixtures ----------------
+
+def mid_game_state(seed=0, moves=60):
+    '''A reproducible state after some random play, with construction in the pipeline.'''
+    rng = random.Random(seed)
+    s = prob.create_initial_state(seed, lazy_text=True)
+    for _ in range(moves):
+        ops = [op for op in prob.OPERATORS if op.precond(s)]
+        s = rng.choice(ops).state_transf(s)
+    return s
+
+
+def loaded_pipeline_state(seed=0, jobs=200):
+    s = mid_game_state(seed)
+    rng = random.Random(seed)
+    for _ in range(jobs):
+        s.add_job(rng.choice(('shelter', 'trans', 'perm')), rng.randint(10, 300), rng.randint(1, 40))
+    return s
+
+
+def play_rounds(seed, rounds):
+    rng = random.Random(prob.derive_seed(seed, 'policy'))
+    s = prob.create_initial_state(seed, lazy_text=True)
+    while s.round < rounds:
+        s = rng.choice(prob.role_operators(s.turn)).state_transf(s)
+    return s
+
+
+# ---------------- Benchmarks ----------------
+
+def bench_state_copy(scale):
+    s = mid_game_state()
+    return measure(lambda: prob.State(s), number=max(1, int(20000 * scale)))
+
+
+def bench_operators(scale):
+    base = mid_game_state()
+    results = {}
+    for op in prob.OPERATORS:
+        s = prob.State(base)
+        s.turn = op.role
+        transf = op.state_transf
+        results[f"op/{op.name}"] = measure(lambda: transf(s), number=max(1, int(500 * scale)), repeat=10)
+    return results
+
+
+def bench_update_turn(scale):
+    s = mid_game_state()
+    s.turn = prob.PLAYABLE_ROLES[-1]
+    return measure(prob.update_turn, lambda: prob.State(s), number=max(1, int(5000 * scale)))
+
+
+def bench_record_trend(scale):
+    s = loaded_pipeline_state()
+    return measure(prob.State.record_trend, lambda: prob.State(s), number=max(1, int(5000 * scale)))
+
+
+def bench_games(scale, rounds=GAME_ROUNDS):
+    results = {}
+    for n in rounds:
+        seeds = itertools.count()
+        repeat = max(3, int(10 * scale * 50 / n))
+        results[f"game_{n}_rounds"] = measure(lambda: play_rounds(next(seeds), n), number=1, repeat=repeat)
+    return results
+
+
+def bench_render(scale):
+    try:
+        import CityWithoutWalls_SVG_VIS_FOR_BRIFL as vis
+    except ImportError as e:
+        print(f"skipping render benchmarks: {e}", file=sys.stderr)
+        return {}
+    states = [mid_game_state(seed) for seed in range(8)]
+    it = itertools.cycle(states)
+    cache = vis.RenderCache(vis.render_state_fast)
+    return {
+        'render_state': measure(lambda: vis.render_state(next(it)), number=max(1, int(50 * scale)), repeat=10),
+        'render_state_fast': measure(lambda: vis.render_state_fast(next(it)), number=max(1, int(500 * scale)), repeat=10),
+        'render_state_cached': measure(lambda: cache(next(it)), number=max(1, int(5000 * scale)), repeat=10),
+    }
+
+
+def bench_lookahead(scale, samples=64):
+    # every operator of the acting role over samples outcomes: scalar op_fn calls vs one
+    # vectorized pass
+    try:
+        import CityWithoutWalls_VECTOR as vec
+    except ImportError as e:
+        print(f"skipping lookahead benchmarks: {e}", file=sys.stderr)
+        return {}
+    s = mid_game_state()
+    ops = prob.role_operators(s.turn)
+    def scalar():
+        for op in ops:
+            for _ in range(samples):
+                op.state_transf(s)
+    return {
+        'lookahead_scalar': measure(scalar, number=1, repeat=max(3, int(10 * scale))),
+        'lookahead_vector': measure(lambda: vec.lookahead(s, samples), number=max(1, int(10 * scale)), repeat=10),
+    }
+
+
+def bench_fast_forward(scale):
+    try:
+        import CityWithoutWalls_VECTOR as vec
+    except ImportError as e:
+        print(f"skipping fast-forward benchmarks: {e}", file=sys.stderr)
+        return {}
+    s = prob.create_initial_state(seed=1)
+    return {'fast_forward_null': measure(lambda: vec.project(s, 50, 1000), number=1, repeat=max(3, int(10 * scale)))}
+
+
+_COLD_START = '''
+import json, time
+t0 = time.perf_counter()
+import CityWithoutWalls as prob
+t1 = time.perf_counter()
+prob.OPERATORS
+t2 = time.perf_counter()
+print(json.dumps([t1 - t0, t2 - t1]))
+'''
+
+
+def bench_cold_start(scale):
+    here = os.path.dirname(os.path.abspath(prob.__file__))
+    env = dict(os.environ)
+    env['PYTHONPATH'] = os.pathsep.join(p for p in (here, env.get('PYTHONPATH')) if p)
+    imports, operators, totals = [], [], []
+    for _ in range(max(3, int(20 * scale))):
+        out = subprocess.run([sys.executable, '-c', _COLD_START], env=env, capture_output=True,
+                             text=True, check=True).stdout
+        t_import, t_ops = json.loads(out.strip().splitlines()[-1])
+        imports.append(t_import * 1e6)
+        operators.append(t_ops * 1e6)
+        totals.append((t_import + t_ops) * 1e6)
+    total = summarize(totals)
+    total['target_ms'] = COLD_START_TARGET_MS
+    total['within_target'] = total['p50_us'] / 1000.0 <= COLD_START_TARGET_MS
+    return {'cold_import': summarize(imports), 'cold_first_operators': summarize(operators),
+            'cold_start': total}
+
+
+def run_all(scale=1.0, only=None):
+    suite = [
+        ('state_copy', lambda: {'state_copy': bench_state_copy(scale)}),
+        ('op', lambda: bench_operators(scale)),
+        ('update_turn_round', lambda: {'update_turn_round': bench_update_turn(scale)}),
+        ('record_trend_loaded', lambda: {'record_trend_loaded': bench_record_trend(scale)}),
+        ('game', lambda: bench_games(scale)),
+        ('render', lambda: bench_render(scale)),
+        ('lookahead', lambda: bench_lookahead(scale)),
+        ('fast_forward', lambda: bench_fast_forward(scale)),
+        ('cold', lambda: bench_cold_start(scale)),
+    ]
+    results = {}
+    for name, run in suite:
+        if only and not any(name.startswith(o) or o.startswith(name) for o in only):
+            continue
+        for k, v in run().items():
+            if not only or any(k.startswith(o) for o in only):
+                results[k] = v
+    return results
+
+
+# ---------------- Reports ----------------
+
+def environment():
+    return {
+        'python': sys.version.split()[0],
+        'implementation': platform.python_implementation(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+    }
+
+
+def compare(results, baseline, threshold=DEFAULT_THRESHOLD):
+    '''Return [(name, old ops/sec, new ops/sec, ratio)] for benchmarks slower than
+    baseline by more than threshold.'''
+    regressions = []
+    for name, r in results.items():
+        old = baseline.get(name)
+        if not old or not old['ops_per_sec']:
+            continue
+        ratio = r['ops_per_sec'] / old['ops_per_sec']
+        if ratio < 1.0 - threshold:
+            regressions.append((name, old['ops_per_sec'], r['ops_per_sec'], ratio))
+    return regressions
+
+
+def main(argv=None):
+    import argparse
+    ap = argparse.ArgumentParser(description="CityWithoutWalls benchmark suite")
+    ap.add_argument('--out', default='bench.json', help="JSON results file")
+    ap.add_argument('--scale', type=float, default=1.0, help="multiply the number of calls per sample")
+    ap.add_argument('--only', nargs='*', help="benchmark name prefixes to run (e.g. op game_50)")
+    ap.add_argument('--compare', help="baseline JSON file; exit with status 1 on regressions")
+    ap.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD)
+    args = ap.parse_args(argv)
+
+    results = run_all(args.scale, args.only)
+    report = {'environment': environment(), 'results': results}
+    with open(args.out, 'w') as f:
+        json.dump(report, f, indent=2, sort_keys=True)
+    width = max(len(k) for k in results) if results else 0
+    for name, r in results.items():
+        print(f"{name:<{width}}  {r['ops_per_sec']:>12.1f} ops/s  p50 {r['p50_us']:>10.1f}us  p99 {r['p99_us']:>10.1f}us")
+    cold = results.get('cold_start')
+    if cold and not cold['within_target']:
+        print(f"cold start p50 {cold['p50_us'] / 1000.0:.1f}ms is over the {COLD_START_TARGET_MS:.0f}ms target",
+              file=sys.stderr)
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)['results']
+        regressions = compare(results, baseline, args.threshold)
+        for name, old, new, ratio in regressions:
+            print(f"REGRESSION {name}: {old:.1f} -> {new:.1f} ops/s ({ratio:.0%})")
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,170 @@
+'''CityWithoutWalls_CHANCE.py
+
+Outcome distribution and expected successor of an operator, computed without sampling.
+The randomness of one move (make_op's op_fn followed by update_turn) is
+ - the success roll: success with probability compute_success_chance(...) (momentum,
+   support, fatigue, difficulty and budget fraction),
+ - on failure, the multiplier frac * uniform(*PARTIAL_MULT_RANGE),
+ - at a round boundary: the grant (GRANT_CHANCE when momentum > GRANT_MOMENTUM) and a
+   shock (SHOCK_CHANCE, kind uniform over SHOCK_KINDS) with uniform magnitudes.
+outcomes() enumerates these as weighted branch states:
+ - success / failure and the grant and shock kinds exactly,
+ - the failure multiplier discretized into `bins` equal-probability bins (bin midpoints),
+ - shock magnitudes replaced by the exact expectation of the clamped draw (nothing else
+   in the move depends on them).
+expected() sums the branches, so the expected metrics are exact apart from the
+multiplier quadrature, whose error shrinks as bins grows. For the hover preview or a
+one-ply expectimax:
+    e = expected(state, op)
+    e['metrics']['homeless_population'], e['success_chance'], e['win_probability']
+'''
+
+import CityWithoutWalls as prob
+
+DEFAULT_BINS = 8
+
+
+class Outcome:
+    __slots__ = ('probability', 'state', 'success', 'mult', 'grant', 'shock')
+
+    def __init__(self, probability, state, success, mult, grant=False, shock=None):
+        self.probability = probability
+        self.state = state
+        self.success = success
+        self.mult = mult
+        self.grant = grant
+        self.shock = shock
+
+    def __repr__(self):
+        return (f"Outcome(p={self.probability:.4f}, success={self.success}, mult={self.mult:.3f}, "
+                f"grant={self.grant}, shock={self.shock})")
+
+
+# ---------------- Clamped uniform draws ----------------
+
+def expected_max(a, b, bound):
+    '''E[max(bound, V)] for V ~ uniform(a, b).'''
+    if bound <= a:
+        return (a + b) / 2.0
+    if bound >= b:
+        return bound
+    return (bound * (bound - a) + (b * b - bound * bound) / 2.0) / (b - a)
+
+
+def expected_shift(x, sign, lo, hi, bound):
+    # E of one SHOCK_MOVES entry: clamp(x + sign * uniform(lo, hi), bound)
+    if sign < 0:
+        return expected_max(x - hi, x - lo, bound)
+    return -expected_max(-x - hi, -x - lo, -bound)
+
+
+# ---------------- Branches ----------------
+
+def _macro_branches(s):
+    '''update_turn on s as weighted branches [(probability, state, grant, shock)].'''
+    if prob.next_player_index(s.turn) != prob.PLAYABLE_ROLES[0]:
+        s.turn = prob.next_player_index(s.turn)
+        return [(1.0, s, False, None)]
+    grants = [(1.0, False)]
+    if s.policy_momentum > prob.GRANT_MOMENTUM:
+        grants = [(prob.GRANT_CHANCE, True), (1.0 - prob.GRANT_CHANCE, False)]
+    p_kind = prob.SHOCK_CHANCE / len(prob.SHOCK_KINDS)
+    shocks = [(1.0 - prob.SHOCK_CHANCE, None)] + [(p_kind, kind) for kind in prob.SHOCK_KINDS]
+    branches = []
+    for p_grant, grant in grants:
+        for p_shock, shock in shocks:
+            t = prob.State(s)
+            t.turn = prob.next_player_index(t.turn)
+            prob.round_boundary(t, grant, shock, None)
+            if shock is not None:
+                for (field, sign, lo, hi, bound) in prob.SHOCK_MOVES[shock]:
+                    setattr(t, field, expected_shift(getattr(t, field), sign, lo, hi, bound))
+            branches.append((p_grant * p_shock, t, grant, shock))
+    return branches
+
+
+def _prepare(state, op):
+    if op.role != state.turn:
+        raise ValueError(f"{op.name!r} belongs to {prob.int_to_name(op.role)}, "
+                         f"but it is {prob.int_to_name(state.turn)}'s turn")
+    news = prob.State(state)
+    # branch states neither push banners nor grow the game's history store
+    news.lazy_text = True
+    news.detach_history()
+    news.last_action_url = op.source_url
+    frac = prob.charge_budget(news, op.cost_k)
+    return news, frac
+
+
+def outcomes(state, op, bins=DEFAULT_BINS):
+    '''Weighted successor states of playing op in state (probabilities sum to 1).'''
+    news, frac = _prepare(state, op)
+    result = []
+    if frac == 0.0:
+        # op_fn's no-budget path: nothing applied, update_turn runs before record_trend
+        news.last_outcome = (False, 0.0, 0.0)
+        news.last_action = (op.role_name, op.name, None, None)
+        for p, t, grant, shock in _macro_branches(news):
+            t.record_trend()
+            result.append(Outcome(p, t, False, 0.0, grant, shock))
+        return result
+    chance = prob.compute_success_chance(news, op.difficulty, frac)
+    lo, hi = prob.PARTIAL_MULT_RANGE
+    mults = [(chance, True, 1.0)]
+    mults += [((1.0 - chance) / bins, False, frac * (lo + (hi - lo) * (k + 0.5) / bins)) for k in range(bins)]
+    for p, success, mult in mults:
+        if p <= 0.0:
+            continue
+        s = prob.State(news)
+        prob.apply_outcome(s, op.plan, mult, op.fatigue_step)
+        s.record_trend()
+        s.last_outcome = (success, mult, frac)
+        s.last_action = f"{op.role_name} expected '{op.name}' ({'success' if success else f'partial x{mult:.2f}'})"
+        for q, t, grant, shock in _macro_branches(s):
+            result.append(Outcome(p * q, t, success, mult, grant, shock))
+    return result
+
+
+def expected(state, op, bins=DEFAULT_BINS, fields=None):
+    '''Expected successor of playing op in state:
+    {'success_chance', 'budget_fraction', 'win_probability', 'metrics': {field: expectation}}.
+    fields defaults to HISTORY_FIELDS. win_probability evaluates is_goal on the branch
+    states (shock magnitudes at their expectation).'''
+    fields = fields or prob.HISTORY_FIELDS
+    index = [prob.FIELD_INDEX[f] for f in fields]
+    branches = outcomes(state, op, bins)
+    sums = [0.0] * len(index)
+    win = 0.0
+    success = 0.0
+    for o in branches:
+        p = o.probability
+        s = o.state
+        v = s._v
+        for j, i in enumerate(index):
+            sums[j] += p * v[i]
+        if s.is_goal():
+            win += p
+        if o.success:
+            success += p
+    return {
+        'success_chance': success,
+        'budget_fraction': branches[0].state.last_outcome[2],
+        'win_probability': win,
+        'metrics': dict(zip(fields, sums)),
+    }
+
+
+def expected_value(state, op, value_fn, bins=DEFAULT_BINS):
+    '''Expectation of value_fn(successor) over the outcome distribution.'''
+    return sum(o.probability * value_fn(o.state) for o in outcomes(state, op, bins))
+
+
+def best_operator(state, value_fn, bins=DEFAULT_BINS):
+    '''One-ply expectimax: the acting role's operator with the highest expected value.
+    Returns (operator, expected value).'''
+    best, best_value = None, None
+    for op in prob.role_operators(state.turn):
+        v = expected_value(state, op, value_fn, bins)
+        if best_value is None or v > best_value:
+            best, best_value = op, v
+    return best, best_value
@@ -0,0 +1,294 @@
+'''CityWithoutWalls_INSTRUMENT.py
+
+Optional hot-path instrumentation. enable() wraps
+ - every operator's op_fn (state_transf), timed per operator name and aggregated per role,
+   with success / partial / no-budget outcome counts (from State.last_outcome),
+ - update_turn (split into plain turns and round boundaries),
+ - State.record_trend,
+ - render_state (whatever use_BRIFL_SVG installed),
+and disable() puts the original functions back. Nothing is wrapped while disabled, so
+the cost is zero then. Timings are inclusive (an operator's time contains its
+update_turn and record_trend calls).
+
+    import CityWithoutWalls_INSTRUMENT as inst
+    inst.enable()
+    ... play ...
+    print(inst.REGISTRY.dump_text())
+    inst.REGISTRY.dump_json('profile.json')
+
+The registry is per process; enable() it in each worker of a process pool.
+Call enable() after use_BRIFL_SVG so the installed renderer is the one that is wrapped.
+'''
+
+import json, time, random
+
+import CityWithoutWalls as prob
+
+RESERVOIR_SIZE = 2048   # timing samples kept per entry for percentiles
+
+
+class Timing:
+    '''Call count, cumulative time and a reservoir sample of per-call times (ns).'''
+    __slots__ = ('count', 'total_ns', 'min_ns', 'max_ns', 'samples', '_rng')
+
+    def __init__(self):
+        self.count = 0
+        self.total_ns = 0
+        self.min_ns = None
+        self.max_ns = 0
+        self.samples = []
+        self._rng = random.Random(0)
+
+    def add(self, ns):
+        self.count += 1
+        self.total_ns += ns
+        if self.min_ns is None or ns < self.min_ns:
+            self.min_ns = ns
+        if ns > self.max_ns:
+            self.max_ns = ns
+        if len(self.samples) < RESERVOIR_SIZE:
+            self.samples.append(ns)
+        else:
+            j = self._rng.randrange(self.count)
+            if j < RESERVOIR_SIZE:
+                self.samples[j] = ns
+
+    def merge(self, other):
+        self.samples = self._merge_samples(other)
+        self.count += other.count
+        self.total_ns += other.total_ns
+        if other.min_ns is not None and (self.min_ns is None or other.min_ns < self.min_ns):
+            self.min_ns = other.min_ns
+        self.max_ns = max(self.max_ns, other.max_ns)
+
+    def _merge_samples(self, other):
+        # a uniform reservoir of both sides' calls: every sample of a side stands for
+        # count / len(samples) calls, so the draw takes from each side by call count
+        a, b = self.samples, other.samples
+        if len(a) + len(b) <= RESERVOIR_SIZE and len(a) == self.count and len(b) == other.count:
+            return a + b
+        k = min(RESERVOIR_SIZE, len(a) + len(b))
+        rng = self._rng
+        na, nb = self.count, other.count
+        ka = 0
+        for _ in range(k):
+            if rng.random() * (na + nb) < na:
+                ka += 1
+                na -= 1
+            else:
+                nb -= 1
+        ka = max(k - len(b), min(ka, len(a)))
+        return rng.sample(a, ka) + rng.sample(b, k - ka)
+
+    def percentile(self, pct):
+        if not self.samples:
+            return 0.0
+        s = sorted(self.samples)
+        return s[min(len(s) - 1, int(round((len(s) - 1) * pct / 100.0)))]
+
+    def as_dict(self, elapsed_s=None):
+        d = {
+            'count': self.count,
+            'total_ms': self.total_ns / 1e6,
+            'mean_us': self.total_ns / self.count / 1e3 if self.count else 0.0,
+            'min_us': (self.min_ns or 0) / 1e3,
+            'p50_us': self.percentile(50) / 1e3,
+            'p90_us': self.percentile(90) / 1e3,
+            'p99_us': self.percentile(99) / 1e3,
+            'max_us': self.max_ns / 1e3,
+        }
+        if elapsed_s:
+            d['per_sec'] = self.count / elapsed_s
+        return d
+
+
+class OperatorStats(Timing):
+    __slots__ = ('role', 'success', 'partial', 'no_budget')
+
+    def __init__(self, role):
+        Timing.__init__(self)
+        self.role = role
+        self.success = 0
+        self.partial = 0
+        self.no_budget = 0
+
+    def outcome(self, last_outcome):
+        if last_outcome is None:
+            return
+        success, mult, frac = last_outcome
+        if frac == 0.0:
+            self.no_budget += 1
+        elif success:
+            self.success += 1
+        else:
+            self.partial += 1
+
+    def merge(self, other):
+        Timing.merge(self, other)
+        self.success += other.success
+        self.partial += other.partial
+        self.no_budget += other.no_budget
+
+    def as_dict(self, elapsed_s=None):
+        d = Timing.as_dict(self, elapsed_s)
+        n = max(1, self.count)
+        d.update({'success': self.success, 'partial': self.partial, 'no_budget': self.no_budget,
+                  'success_rate': self.success / n, 'partial_rate': self.partial / n})
+        return d
+
+
+class Registry:
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.started = time.perf_counter()
+        self.operators = {}          # operator name -> OperatorStats
+        self.update_turn = Timing()
+        self.round_boundary = Timing()
+        self.record_trend = Timing()
+        self.render = Timing()
+
+    def operator(self, op):
+        stats = self.operators.get(op.name)
+        if stats is None:
+            stats = self.operators[op.name] = OperatorStats(prob.int_to_name(getattr(op, 'role', None)))
+        return stats
+
+    def roles(self):
+        out = {}
+        for stats in self.operators.values():
+            agg = out.get(stats.role)
+            if agg is None:
+                agg = out[stats.role] = OperatorStats(stats.role)
+            agg.merge(stats)
+        return out
+
+    def as_dict(self):
+        elapsed = time.perf_counter() - self.started
+        return {
+            'elapsed_s': elapsed,
+            'operators': {name: s.as_dict(elapsed) for name, s in sorted(self.operators.items())},
+            'roles': {role: s.as_dict(elapsed) for role, s in sorted(self.roles().items())},
+            'update_turn': self.update_turn.as_dict(elapsed),
+            'round_boundary': self.round_boundary.as_dict(elapsed),
+            'record_trend': self.record_trend.as_dict(elapsed),
+            'render': self.render.as_dict(elapsed),
+        }
+
+    def dump_json(self, path=None):
+        text = json.dumps(self.as_dict(), indent=2)
+        if path:
+            with open(path, 'w') as f:
+                f.write(text)
+        return text
+
+    def dump_text(self, top=15):
+        d = self.as_dict()
+        lines = [f"instrumentation over {d['elapsed_s']:.1f}s"]
+        def row(name, s):
+            return (f"  {name:<44} {s['count']:>8} calls {s['total_ms']:>10.1f}ms "
+                    f"p50 {s['p50_us']:>8.1f}us p99 {s['p99_us']:>8.1f}us")
+        for key in ('update_turn', 'round_boundary', 'record_trend'):
+            lines.append(row(key, d[key]))
+        lines.append(row('render', d['render']) + f"  {d['render'].get('per_sec', 0.0):.1f}/s")
+        lines.append("roles:")
+        for role, s in d['roles'].items():
+            lines.append(row(role, s) + f"  success {s['success_rate']:.0%} partial {s['partial_rate']:.0%}")
+        lines.append(f"operators (top {top} by total time):")
+        ops = sorted(d['operators'].items(), key=lambda kv: -kv[1]['total_ms'])[:top]
+        for name, s in ops:
+            lines.append(row(name, s) + f"  success {s['success_rate']:.0%} partial {s['partial_rate']:.0%}")
+        return "\n".join(lines)
+
+
+REGISTRY = Registry()
+
+
+# ---------------- Wrapping ----------------
+
+_originals = {}
+
+
+def _wrap_operator(op, stats, fn):
+    clock = time.perf_counter_ns
+    def timed_op(s):
+        t0 = clock()
+        news = fn(s)
+        stats.add(clock() - t0)
+        stats.outcome(news.last_outcome)
+        return news
+    timed_op.__wrapped__ = fn
+    return timed_op
+
+
+def _wrap_update_turn(fn, registry):
+    clock = time.perf_counter_ns
+    first = prob.PLAYABLE_ROLES[0]
+    def timed_update_turn(state):
+        t0 = clock()
+        fn(state)
+        ns = clock() - t0
+        registry.update_turn.add(ns)
+        if state.turn == first:
+            registry.round_boundary.add(ns)
+    timed_update_turn.__wrapped__ = fn
+    return timed_update_turn
+
+
+def _wrap_timed(fn, timing):
+    clock = time.perf_counter_ns
+    def timed(*args, **kwargs):
+        t0 = clock()
+        result = fn(*args, **kwargs)
+        timing.add(clock() - t0)
+        return result
+    timed.__wrapped__ = fn
+    return timed
+
+
+def enabled():
+    return bool(_originals)
+
+
+def enable(registry=REGISTRY):
+    if _originals:
+        return
+    for op in prob.OPERATORS:
+        _originals[('op', id(op))] = (op, op.state_transf)
+        op.state_transf = _wrap_operator(op, registry.operator(op), op.state_transf)
+    _originals['update_turn'] = prob.update_turn
+    prob.update_turn = _wrap_update_turn(prob.update_turn, registry)
+    _originals['record_trend'] = prob.State.record_trend
+    prob.State.record_trend = _wrap_timed(prob.State.record_trend, registry.record_trend)
+    if prob.render_state is not None:
+        _originals['render_state'] = prob.render_state
+        prob.render_state = _wrap_timed(prob.render_state, registry.render)
+
+
+def disable():
+    for key, value in list(_originals.items()):
+        if key[0] == 'op':
+            op, fn = value
+            op.state_transf = fn
+        elif key == 'update_turn':
+            prob.update_turn = value
+        elif key == 'record_trend':
+            prob.State.record_trend = value
+        elif key == 'render_state':
+            prob.render_state = value
+    _originals.clear()
+
+
+class instrumented:
+    '''Context manager: enable() on entry, disable() on exit.'''
+    def __init__(self, registry=REGISTRY):
+        self.registry = registry
+
+    def __enter__(self):
+        enable(self.registry)
+        return self.registry
+
+    def __exit__(self, *exc):
+        disable()
+        return False
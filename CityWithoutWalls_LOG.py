@@ -0,0 +1,258 @@
+'''CityWithoutWalls_LOG.py
+
+Event-sourced game log. A game is fully determined by its seed (which seeds the game's
+random stream in create_initial_state) and the operators played, so a log stores
+ - the seed (u64) once per game,
+ - two bytes per move: the operator's index into OPERATORS and an outcome byte
+   (OUTCOME_SUCCESS / OUTCOME_NO_BUDGET), which replay checks to catch logs that no
+   longer match the rules.
+
+Archive file layout (little-endian), append-only:
+    header : b'CWWL' | u8 format version | u8 len + PROBLEM_VERSION | u32 operator table digest
+    game   : u64 seed | u32 moves | moves * (u8 op index, u8 outcome)   (repeated)
+
+    log = GameLog.start(seed)            # or GameLog(seed) around an existing game
+    s = log.initial_state()
+    s = log.play(s, op_index)            # applies the operator and records the move
+    with LogWriter('games.cwwl') as w:
+        w.write(log)
+    for log in LogReader('games.cwwl'):
+        state = Replayer(log).state_at(120)
+'''
+
+import os, struct, zlib, random
+
+import CityWithoutWalls as prob
+
+MAGIC = b'CWWL'
+FORMAT_VERSION = 1
+SNAPSHOT_EVERY = 50     # moves between replay snapshots
+
+OUTCOME_SUCCESS = 1     # operator succeeded (else partial/failed)
+OUTCOME_NO_BUDGET = 2   # no budget was available, nothing was applied
+
+_GAME = struct.Struct('<QI')
+
+
+class ReplayMismatch(ValueError):
+    '''A logged outcome differs from the replayed one (rules or operators changed).'''
+
+
+def operator_table_digest(operators=None):
+    names = "\n".join(op.name for op in (operators or prob.OPERATORS))
+    return zlib.crc32(names.encode()) & 0xffffffff
+
+
+def outcome_byte(state):
+    success, mult, frac = state.last_outcome
+    return (OUTCOME_SUCCESS if success else 0) | (OUTCOME_NO_BUDGET if frac == 0.0 else 0)
+
+
+# ---------------- One game ----------------
+
+class GameLog:
+    __slots__ = ('seed', 'moves')
+
+    def __init__(self, seed, moves=None):
+        if not 0 <= seed < 2 ** 64:
+            raise ValueError("logged games need a seed in [0, 2**64)")
+        self.seed = seed
+        self.moves = bytearray(moves or b'')
+
+    @classmethod
+    def start(cls, seed=None):
+        # an unseeded game gets a random seed so that it can still be replayed
+        if seed is None:
+            seed = int.from_bytes(os.urandom(8), 'little')
+        return cls(seed)
+
+    def __len__(self):
+        return len(self.moves) // 2
+
+    def initial_state(self, lazy_text=None):
+        return prob.create_initial_state(self.seed, lazy_text)
+
+    def record(self, op_index, state):
+        '''Append a move: op_index was played and produced state.'''
+        self.moves.append(op_index)
+        self.moves.append(outcome_byte(state))
+
+    def play(self, state, op_index):
+        news = prob.OPERATORS[op_index].state_transf(state)
+        self.record(op_index, news)
+        return news
+
+    def move(self, turn):
+        '''(op index, outcome byte) of the turn-th move (0-based).'''
+        return self.moves[2 * turn], self.moves[2 * turn + 1]
+
+    def operators(self):
+        return self.moves[0::2]
+
+    def to_bytes(self):
+        return _GAME.pack(self.seed, len(self)) + bytes(self.moves)
+
+    @classmethod
+    def from_bytes(cls, data, offset=0):
+        '''Decode one game record; returns (GameLog, offset after the record).'''
+        seed, n = _GAME.unpack_from(data, offset)
+        start = offset + _GAME.size
+        end = start + 2 * n
+        if end > len(data):
+            raise ValueError("truncated game record")
+        return cls(seed, data[start:end]), end
+
+
+# ---------------- Archive files ----------------
+
+def _header():
+    version = prob.PROBLEM_VERSION.encode()
+    return MAGIC + struct.pack('<BB', FORMAT_VERSION, len(version)) + version + \
+        struct.pack('<I', operator_table_digest())
+
+
+def _read_header(f):
+    head = f.read(6)
+    if len(head) < 6 or head[:4] != MAGIC:
+        raise ValueError("not a CityWithoutWalls game log")
+    fmt, n = struct.unpack('<BB', head[4:])
+    if fmt != FORMAT_VERSION:
+        raise ValueError(f"unsupported log format version {fmt}")
+    version = f.read(n).decode()
+    digest, = struct.unpack('<I', f.read(4))
+    return version, digest
+
+
+class LogWriter:
+    '''Append game records to an archive file (the header is written when the file is new).'''
+
+    def __init__(self, path):
+        self.path = path
+        new = not os.path.exists(path) or os.path.getsize(path) == 0
+        if not new:
+            with open(path, 'rb') as f:
+                self._check(*_read_header(f))
+        self.f = open(path, 'ab')
+        if new:
+            self.f.write(_header())
+
+    @staticmethod
+    def _check(version, digest):
+        if version != prob.PROBLEM_VERSION or digest != operator_table_digest():
+            raise ValueError("log was written for a different PROBLEM_VERSION or operator table")
+
+    def write(self, log):
+        self.f.write(log.to_bytes())
+
+    def write_record(self, data):
+        # an already encoded game record (GameLog.to_bytes), e.g. from a batch worker
+        self.f.write(data)
+
+    def close(self):
+        self.f.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+
+class LogReader:
+    '''Iterate the games of an archive file. index() gives random access by game number.'''
+
+    def __init__(self, path):
+        with open(path, 'rb') as f:
+            self.problem_version, self.digest = _read_header(f)
+            self.data_start = f.tell()
+            self.data = f.read()
+        self._offsets = None
+
+    @property
+    def compatible(self):
+        return self.problem_version == prob.PROBLEM_VERSION and self.digest == operator_table_digest()
+
+    def __iter__(self):
+        data = self.data
+        offset = 0
+        while offset < len(data):
+            log, offset = GameLog.from_bytes(data, offset)
+            yield log
+
+    def index(self):
+        if self._offsets is None:
+            offsets = []
+            data = self.data
+            offset = 0
+            while offset < len(data):
+                offsets.append(offset)
+                seed, n = _GAME.unpack_from(data, offset)
+                offset += _GAME.size + 2 * n
+            self._offsets = offsets
+        return self._offsets
+
+    def __len__(self):
+        return len(self.index())
+
+    def __getitem__(self, i):
+        return GameLog.from_bytes(self.data, self.index()[i])[0]
+
+
+# ---------------- Replay ----------------
+
+class Replayer:
+    '''Rebuild the State after any number of moves of a logged game. Replaying is
+    deterministic; snapshots (state + random stream state) are kept every
+    snapshot_every moves, so seeking costs at most snapshot_every operator calls.'''
+
+    def __init__(self, log, snapshot_every=SNAPSHOT_EVERY, verify=True, lazy_text=True):
+        self.log = log
+        self.snapshot_every = snapshot_every
+        self.verify = verify
+        s = log.initial_state(lazy_text)
+        self.snapshots = [(s, s.rng.getstate())]   # snapshots[k] is the state after k * snapshot_every moves
+
+    def __len__(self):
+        return len(self.log)
+
+    def _restore(self, k):
+        snap, rng_state = self.snapshots[k]
+        s = prob.State(snap)
+        # a private copy of the snapshot's history, so the moves replayed from it do not
+        # append rows to a store shared by every seek
+        s.detach_history(keep=len(snap._history))
+        s.rng = random.Random()
+        s.rng.setstate(rng_state)
+        return s
+
+    def state_at(self, turn):
+        '''State after the first turn moves (0 is the initial state).'''
+        if not 0 <= turn <= len(self.log):
+            raise IndexError(f"turn {turn} outside 0..{len(self.log)}")
+        every = self.snapshot_every
+        k = min(turn // every, len(self.snapshots) - 1)
+        s = self._restore(k)
+        moves = self.log.moves
+        ops = prob.OPERATORS
+        for t in range(k * every, turn):
+            op_index = moves[2 * t]
+            s = ops[op_index].state_transf(s)
+            if self.verify and outcome_byte(s) != moves[2 * t + 1]:
+                raise ReplayMismatch(f"move {t} ({ops[op_index].name!r}) replayed with a different outcome")
+            if (t + 1) % every == 0 and (t + 1) // every == len(self.snapshots):
+                # a copy: the caller owns the returned state and may change it
+                self.snapshots.append((prob.State(s), s.rng.getstate()))
+        return s
+
+    def final_state(self):
+        return self.state_at(len(self.log))
+
+    def states(self):
+        '''Generator over every state of the game, initial state first.'''
+        s = self._restore(0)
+        yield s
+        ops = prob.OPERATORS
+        for op_index in self.log.operators():
+            s = ops[op_index].state_transf(s)
+            yield s
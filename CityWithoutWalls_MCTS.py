@@ -0,0 +1,210 @@
+'''CityWithoutWalls_MCTS.py
+
+Time-budgeted Monte Carlo Tree Search planner that can stand in for any stakeholder role.
+ - choose(state) picks one of the acting role's 12 operators within a wall-clock budget
+   (e.g. 50 ms per move) and returns its index into OPERATORS.
+ - The tree is open-loop with explicit chance nodes: every operator leads to a chance node
+   whose children are the two outcomes make_op can produce (success vs partial/failed, read
+   from State.last_outcome). States are re-simulated along the path on each iteration.
+ - Every role in the tree is assumed to play for the same city value (the game is won or
+   lost by the whole city); pass value_fn(state, role) to plan for a role-specific score.
+ - observe(op_index, success) moves the root along a move that was actually played, so
+   the matching subtree is reused on the next call to choose().
+ - sims_per_second reports planner throughput for sizing hardware.
+
+Simulations run on copies of the state that draw from the planner's own random stream,
+so planning never advances the real game's rng, in lazy_text mode, so they never format
+or push transition banners, and with a detached metric history, so simulated moves are not
+appended to the game's history store.
+'''
+
+import math, time, random
+
+import CityWithoutWalls as prob
+
+DEFAULT_TIME_BUDGET = 0.05   # seconds per move
+DEFAULT_ROLLOUT_DEPTH = 15   # moves played by the rollout policy after leaving the tree
+DEFAULT_EXPLORATION = 1.0 / math.sqrt(2.0)
+
+
+def role_operator_indices(role):
+    return list(prob.role_operator_indices(role))
+
+
+def city_value(state, role=None):
+    '''Heuristic value in [0, 1]: 1.0 for a won city, otherwise partial credit for progress
+    towards each goal condition (30% fewer homeless, support >= 50, legal pressure < 20).'''
+    if state.is_goal():
+        return 1.0
+    baseline = 10700
+    homeless = prob.clamp((baseline - state.homeless_population) / (0.3 * baseline), 0.0, 1.0)
+    support = prob.clamp((state.public_support - 35.0) / 15.0, 0.0, 1.0)
+    legal = prob.clamp((40.0 - state.legal_pressure) / 20.0, 0.0, 1.0)
+    return 0.9 * (0.5 * homeless + 0.25 * support + 0.25 * legal)
+
+
+class DecisionNode:
+    __slots__ = ('visits', 'children', 'untried')
+
+    def __init__(self):
+        self.visits = 0
+        self.children = {}    # op index -> ChanceNode
+        self.untried = None   # op indices not yet expanded (filled on first visit)
+
+
+class ChanceNode:
+    __slots__ = ('visits', 'value', 'outcomes')
+
+    def __init__(self):
+        self.visits = 0
+        self.value = 0.0
+        self.outcomes = {}    # success flag -> DecisionNode
+
+
+class MCTSPlanner:
+    def __init__(self, time_budget=DEFAULT_TIME_BUDGET, rollout_depth=DEFAULT_ROLLOUT_DEPTH,
+                 exploration=DEFAULT_EXPLORATION, value_fn=city_value, seed=None, max_simulations=None):
+        self.time_budget = time_budget
+        self.rollout_depth = rollout_depth
+        self.exploration = exploration
+        self.value_fn = value_fn
+        self.max_simulations = max_simulations
+        self.rng = random.Random(seed)
+        self.root = None
+        self.role_ops = {role: role_operator_indices(role) for role in prob.PLAYABLE_ROLES}
+        self.total_simulations = 0
+        self.total_time = 0.0
+        self.last_search = None
+
+    @property
+    def sims_per_second(self):
+        return self.total_simulations / self.total_time if self.total_time > 0 else 0.0
+
+    def reset(self):
+        self.root = None
+
+    def observe(self, op_index, success):
+        '''Advance the root along a move actually played (by this or any other role).'''
+        if self.root is None:
+            return
+        chance = self.root.children.get(op_index)
+        self.root = chance.outcomes.get(bool(success)) if chance is not None else None
+
+    def choose(self, state, role=None):
+        '''Search from state and return the index (into OPERATORS) of the best operator.'''
+        if role is None:
+            role = state.turn
+        if role != state.turn:
+            raise ValueError(f"it is {prob.int_to_name(state.turn)}'s turn, not {prob.int_to_name(role)}'s")
+        if self.root is None:
+            self.root = DecisionNode()
+        root = self.root
+        reused = root.visits
+        start = time.perf_counter()
+        deadline = start + self.time_budget
+        sims = 0
+        while True:
+            self._simulate(state, role)
+            sims += 1
+            if self.max_simulations is not None and sims >= self.max_simulations:
+                break
+            if time.perf_counter() >= deadline:
+                break
+        elapsed = time.perf_counter() - start
+        self.total_simulations += sims
+        self.total_time += elapsed
+        if root.children:
+            best = max(root.children.items(), key=lambda kv: kv[1].visits)[0]
+        else:
+            # state is already won: nothing to search, any legal move will do
+            best = self.role_ops[role][0]
+        self.last_search = {
+            'role': role,
+            'simulations': sims,
+            'reused_visits': reused,
+            'elapsed_s': elapsed,
+            'sims_per_second': sims / elapsed if elapsed > 0 else 0.0,
+            'visits': {i: c.visits for i, c in root.children.items()},
+            'values': {i: c.value / c.visits for i, c in root.children.items() if c.visits},
+        }
+        return best
+
+    # ---------- one iteration ----------
+
+    def _simulate(self, root_state, role):
+        s = prob.State(root_state)
+        s.rng = self.rng
+        s.lazy_text = True
+        s.detach_history()
+        node = self.root
+        path = []
+        while not s.is_goal():
+            node.visits += 1
+            if node.untried is None:
+                node.untried = list(self.role_ops[s.turn])
+                self.rng.shuffle(node.untried)
+            if node.untried:
+                op_index = node.untried.pop()
+                chance = node.children[op_index] = ChanceNode()
+            else:
+                op_index, chance = self._select(node)
+            s = prob.OPERATORS[op_index].state_transf(s)
+            path.append(chance)
+            success = s.last_outcome[0]
+            child = chance.outcomes.get(success)
+            if child is None:
+                chance.outcomes[success] = DecisionNode()
+                break
+            node = child
+        value = self._rollout(s, role)
+        for chance in path:
+            chance.visits += 1
+            chance.value += value
+
+    def _select(self, node):
+        log_n = math.log(node.visits)
+        c = self.exploration
+        best, best_score = None, -1.0
+        for item in node.children.items():
+            chance = item[1]
+            score = chance.value / chance.visits + c * math.sqrt(log_n / chance.visits)
+            if score > best_score:
+                best, best_score = item, score
+        return best
+
+    def _rollout(self, s, role):
+        rng = self.rng
+        for _ in range(self.rollout_depth):
+            if s.is_goal():
+                break
+            ops = self.role_ops[s.turn]
+            s = prob.OPERATORS[ops[int(rng.random() * len(ops))]].state_transf(s)
+        return self.value_fn(s, role)
+
+
+class MCTSPolicy:
+    '''Adapter for CityWithoutWalls_BATCH: policy(state, ops, rng) -> operator.
+    The batch runner calls reset() at the start of each game and observe() after every
+    move, which keeps the planner's subtree in sync with the game.'''
+
+    def __init__(self, time_budget=DEFAULT_TIME_BUDGET, **planner_kwargs):
+        self.time_budget = time_budget
+        self.planner_kwargs = planner_kwargs
+        self.planner = None
+
+    def reset(self):
+        if self.planner is not None:
+            self.planner.reset()
+
+    def observe(self, op_index, success):
+        if self.planner is not None:
+            self.planner.observe(op_index, success)
+
+    def __call__(self, state, ops, rng):
+        if self.planner is None:
+            self.planner = MCTSPlanner(self.time_budget, seed=rng.getrandbits(64), **self.planner_kwargs)
+        return prob.OPERATORS[self.planner.choose(state)]
+
+    def __getstate__(self):
+        # ship only the configuration to worker processes; trees are rebuilt there
+        return {'time_budget': self.time_budget, 'planner_kwargs': self.planner_kwargs, 'planner': None}
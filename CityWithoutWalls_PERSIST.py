@@ -0,0 +1,303 @@
+'''CityWithoutWalls_PERSIST.py
+
+Persistent, delta-encoded storage for search-tree states. A State costs a full object:
+the slots, the STATE_FIELDS buffer and its values. Here a tree node is just a row in a few
+flat arrays (the same layout idea as HistoryStore), and a child stores only the fields
+its move touched. Everything else is read from its ancestors. Per node:
+ - the parent's id, a 64-bit mask (which fields changed; which of them are ints), an
+   offset into the value array, the tick count and the newest trend entry,
+ - a reference to the pipeline's job tuple, shared with the parent when unchanged,
+ - 8 bytes per changed field.
+That is 33 bytes plus the changed values. In a random search tree a node changes about
+7 fields and keyframes add one more on average, so a node costs about 100 bytes in all,
+against about 440 for a State copy.
+
+Compaction: a node more than compact_depth moves below the nearest full snapshot stores
+all fields again (a keyframe). Reads therefore walk at most compact_depth parents.
+The last cache_size resolved nodes are also kept as full field lists (a fixed cost, not
+a per-node one), so a search expanding along a path applies one delta per read.
+retain() rebuilds the store around the nodes that are still in use, e.g. after the
+search root has advanced.
+
+    store = StateStore()
+    root = store.add(state)                   # keyframe
+    child, s = store.expand(root, op)         # play op on the stored state, keep the delta
+    store.get(child, 'homeless_population')   # one field, without building a State
+    store.view(child).is_goal()               # read-only attribute view
+    s = store.state(child)                    # full State again (lazy_text, trend window)
+
+Materialized states carry the numeric fields, the pipeline, the tick count and the trend
+window. They do not carry the full metric history or last_action/last_outcome. Those
+belong to the edge that produced the node, not to the position. Unless an rng is passed,
+each gets a random stream of its own, derived from the store's seed and the node (state)
+or the new child (expand), so working on the tree never advances a live game's stream.
+'''
+
+import array, random
+
+import CityWithoutWalls as prob
+
+COMPACT_DEPTH = 16   # moves between keyframes (bounds the parent walk of a read)
+CACHE_SIZE = 1024    # recently resolved nodes kept as full field lists
+
+if len(prob.STATE_FIELDS) > 32:
+    raise ValueError("StateStore packs changed/int flags for at most 32 STATE_FIELDS")
+
+_INT_SHIFT = 32
+
+
+class StateStore:
+    def __init__(self, compact_depth=COMPACT_DEPTH, cache_size=CACHE_SIZE, seed=None):
+        if not 1 <= compact_depth <= 255:
+            raise ValueError("compact_depth must be in 1..255")
+        self.compact_depth = compact_depth
+        self.cache_size = cache_size
+        self.seed = seed                  # root of the per-node random streams
+        self.width = len(prob.STATE_FIELDS)
+        self.parents = array.array('i')   # parent id per node (-1 for a root)
+        self.masks = array.array('Q')     # low bits: fields stored here; high bits: stored as int
+        self.offsets = array.array('I')   # start of the node's values in self.data
+        self.chain = array.array('B')     # moves since the nearest keyframe
+        self.ticks = array.array('I')     # State.ticks
+        self.trend = array.array('i')     # newest trend_history entry
+        self.jobs = []                    # pipeline job tuple (shared while unchanged)
+        self.data = array.array('d')      # changed field values, in field order
+        self.template = None              # State the materialized states are copied from
+        self._root_trends = {}            # root id -> trend_history window
+        self._layouts = {}                # mask -> (fields, int positions), see _layout
+        self._cache = {}                  # node -> resolved field list (insertion ordered)
+
+    def __len__(self):
+        return len(self.parents)
+
+    # ---------- adding nodes ----------
+
+    def add(self, state, parent=-1, parent_values=None):
+        '''Store state as a child of node parent (-1: a new root) and return its id.
+        parent_values (the parent's resolved field list) saves a lookup when known.'''
+        v = state._v
+        if parent < 0:
+            keyframe, pv, pjobs = True, None, None
+            chain = 0
+        else:
+            chain = self.chain[parent] + 1
+            keyframe = chain > self.compact_depth
+            pv = parent_values if parent_values is not None else self.values(parent)
+            pjobs = self.jobs[parent]
+        if keyframe:
+            chain = 0
+        m = 0
+        changed = []
+        for i, a in enumerate(v):
+            if keyframe or a != pv[i] or a.__class__ is not pv[i].__class__:
+                m |= 1 << i
+                if a.__class__ is int:
+                    m |= 1 << (i + _INT_SHIFT)
+                changed.append(a)
+        jobs = state._jobs
+        if jobs is not pjobs:
+            jobs = tuple(jobs)
+            if jobs == pjobs:
+                jobs = pjobs
+        node = len(self.parents)
+        self.parents.append(parent)
+        self.masks.append(m)
+        self.offsets.append(len(self.data))
+        self.chain.append(chain)
+        self.ticks.append(state.ticks)
+        self.trend.append(int(state._history.data[state._hist_row * state._history.width + prob._HOMELESS]))
+        self.jobs.append(jobs)
+        self.data.extend(changed)
+        if parent < 0:
+            self._root_trends[node] = state.trend_history
+            if self.template is None:
+                t = self.template = prob.State(state)
+                t.lazy_text = True
+                t.rng = None
+                t.last_outcome = None
+                t.last_action = ""
+                t.last_action_url = ""
+                t.detach_history(keep=1)
+        return node
+
+    def expand(self, node, op, rng=None):
+        '''Play op on the state stored at node and store the result as its child.
+        Returns (child id, child State); the State can be dropped once read. Without rng the
+        move draws from a stream of its own (derived from the seed and the new child's id),
+        so repeated expansions of the same move sample different outcomes.'''
+        if rng is None:
+            rng = random.Random(prob.derive_seed(self.seed, 'expand', len(self.parents)))
+        s = self.state(node, rng)
+        news = op.state_transf(s)
+        child = self.add(news, node, s._v)
+        self._remember(child, news._v[:])
+        return child, news
+
+    # ---------- reading ----------
+
+    def _layout(self, m):
+        # (fields stored under mask m, in data order; positions among them stored as int)
+        layout = self._layouts.get(m)
+        if layout is None:
+            fields = tuple(i for i in range(self.width) if m >> i & 1)
+            ints = tuple(k for k, i in enumerate(fields) if m >> (i + _INT_SHIFT) & 1)
+            layout = self._layouts[m] = (fields, ints)
+        return layout
+
+    def _decode(self, node):
+        fields, ints = self._layout(self.masks[node])
+        base = self.offsets[node]
+        xs = self.data[base:base + len(fields)].tolist()
+        for k in ints:
+            xs[k] = int(xs[k])
+        return fields, xs
+
+    def get(self, node, name):
+        '''Value of one field at node.'''
+        i = prob.FIELD_INDEX[name]
+        masks = self.masks
+        parents = self.parents
+        while not masks[node] >> i & 1:
+            node = parents[node]
+        fields, ints = self._layout(masks[node])
+        k = fields.index(i)
+        x = self.data[self.offsets[node] + k]
+        return int(x) if k in ints else x
+
+    def values(self, node):
+        '''All STATE_FIELDS at node, as a list in State._v order: the nearest keyframe
+        with the deltas below it applied.'''
+        cache = self._cache
+        out = cache.get(node)
+        if out is not None:
+            return out[:]
+        top = node
+        path = []
+        chain = self.chain
+        parents = self.parents
+        while chain[node] and node not in cache:
+            path.append(node)
+            node = parents[node]
+        out = cache[node][:] if node in cache else self._decode(node)[1]
+        for node in reversed(path):
+            fields, xs = self._decode(node)
+            for i, x in zip(fields, xs):
+                out[i] = x
+        self._remember(top, out)
+        return out[:]
+
+    def _remember(self, node, values):
+        cache = self._cache
+        if self.cache_size <= 0:
+            return
+        if len(cache) >= self.cache_size:
+            del cache[next(iter(cache))]
+        cache[node] = values
+
+    def trend_window(self, node):
+        '''trend_history of the state stored at node.'''
+        out = []
+        parents = self.parents
+        n = prob.TREND_LENGTH
+        while len(out) < n:
+            if parents[node] < 0:
+                window = self._root_trends[node]
+                out.extend(reversed(window[len(window) - (n - len(out)):]))
+                break
+            out.append(self.trend[node])
+            node = parents[node]
+        out.reverse()
+        return out
+
+    def state(self, node, rng=None):
+        '''Rebuild the full State at node (lazy_text; the pipeline is copied on first change).
+        rng defaults to a fresh stream seeded with derive_seed(seed, node).'''
+        s = prob.State(self.template)
+        s._v = self.values(node)
+        s.ticks = self.ticks[node]
+        s._jobs = self.jobs[node]
+        s._jobs_owned = False
+        s.trend_history = self.trend_window(node)
+        s.rng = rng if rng is not None else random.Random(prob.derive_seed(self.seed, node))
+        return s
+
+    def view(self, node):
+        return StateView(self, node)
+
+    def path(self, node):
+        '''Node ids from the root down to node.'''
+        out = []
+        while node >= 0:
+            out.append(node)
+            node = self.parents[node]
+        out.reverse()
+        return out
+
+    # ---------- memory ----------
+
+    def nbytes(self):
+        '''Bytes held by the node arrays and values (shared job tuples not included).'''
+        arrays = (self.parents, self.masks, self.offsets, self.chain, self.ticks, self.trend, self.data)
+        return sum(a.itemsize * len(a) for a in arrays) + 8 * len(self.jobs)
+
+    def bytes_per_node(self):
+        return self.nbytes() / len(self) if len(self) else 0.0
+
+    def retain(self, nodes):
+        '''New store holding only nodes and their ancestors; returns (store, {old id: new id}).
+        Use it to drop subtrees the search no longer needs.'''
+        keep = set()
+        for node in nodes:
+            while node >= 0 and node not in keep:
+                keep.add(node)
+                node = self.parents[node]
+        new = StateStore(self.compact_depth, self.cache_size, self.seed)
+        new.template = self.template
+        new._layouts = self._layouts
+        remap = {}
+        for node in sorted(keep):   # parents always have smaller ids than their children
+            parent = self.parents[node]
+            m = self.masks[node]
+            start = self.offsets[node]
+            remap[node] = len(new.parents)
+            new.parents.append(remap[parent] if parent >= 0 else -1)
+            new.masks.append(m)
+            new.offsets.append(len(new.data))
+            new.chain.append(self.chain[node])
+            new.ticks.append(self.ticks[node])
+            new.trend.append(self.trend[node])
+            new.jobs.append(self.jobs[node])
+            new.data.extend(self.data[start:start + len(self._layout(m)[0])])
+            if parent < 0:
+                new._root_trends[remap[node]] = self._root_trends[node]
+        return new, remap
+
+
+class StateView:
+    '''Read-only attribute access to a stored node (state.field, is_goal()) without
+    materializing it; enough for value functions such as MCTS.city_value.'''
+    __slots__ = ('store', 'node')
+
+    def __init__(self, store, node):
+        self.store = store
+        self.node = node
+
+    @property
+    def trend_history(self):
+        return self.store.trend_window(self.node)
+
+    @property
+    def construction_pipeline(self):
+        ticks = self.store.ticks[self.node]
+        return [(t, units, due - ticks) for (due, seq, t, units) in sorted(self.store.jobs[self.node], key=prob._job_seq)]
+
+    is_goal = prob.State.is_goal
+
+
+def _view_field(name):
+    return property(lambda self: self.store.get(self.node, name))
+
+
+for _name in prob.STATE_FIELDS:
+    setattr(StateView, _name, _view_field(_name))
+del _name
@@ -0,0 +1,309 @@
+'''CityWithoutWalls_SERVER.py
+
+asyncio session manager that hosts many independent games in one process (e.g. a
+classroom with dozens of tables), as an alternative to the module-level SESSION of the
+single-game front end.
+ - Every GameSession owns its state chain, its random stream (create_initial_state(seed)),
+   its transition buffer (banners from transition_text; states run in lazy_text mode) and
+   a binary game log (CityWithoutWalls_LOG) for replay.
+ - Players join a session for a role; submit() checks the player holds the acting role and
+   applies the move under the session's lock only, so other sessions are never blocked.
+ - Roles can be played by bots: policy(state, ops, rng) -> operator, as in the batch runner.
+   Bot moves and SVG renders are CPU heavy and run in an executor (a process pool by
+   default), so policies must be picklable module-level callables or objects.
+ - A bot move that raises is logged and fails its session: waiting clients wake up, the
+   snapshot carries the 'error' and further moves are rejected.
+ - LocalClient drives a session in-process and can stand in for the web front end in tests.
+
+    async def main():
+        async with SessionManager() as manager:
+            session = await manager.create(seed=1, bots={prob.BUSINESS: BATCH.random_policy})
+            client = LocalClient(manager, session.id, 'alice')
+            await client.join(prob.NEIGHBORHOODS)
+            await client.play(client.legal_moves()[0])
+'''
+
+import asyncio, itertools, logging, random
+from concurrent.futures import ProcessPoolExecutor
+
+import CityWithoutWalls as prob
+import CityWithoutWalls_LOG
+
+DEFAULT_MAX_ROUNDS = 50
+
+logger = logging.getLogger(__name__)
+
+
+class SessionError(ValueError):
+    '''A request a session cannot accept (unknown session, wrong turn, illegal move, game over).'''
+
+
+# ---------------- Executor jobs ----------------
+# Module-level so they can run in worker processes.
+
+def _bot_move(policy, state, seed):
+    import CityWithoutWalls_BATCH
+    op = policy(state, prob.applicable_operators(state), random.Random(seed))
+    return CityWithoutWalls_BATCH.op_index(op)
+
+
+def _render(state):
+    import CityWithoutWalls_SVG_VIS_FOR_BRIFL as vis
+    return vis.render_state_fast(state)
+
+
+def _offload_copy(state, seed=None):
+    # what a worker needs: the state with only its recent history rows, and a random stream
+    # of its own (a thread executor would otherwise advance the live game's stream)
+    s = prob.State(state)
+    s.detach_history()
+    s.rng = random.Random(seed)
+    return s
+
+
+# ---------------- Sessions ----------------
+
+class GameSession:
+    def __init__(self, session_id, seed, bots=None, max_rounds=DEFAULT_MAX_ROUNDS):
+        self.id = session_id
+        self.log = CityWithoutWalls_LOG.GameLog.start(seed)
+        self.seed = self.log.seed
+        self.state = self.log.initial_state(lazy_text=True)
+        self.states = [self.state]         # state chain, one entry per move
+        self.transitions = []              # (move number, [banner, ...])
+        self.players = {}                  # role -> player id
+        self.bots = dict(bots or {})       # role -> policy
+        self.bot_rng = random.Random(prob.derive_seed(self.seed, 'bots'))
+        self.max_rounds = max_rounds
+        self.lock = asyncio.Lock()
+        self.changed = asyncio.Condition(self.lock)
+        self.bot_task = None
+        self.error = None                  # why the session stopped (a bot move failed)
+        self._render = (None, None)        # (move, svg)
+
+    @property
+    def moves(self):
+        return len(self.states) - 1
+
+    @property
+    def won(self):
+        return self.state.is_goal()
+
+    @property
+    def finished(self):
+        return self.error is not None or self.won or self.state.round >= self.max_rounds
+
+    def apply(self, op_index):
+        # caller holds self.lock
+        s = prob.OPERATORS[op_index].state_transf(self.state)
+        self.log.record(op_index, s)
+        self.states.append(s)
+        self.state = s
+        self.transitions.append((self.moves, prob.transition_text(s)))
+
+    def snapshot(self, since=0):
+        '''JSON-friendly view of the session; transitions are those after move `since`.'''
+        s = self.state
+        return {
+            'session': self.id,
+            'seed': self.seed,
+            'move': self.moves,
+            'round': s.round,
+            'turn': s.turn,
+            'role': prob.int_to_name(s.turn),
+            'finished': self.finished,
+            'won': self.won,
+            'error': self.error,
+            'state': str(s),
+            'last_action': s.last_action,
+            'legal_moves': [] if self.finished else list(prob.role_operator_indices(s.turn)),
+            'transitions': [t for t in self.transitions if t[0] > since],
+        }
+
+
+class SessionManager:
+    def __init__(self, executor=None, max_workers=None, max_rounds=DEFAULT_MAX_ROUNDS):
+        self.sessions = {}
+        self.max_rounds = max_rounds
+        self._executor = executor
+        self._own_executor = executor is None
+        self._max_workers = max_workers
+        self._ids = itertools.count(1)
+
+    @property
+    def executor(self):
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self._max_workers)
+        return self._executor
+
+    async def _offload(self, fn, *args):
+        return await asyncio.get_running_loop().run_in_executor(self.executor, fn, *args)
+
+    # ---------- lifecycle ----------
+
+    async def create(self, seed=None, bots=None, session_id=None):
+        session_id = session_id or f"game-{next(self._ids)}"
+        if session_id in self.sessions:
+            raise SessionError(f"session {session_id!r} already exists")
+        session = GameSession(session_id, seed, bots, self.max_rounds)
+        self.sessions[session_id] = session
+        self._schedule_bots(session)
+        return session
+
+    def get(self, session_id):
+        session = self.sessions.get(session_id)
+        if session is None:
+            raise SessionError(f"no session {session_id!r}")
+        return session
+
+    async def close(self, session_id):
+        session = self.sessions.pop(session_id, None)
+        if session is not None and session.bot_task is not None:
+            session.bot_task.cancel()
+        return session
+
+    async def shutdown(self):
+        for session_id in list(self.sessions):
+            await self.close(session_id)
+        if self._own_executor and self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.shutdown()
+        return False
+
+    # ---------- players ----------
+
+    async def join(self, session_id, player, role):
+        session = self.get(session_id)
+        if role not in prob.PLAYABLE_ROLES:
+            raise SessionError(f"{prob.int_to_name(role)} is not a playable role")
+        async with session.lock:
+            holder = session.players.get(role)
+            if role in session.bots or (holder is not None and holder != player):
+                raise SessionError(f"{prob.int_to_name(role)} is already taken")
+            session.players[role] = player
+        return session.snapshot()
+
+    async def submit(self, session_id, player, op_index, expected_move=None):
+        '''Play op_index for player. expected_move (the move number the client saw) guards
+        against acting on a stale view. Returns the new snapshot.'''
+        session = self.get(session_id)
+        async with session.lock:
+            if session.error is not None:
+                raise SessionError(f"the session failed: {session.error}")
+            if session.finished:
+                raise SessionError("the game is over")
+            if expected_move is not None and expected_move != session.moves:
+                raise SessionError(f"stale move {expected_move}; the game is at move {session.moves}")
+            role = session.state.turn
+            if session.players.get(role) != player:
+                raise SessionError(f"it is {prob.int_to_name(role)}'s turn")
+            if op_index not in prob.role_operator_indices(role):
+                raise SessionError(f"operator {op_index} is not available to {prob.int_to_name(role)}")
+            session.apply(op_index)
+            session.changed.notify_all()
+            snapshot = session.snapshot(session.moves - 1)
+        self._schedule_bots(session)
+        return snapshot
+
+    async def wait_for_move(self, session_id, after_move, timeout=None):
+        '''Wait until the session has more than after_move moves (or is finished).'''
+        session = self.get(session_id)
+        async with session.lock:
+            await asyncio.wait_for(
+                session.changed.wait_for(lambda: session.moves > after_move or session.finished), timeout)
+            return session.snapshot(after_move)
+
+    # ---------- bots and renders ----------
+
+    def _schedule_bots(self, session):
+        if session.bot_task is None or session.bot_task.done():
+            if session.state.turn in session.bots and not session.finished:
+                session.bot_task = asyncio.get_running_loop().create_task(self._run_bots(session))
+
+    async def _run_bots(self, session):
+        while not session.finished and session.state.turn in session.bots:
+            move = session.moves
+            policy = session.bots[session.state.turn]
+            state = _offload_copy(session.state, session.bot_rng.getrandbits(64))
+            try:
+                op_index = await self._offload(_bot_move, policy, state, session.bot_rng.getrandbits(64))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # without this the task dies silently and clients wait for a move forever
+                logger.exception("bot for %s failed in session %s", prob.int_to_name(session.state.turn), session.id)
+                async with session.lock:
+                    session.error = f"{prob.int_to_name(session.state.turn)} bot failed: {e!r}"
+                    session.changed.notify_all()
+                return
+            async with session.lock:
+                if session.moves != move:
+                    continue
+                session.apply(op_index)
+                session.changed.notify_all()
+
+    async def render(self, session_id):
+        '''SVG of the session's current state, rendered in the executor (cached per move).'''
+        session = self.get(session_id)
+        move, svg = session._render
+        if move == session.moves:
+            return svg
+        move = session.moves
+        svg = await self._offload(_render, _offload_copy(session.state))
+        session._render = (move, svg)
+        return svg
+
+
+# ---------------- In-process client ----------------
+
+class LocalClient:
+    '''Plays one seat of a session through the manager, like the web front end would.'''
+
+    def __init__(self, manager, session_id, player):
+        self.manager = manager
+        self.session_id = session_id
+        self.player = player
+        self.role = None
+        self.seen = 0
+
+    @property
+    def session(self):
+        return self.manager.get(self.session_id)
+
+    async def join(self, role):
+        snapshot = await self.manager.join(self.session_id, self.player, role)
+        self.role = role
+        return snapshot
+
+    def snapshot(self):
+        return self.session.snapshot(self.seen)
+
+    def my_turn(self):
+        session = self.session
+        return not session.finished and session.state.turn == self.role
+
+    def legal_moves(self):
+        return list(prob.role_operator_indices(self.role))
+
+    async def wait_turn(self, timeout=None):
+        '''Wait until it is this client's turn or the game is over; returns the snapshot.'''
+        while True:
+            if self.my_turn() or self.session.finished:
+                snapshot = self.snapshot()
+                self.seen = snapshot['move']
+                return snapshot
+            await self.manager.wait_for_move(self.session_id, self.session.moves, timeout)
+
+    async def play(self, op_index):
+        snapshot = await self.manager.submit(self.session_id, self.player, op_index, self.session.moves)
+        self.seen = snapshot['move']
+        return snapshot
+
+    async def render(self):
+        return await self.manager.render(self.session_id)
@@ -1,176 +1,438 @@
-# CityWithoutWalls_SVG_VIS_FOR_BRIFL.py — FIXED
-# - Removed operator panel
-# - Expanded graphic width so right panel is not cut off
-
-import svgwrite
-import math
-import CityWithoutWalls as prob
-
-GRAPHIC_W = 1200   # ← widened from 1000
-GRAPHIC_H = 500    # ← reduced height since operators are removed
-PADDING = 18
-
-TITLE_FS = "20px"
-HEADER_FS = "14px"
-BODY_FS = "12px"
-SM_FS = "10px"
-
-def _bar(dwg, x, y, w, h, pct, fill="lightblue", back="#eee", stroke="black"):
-    dwg.add(dwg.rect((x, y), (w, h), fill=back, stroke=stroke, stroke_width=1))
-    fw = max(0, min(w, w * (pct/100.0)))
-    dwg.add(dwg.rect((x, y), (fw, h), fill=fill))
-
-def _small_gauge(dwg, cx, cy, r, pct, label):
-    dwg.add(dwg.circle(center=(cx, cy), r=r+6, fill="#fafafa", stroke="none"))
-    bar_w = 80
-    bar_h = 10
-    _bar(dwg, cx - bar_w/2, cy + r*0.6, bar_w, bar_h, pct, fill="#ffd366", back="#ddd")
-    dwg.add(dwg.text(f"{label}: {pct:.0f}%", insert=(cx, cy + r*0.6 + 28),
-                     text_anchor="middle", font_size=SM_FS))
-
-def _sparkline(dwg, x, y, w, h, data, stroke="#0b3b4a"):
-    if not data:
-        return
-    mn = min(data)
-    mx = max(data)
-    rng = mx - mn if mx != mn else 1
-    pts = []
-    for i, v in enumerate(data):
-        vx = x + (i/(len(data)-1)) * w if len(data) > 1 else x
-        vy = y + h - ((v - mn)/rng) * h
-        pts.append((vx, vy))
-    dwg.add(dwg.polyline(points=pts, fill="none", stroke=stroke, stroke_width=1.5))
-
-def render_state(s, roles=None):
-    dwg = svgwrite.Drawing(size=(f"{GRAPHIC_W}px", f"{GRAPHIC_H}px"), debug=False)
-    dwg.add(dwg.rect((0,0), (GRAPHIC_W, GRAPHIC_H), fill="#f6f8fb"))
-
-    # Title
-    dwg.add(dwg.text("CityWithoutWalls — Current State Dashboard",
-                     insert=(GRAPHIC_W/2, 28),
-                     text_anchor="middle", font_size=TITLE_FS, fill="#123040"))
-
-    # Updated column layout — wider per panel
-    PANEL_W = 370
-    left_col_x = PADDING
-    mid_col_x = left_col_x + PANEL_W + PADDING
-    right_col_x = mid_col_x + PANEL_W + PADDING
-
-    # --------------- LEFT PANEL ----------------
-    panel_y = 60
-    panel_h = 300
-
-    dwg.add(dwg.rect((left_col_x, panel_y), (PANEL_W, panel_h),
-                     fill="#ffffff", rx=8, ry=8, stroke="#d6e0ea"))
-
-    dwg.add(dwg.text("Role & Turn", insert=(left_col_x + 12, panel_y + 22),
-                     font_size=HEADER_FS, fill="#0b3b4a"))
-
-    dwg.add(dwg.rect((left_col_x + 12, panel_y + 34), (PANEL_W - 24, 44),
-                     fill="#e9f6ff", stroke="#9fcbe6"))
-
-    dwg.add(dwg.text(f"Current: {prob.int_to_name(s.turn)}",
-                     insert=(left_col_x + PANEL_W/2, panel_y + 62),
-                     text_anchor="middle", font_size="18px"))
-
-    dwg.add(dwg.text("Last action:", insert=(left_col_x + 12, panel_y + 90),
-                     font_size=SM_FS))
-
-    action_text = s.last_action if s.last_action else "No recent action"
-    ay = panel_y + 108
-    for ln in str(action_text).split("\n")[:6]:
-        dwg.add(dwg.text(ln[:72], insert=(left_col_x + 12, ay),
-                         font_size=SM_FS))
-        ay += 14
-
-    km_y = panel_y + 140
-    spacing = 18
-    dwg.add(dwg.text(f"Round: {s.round}", insert=(left_col_x + 12, km_y), font_size=SM_FS))
-    dwg.add(dwg.text(f"Shelter cap: {s.shelter_capacity}", insert=(left_col_x + 12, km_y + spacing), font_size=SM_FS))
-    dwg.add(dwg.text(f"Transitional: {s.transitional_units}", insert=(left_col_x + 12, km_y + 2*spacing), font_size=SM_FS))
-    dwg.add(dwg.text(f"Permanent units: {s.permanent_units}", insert=(left_col_x + 12, km_y + 3*spacing), font_size=SM_FS))
-
-    dwg.add(dwg.text(f"Debt (k$): {s.debt:.0f}", insert=(left_col_x + 12, panel_y + panel_h - 60), font_size=SM_FS))
-    dwg.add(dwg.text(f"Policy momentum: {s.policy_momentum:.1f}", insert=(left_col_x + 12, panel_y + panel_h - 42), font_size=SM_FS))
-
-    # --------------- MIDDLE PANEL ----------------
-    mp_y = 60
-    mp_h = 300
-
-    dwg.add(dwg.rect((mid_col_x, mp_y), (PANEL_W, mp_h),
-                     fill="#ffffff", rx=8, ry=8, stroke="#d6e0ea"))
-
-    dwg.add(dwg.text("Population Breakdown", insert=(mid_col_x + 12, mp_y + 22),
-                     font_size=HEADER_FS))
-
-    dwg.add(dwg.text(f"Total Homeless: {s.homeless_population}",
-                     insert=(mid_col_x + 12, mp_y + 38), font_size=BODY_FS, style="font-weight:bold"))
-
-    sub_x = mid_col_x + 16
-    max_bar_w = PANEL_W - 40
-    total = max(1, s.homeless_population)
-
-    def draw_sub(y_offset, label, value, color):
-        pct = (value / total) * 100.0
-        _bar(dwg, sub_x + 80, mp_y + y_offset - 10,
-             max_bar_w - 80, 16, pct, fill=color, back="#f0f6fb")
-        dwg.add(dwg.text(label, insert=(sub_x, mp_y + y_offset + 2), font_size=SM_FS))
-        dwg.add(dwg.text(f"{value}", insert=(sub_x + max_bar_w + 2, mp_y + y_offset + 2), font_size=SM_FS))
-
-    draw_sub(60, "Families", s.pop_families, "#7fb7ff")
-    draw_sub(100, "Youth", s.pop_youth, "#ffd366")
-    draw_sub(140, "Chronic", s.pop_chronic, "#ffa3a3")
-    draw_sub(180, "Veterans", s.pop_veterans, "#c1f0c1")
-
-    dwg.add(dwg.text("Population Trend (last 10 moves):", insert=(mid_col_x + 12, mp_y + 200), font_size=SM_FS))
-    _sparkline(dwg, mid_col_x + 20, mp_y + 208, PANEL_W - 40, 60,
-               getattr(s, "trend_history", []))
-
-    # --------------- RIGHT PANEL (NO MORE CUTOFF) ----------------
-    rp_y = 60
-    rp_h = 300
-
-    dwg.add(dwg.rect((right_col_x, rp_y), (PANEL_W, rp_h),
-                     fill="#ffffff", rx=8, ry=8, stroke="#d6e0ea"))
-
-    dwg.add(dwg.text("Capacity & Stakeholder Support", insert=(right_col_x + 12, rp_y + 22),
-                     font_size=HEADER_FS))
-
-    # capacity gauge
-    cap_x = right_col_x + 20
-    cap_y = rp_y + 44
-    total_units = max(1, s.shelter_capacity + s.transitional_units + s.permanent_units)
-    occ_pct = max(0.0, min(100.0, (s.homeless_population / total_units) * 100.0))
-    _small_gauge(dwg, cap_x + 60, cap_y + 40, 50, occ_pct, "Occupancy")
-
-    supports = [
-        ("Neighborhoods", getattr(s, "support_neighborhoods", getattr(s, "public_support", 0.0)), "#7fb7ff"),
-        ("Business", getattr(s, "support_business", getattr(s, "public_support", 0.0)), "#ffd366"),
-        ("Medical", getattr(s, "support_medical", getattr(s, "public_support", 0.0)), "#ffa3a3"),
-        ("Shelters", getattr(s, "support_shelters", getattr(s, "public_support", 0.0)), "#c1f0c1"),
-        ("University", getattr(s, "support_university", getattr(s, "public_support", 0.0)), "#d0b3ff")
-    ]
-
-    sb_x = cap_x + 140
-    sb_y = cap_y
-    for i, (label, val, color) in enumerate(supports):
-        yoff = sb_y + i*34
-        dwg.add(dwg.text(label, insert=(sb_x, yoff), font_size=SM_FS))
-        _bar(dwg, sb_x + 80, yoff - 12, 160, 12, float(val), fill=color, back="#f4f6f9")
-
-    dwg.add(dwg.text("Public support", insert=(right_col_x + 16, rp_y + rp_h - 80),
-                     font_size=SM_FS))
-    _bar(dwg, right_col_x + 16, rp_y + rp_h - 68,
-         PANEL_W - 32, 18, getattr(s, "public_support", 0.0),
-         fill="#9fd3c7", back="#eaf6f2")
-    dwg.add(dwg.text(f"{getattr(s,'public_support',0.0):.1f}%",
-                     insert=(right_col_x + PANEL_W/2, rp_y + rp_h - 48),
-                     text_anchor="middle", font_size=SM_FS))
-
-    dwg.add(dwg.text(f"Economy index: {getattr(s,'economy_index',0.0):.1f}",
-                     insert=(right_col_x + 16, rp_y + rp_h - 28), font_size=SM_FS))
-    dwg.add(dwg.text(f"Legal pressure: {getattr(s,'legal_pressure',0.0):.1f}",
-                     insert=(right_col_x + PANEL_W/2 + 10, rp_y + rp_h - 28),
-                     font_size=SM_FS))
-
-    return dwg.tostring()
+# CityWithoutWalls_SVG_VIS_FOR_BRIFL.py — FIXED
+# - Removed operator panel
+# - Expanded graphic width so right panel is not cut off
+# - Added render_state_fast: same SVG from a precomputed string template
+# - Added RenderCache / render_state_cached: LRU cache keyed by the fields drawn
+# - svgwrite is imported by render_state on first use (the template renderer never needs it)
+
+from collections import OrderedDict
+import CityWithoutWalls as prob
+
+GRAPHIC_W = 1200   # ← widened from 1000
+GRAPHIC_H = 500    # ← reduced height since operators are removed
+PADDING = 18
+
+TITLE_FS = "20px"
+HEADER_FS = "14px"
+BODY_FS = "12px"
+SM_FS = "10px"
+
+def _bar(dwg, x, y, w, h, pct, fill="lightblue", back="#eee", stroke="black"):
+    dwg.add(dwg.rect((x, y), (w, h), fill=back, stroke=stroke, stroke_width=1))
+    fw = max(0, min(w, w * (pct/100.0)))
+    dwg.add(dwg.rect((x, y), (fw, h), fill=fill))
+
+def _small_gauge(dwg, cx, cy, r, pct, label):
+    dwg.add(dwg.circle(center=(cx, cy), r=r+6, fill="#fafafa", stroke="none"))
+    bar_w = 80
+    bar_h = 10
+    _bar(dwg, cx - bar_w/2, cy + r*0.6, bar_w, bar_h, pct, fill="#ffd366", back="#ddd")
+    dwg.add(dwg.text(f"{label}: {pct:.0f}%", insert=(cx, cy + r*0.6 + 28),
+                     text_anchor="middle", font_size=SM_FS))
+
+def _sparkline(dwg, x, y, w, h, data, stroke="#0b3b4a"):
+    if not data:
+        return
+    mn = min(data)
+    mx = max(data)
+    rng = mx - mn if mx != mn else 1
+    pts = []
+    for i, v in enumerate(data):
+        vx = x + (i/(len(data)-1)) * w if len(data) > 1 else x
+        vy = y + h - ((v - mn)/rng) * h
+        pts.append((vx, vy))
+    dwg.add(dwg.polyline(points=pts, fill="none", stroke=stroke, stroke_width=1.5))
+
+def render_state(s, roles=None):
+    import svgwrite   # only the DOM renderer needs it; render_state_fast does not
+    dwg = svgwrite.Drawing(size=(f"{GRAPHIC_W}px", f"{GRAPHIC_H}px"), debug=False)
+    dwg.add(dwg.rect((0,0), (GRAPHIC_W, GRAPHIC_H), fill="#f6f8fb"))
+
+    # Title
+    dwg.add(dwg.text("CityWithoutWalls — Current State Dashboard",
+                     insert=(GRAPHIC_W/2, 28),
+                     text_anchor="middle", font_size=TITLE_FS, fill="#123040"))
+
+    # Updated column layout — wider per panel
+    PANEL_W = 370
+    left_col_x = PADDING
+    mid_col_x = left_col_x + PANEL_W + PADDING
+    right_col_x = mid_col_x + PANEL_W + PADDING
+
+    # --------------- LEFT PANEL ----------------
+    panel_y = 60
+    panel_h = 300
+
+    dwg.add(dwg.rect((left_col_x, panel_y), (PANEL_W, panel_h),
+                     fill="#ffffff", rx=8, ry=8, stroke="#d6e0ea"))
+
+    dwg.add(dwg.text("Role & Turn", insert=(left_col_x + 12, panel_y + 22),
+                     font_size=HEADER_FS, fill="#0b3b4a"))
+
+    dwg.add(dwg.rect((left_col_x + 12, panel_y + 34), (PANEL_W - 24, 44),
+                     fill="#e9f6ff", stroke="#9fcbe6"))
+
+    dwg.add(dwg.text(f"Current: {prob.int_to_name(s.turn)}",
+                     insert=(left_col_x + PANEL_W/2, panel_y + 62),
+                     text_anchor="middle", font_size="18px"))
+
+    dwg.add(dwg.text("Last action:", insert=(left_col_x + 12, panel_y + 90),
+                     font_size=SM_FS))
+
+    action_text = s.last_action if s.last_action else "No recent action"
+    ay = panel_y + 108
+    for ln in str(action_text).split("\n")[:6]:
+        dwg.add(dwg.text(ln[:72], insert=(left_col_x + 12, ay),
+                         font_size=SM_FS))
+        ay += 14
+
+    km_y = panel_y + 140
+    spacing = 18
+    dwg.add(dwg.text(f"Round: {s.round}", insert=(left_col_x + 12, km_y), font_size=SM_FS))
+    dwg.add(dwg.text(f"Shelter cap: {s.shelter_capacity}", insert=(left_col_x + 12, km_y + spacing), font_size=SM_FS))
+    dwg.add(dwg.text(f"Transitional: {s.transitional_units}", insert=(left_col_x + 12, km_y + 2*spacing), font_size=SM_FS))
+    dwg.add(dwg.text(f"Permanent units: {s.permanent_units}", insert=(left_col_x + 12, km_y + 3*spacing), font_size=SM_FS))
+
+    dwg.add(dwg.text(f"Debt (k$): {s.debt:.0f}", insert=(left_col_x + 12, panel_y + panel_h - 60), font_size=SM_FS))
+    dwg.add(dwg.text(f"Policy momentum: {s.policy_momentum:.1f}", insert=(left_col_x + 12, panel_y + panel_h - 42), font_size=SM_FS))
+
+    # --------------- MIDDLE PANEL ----------------
+    mp_y = 60
+    mp_h = 300
+
+    dwg.add(dwg.rect((mid_col_x, mp_y), (PANEL_W, mp_h),
+                     fill="#ffffff", rx=8, ry=8, stroke="#d6e0ea"))
+
+    dwg.add(dwg.text("Population Breakdown", insert=(mid_col_x + 12, mp_y + 22),
+                     font_size=HEADER_FS))
+
+    dwg.add(dwg.text(f"Total Homeless: {s.homeless_population}",
+                     insert=(mid_col_x + 12, mp_y + 38), font_size=BODY_FS, style="font-weight:bold"))
+
+    sub_x = mid_col_x + 16
+    max_bar_w = PANEL_W - 40
+    total = max(1, s.homeless_population)
+
+    def draw_sub(y_offset, label, value, color):
+        pct = (value / total) * 100.0
+        _bar(dwg, sub_x + 80, mp_y + y_offset - 10,
+             max_bar_w - 80, 16, pct, fill=color, back="#f0f6fb")
+        dwg.add(dwg.text(label, insert=(sub_x, mp_y + y_offset + 2), font_size=SM_FS))
+        dwg.add(dwg.text(f"{value}", insert=(sub_x + max_bar_w + 2, mp_y + y_offset + 2), font_size=SM_FS))
+
+    draw_sub(60, "Families", s.pop_families, "#7fb7ff")
+    draw_sub(100, "Youth", s.pop_youth, "#ffd366")
+    draw_sub(140, "Chronic", s.pop_chronic, "#ffa3a3")
+    draw_sub(180, "Veterans", s.pop_veterans, "#c1f0c1")
+
+    dwg.add(dwg.text("Population Trend (last 10 moves):", insert=(mid_col_x + 12, mp_y + 200), font_size=SM_FS))
+    _sparkline(dwg, mid_col_x + 20, mp_y + 208, PANEL_W - 40, 60,
+               getattr(s, "trend_history", []))
+
+    # --------------- RIGHT PANEL (NO MORE CUTOFF) ----------------
+    rp_y = 60
+    rp_h = 300
+
+    dwg.add(dwg.rect((right_col_x, rp_y), (PANEL_W, rp_h),
+                     fill="#ffffff", rx=8, ry=8, stroke="#d6e0ea"))
+
+    dwg.add(dwg.text("Capacity & Stakeholder Support", insert=(right_col_x + 12, rp_y + 22),
+                     font_size=HEADER_FS))
+
+    # capacity gauge
+    cap_x = right_col_x + 20
+    cap_y = rp_y + 44
+    total_units = max(1, s.shelter_capacity + s.transitional_units + s.permanent_units)
+    occ_pct = max(0.0, min(100.0, (s.homeless_population / total_units) * 100.0))
+    _small_gauge(dwg, cap_x + 60, cap_y + 40, 50, occ_pct, "Occupancy")
+
+    supports = [
+        ("Neighborhoods", getattr(s, "support_neighborhoods", getattr(s, "public_support", 0.0)), "#7fb7ff"),
+        ("Business", getattr(s, "support_business", getattr(s, "public_support", 0.0)), "#ffd366"),
+        ("Medical", getattr(s, "support_medical", getattr(s, "public_support", 0.0)), "#ffa3a3"),
+        ("Shelters", getattr(s, "support_shelters", getattr(s, "public_support", 0.0)), "#c1f0c1"),
+        ("University", getattr(s, "support_university", getattr(s, "public_support", 0.0)), "#d0b3ff")
+    ]
+
+    sb_x = cap_x + 140
+    sb_y = cap_y
+    for i, (label, val, color) in enumerate(supports):
+        yoff = sb_y + i*34
+        dwg.add(dwg.text(label, insert=(sb_x, yoff), font_size=SM_FS))
+        _bar(dwg, sb_x + 80, yoff - 12, 160, 12, float(val), fill=color, back="#f4f6f9")
+
+    dwg.add(dwg.text("Public support", insert=(right_col_x + 16, rp_y + rp_h - 80),
+                     font_size=SM_FS))
+    _bar(dwg, right_col_x + 16, rp_y + rp_h - 68,
+         PANEL_W - 32, 18, getattr(s, "public_support", 0.0),
+         fill="#9fd3c7", back="#eaf6f2")
+    dwg.add(dwg.text(f"{getattr(s,'public_support',0.0):.1f}%",
+                     insert=(right_col_x + PANEL_W/2, rp_y + rp_h - 48),
+                     text_anchor="middle", font_size=SM_FS))
+
+    dwg.add(dwg.text(f"Economy index: {getattr(s,'economy_index',0.0):.1f}",
+                     insert=(right_col_x + 16, rp_y + rp_h - 28), font_size=SM_FS))
+    dwg.add(dwg.text(f"Legal pressure: {getattr(s,'legal_pressure',0.0):.1f}",
+                     insert=(right_col_x + PANEL_W/2 + 10, rp_y + rp_h - 28),
+                     font_size=SM_FS))
+
+    return dwg.tostring()
+
+# ---------------- Template renderer ----------------
+# The dashboard layout above is static apart from a few dozen values, so
+# render_state_fast builds the SVG skeleton once (with the same layout arithmetic and
+# svgwrite's serialization rules: sorted attributes, str() numbers, escaped text) and
+# per frame only formats the values into it. Its output is byte-identical to render_state.
+
+def _esc(text):
+    return text.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
+
+def _lit(text):
+    # static text inside the str.format skeleton
+    return _esc(str(text)).replace("{", "{{").replace("}", "}}")
+
+class _Slot:
+    # a value filled in per frame; spec is a str.format field such as "debt:.0f"
+    def __init__(self, spec):
+        self.spec = spec
+
+def _part(v):
+    return "{" + v.spec + "}" if isinstance(v, _Slot) else _lit(v)
+
+def _tag(name, attrs, text=None):
+    a = " ".join(f'{k}="{_part(v)}"' for k, v in sorted(attrs.items()))
+    if text is None:
+        return f"<{name} {a} />"
+    if isinstance(text, tuple):
+        body = "".join(_part(t) for t in text)
+    else:
+        body = _part(text)
+    return f"<{name} {a}>{body}</{name}>"
+
+def _text_tag(text, insert, font_size, **extra):
+    attrs = {"x": insert[0], "y": insert[1], "font-size": font_size}
+    attrs.update({k.replace("_", "-"): v for k, v in extra.items()})
+    return _tag("text", attrs, text)
+
+def _bar_tags(x, y, w, h, width_slot, fill="lightblue", back="#eee", stroke="black"):
+    return (_tag("rect", {"x": x, "y": y, "width": w, "height": h, "fill": back, "stroke": stroke, "stroke-width": 1}) +
+            _tag("rect", {"x": x, "y": y, "width": width_slot, "height": h, "fill": fill}))
+
+def _bar_width(w, pct):
+    return max(0, min(w, w * (pct/100.0)))
+
+def _build_skeleton():
+    parts = []
+    add = parts.append
+    add(f'<svg baseProfile="full" height="{GRAPHIC_H}px" version="1.1" width="{GRAPHIC_W}px" '
+        'xmlns="http://www.w3.org/2000/svg" xmlns:ev="http://www.w3.org/2001/xml-events" '
+        'xmlns:xlink="http://www.w3.org/1999/xlink"><defs />')
+    add(_tag("rect", {"x": 0, "y": 0, "width": GRAPHIC_W, "height": GRAPHIC_H, "fill": "#f6f8fb"}))
+    add(_text_tag("CityWithoutWalls — Current State Dashboard", (GRAPHIC_W/2, 28),
+                  TITLE_FS, text_anchor="middle", fill="#123040"))
+
+    PANEL_W = 370
+    left_col_x = PADDING
+    mid_col_x = left_col_x + PANEL_W + PADDING
+    right_col_x = mid_col_x + PANEL_W + PADDING
+
+    # left panel
+    panel_y = 60
+    panel_h = 300
+    add(_tag("rect", {"x": left_col_x, "y": panel_y, "width": PANEL_W, "height": panel_h,
+                      "fill": "#ffffff", "rx": 8, "ry": 8, "stroke": "#d6e0ea"}))
+    add(_text_tag("Role & Turn", (left_col_x + 12, panel_y + 22), HEADER_FS, fill="#0b3b4a"))
+    add(_tag("rect", {"x": left_col_x + 12, "y": panel_y + 34, "width": PANEL_W - 24, "height": 44,
+                      "fill": "#e9f6ff", "stroke": "#9fcbe6"}))
+    add(_text_tag(("Current: ", _Slot("role")), (left_col_x + PANEL_W/2, panel_y + 62),
+                  "18px", text_anchor="middle"))
+    add(_text_tag("Last action:", (left_col_x + 12, panel_y + 90), SM_FS))
+    add("{action}")
+    km_y = panel_y + 140
+    spacing = 18
+    add(_text_tag(("Round: ", _Slot("round")), (left_col_x + 12, km_y), SM_FS))
+    add(_text_tag(("Shelter cap: ", _Slot("shelter_capacity")), (left_col_x + 12, km_y + spacing), SM_FS))
+    add(_text_tag(("Transitional: ", _Slot("transitional_units")), (left_col_x + 12, km_y + 2*spacing), SM_FS))
+    add(_text_tag(("Permanent units: ", _Slot("permanent_units")), (left_col_x + 12, km_y + 3*spacing), SM_FS))
+    add(_text_tag(("Debt (k$): ", _Slot("debt:.0f")), (left_col_x + 12, panel_y + panel_h - 60), SM_FS))
+    add(_text_tag(("Policy momentum: ", _Slot("policy_momentum:.1f")), (left_col_x + 12, panel_y + panel_h - 42), SM_FS))
+
+    # one text line per last-action line (up to 6), prefix depends on the line number
+    action_prefixes = [_tag("text", {"x": left_col_x + 12, "y": panel_y + 108 + 14*i, "font-size": SM_FS}, "\0")
+                       .split("\0") for i in range(6)]
+
+    # middle panel
+    mp_y = 60
+    mp_h = 300
+    add(_tag("rect", {"x": mid_col_x, "y": mp_y, "width": PANEL_W, "height": mp_h,
+                      "fill": "#ffffff", "rx": 8, "ry": 8, "stroke": "#d6e0ea"}))
+    add(_text_tag("Population Breakdown", (mid_col_x + 12, mp_y + 22), HEADER_FS))
+    add(_text_tag(("Total Homeless: ", _Slot("homeless_population")), (mid_col_x + 12, mp_y + 38),
+                  BODY_FS, style="font-weight:bold"))
+    sub_x = mid_col_x + 16
+    max_bar_w = PANEL_W - 40
+    for y_offset, label, field, color in ((60, "Families", "pop_families", "#7fb7ff"),
+                                          (100, "Youth", "pop_youth", "#ffd366"),
+                                          (140, "Chronic", "pop_chronic", "#ffa3a3"),
+                                          (180, "Veterans", "pop_veterans", "#c1f0c1")):
+        add(_bar_tags(sub_x + 80, mp_y + y_offset - 10, max_bar_w - 80, 16, _Slot(field + "_w"),
+                      fill=color, back="#f0f6fb"))
+        add(_text_tag(label, (sub_x, mp_y + y_offset + 2), SM_FS))
+        add(_text_tag(_Slot(field), (sub_x + max_bar_w + 2, mp_y + y_offset + 2), SM_FS))
+    add(_text_tag("Population Trend (last 10 moves):", (mid_col_x + 12, mp_y + 200), SM_FS))
+    add("{trend}")
+    sparkline = (mid_col_x + 20, mp_y + 208, PANEL_W - 40, 60)
+
+    # right panel
+    rp_y = 60
+    rp_h = 300
+    add(_tag("rect", {"x": right_col_x, "y": rp_y, "width": PANEL_W, "height": rp_h,
+                      "fill": "#ffffff", "rx": 8, "ry": 8, "stroke": "#d6e0ea"}))
+    add(_text_tag("Capacity & Stakeholder Support", (right_col_x + 12, rp_y + 22), HEADER_FS))
+    cap_x = right_col_x + 20
+    cap_y = rp_y + 44
+    cx, cy, r = cap_x + 60, cap_y + 40, 50
+    add(_tag("circle", {"cx": cx, "cy": cy, "r": r+6, "fill": "#fafafa", "stroke": "none"}))
+    add(_bar_tags(cx - 80/2, cy + r*0.6, 80, 10, _Slot("occupancy_w"), fill="#ffd366", back="#ddd"))
+    add(_text_tag(("Occupancy: ", _Slot("occupancy:.0f"), "%"), (cx, cy + r*0.6 + 28), SM_FS, text_anchor="middle"))
+    sb_x = cap_x + 140
+    sb_y = cap_y
+    for i, (label, color) in enumerate((("Neighborhoods", "#7fb7ff"), ("Business", "#ffd366"),
+                                        ("Medical", "#ffa3a3"), ("Shelters", "#c1f0c1"),
+                                        ("University", "#d0b3ff"))):
+        yoff = sb_y + i*34
+        add(_text_tag(label, (sb_x, yoff), SM_FS))
+        add(_bar_tags(sb_x + 80, yoff - 12, 160, 12, _Slot(f"support{i}_w"), fill=color, back="#f4f6f9"))
+    add(_text_tag("Public support", (right_col_x + 16, rp_y + rp_h - 80), SM_FS))
+    add(_bar_tags(right_col_x + 16, rp_y + rp_h - 68, PANEL_W - 32, 18, _Slot("public_support_w"),
+                  fill="#9fd3c7", back="#eaf6f2"))
+    add(_text_tag((_Slot("public_support:.1f"), "%"), (right_col_x + PANEL_W/2, rp_y + rp_h - 48),
+                  SM_FS, text_anchor="middle"))
+    add(_text_tag(("Economy index: ", _Slot("economy_index:.1f")), (right_col_x + 16, rp_y + rp_h - 28), SM_FS))
+    add(_text_tag(("Legal pressure: ", _Slot("legal_pressure:.1f")), (right_col_x + PANEL_W/2 + 10, rp_y + rp_h - 28), SM_FS))
+    add("</svg>")
+    return "".join(parts), action_prefixes, sparkline, max_bar_w - 80, PANEL_W - 32
+
+_SKELETON, _ACTION_TAGS, _SPARKLINE, _SUB_BAR_W, _PS_BAR_W = _build_skeleton()
+_SUPPORT_ATTRS = ("support_neighborhoods", "support_business", "support_medical",
+                  "support_shelters", "support_university")
+
+def _trend_tag(data, stroke="#0b3b4a"):
+    if not data:
+        return ""
+    x, y, w, h = _SPARKLINE
+    mn = min(data)
+    mx = max(data)
+    rng = mx - mn if mx != mn else 1
+    n = len(data)
+    pts = []
+    for i, v in enumerate(data):
+        vx = x + (i/(n-1)) * w if n > 1 else x
+        vy = y + h - ((v - mn)/rng) * h
+        pts.append("%s,%s" % (vx, vy))
+    return f'<polyline fill="none" points="{" ".join(pts)}" stroke="{stroke}" stroke-width="1.5" />'
+
+def render_state_fast(s, roles=None):
+    action_text = s.last_action if s.last_action else "No recent action"
+    action = []
+    for i, ln in enumerate(str(action_text).split("\n")[:6]):
+        ln = ln[:72]
+        open_tag, close_tag = _ACTION_TAGS[i]
+        # svgwrite/ElementTree self-close elements with empty text
+        action.append(open_tag + _esc(ln) + close_tag if ln else open_tag[:-1] + " />")
+    total = max(1, s.homeless_population)
+    total_units = max(1, s.shelter_capacity + s.transitional_units + s.permanent_units)
+    occ_pct = max(0.0, min(100.0, (s.homeless_population / total_units) * 100.0))
+    public_support = getattr(s, "public_support", 0.0)
+    values = {
+        "role": _esc(prob.int_to_name(s.turn)),
+        "action": "".join(action),
+        "round": s.round,
+        "shelter_capacity": s.shelter_capacity,
+        "transitional_units": s.transitional_units,
+        "permanent_units": s.permanent_units,
+        "debt": s.debt,
+        "policy_momentum": s.policy_momentum,
+        "homeless_population": s.homeless_population,
+        "trend": _trend_tag(getattr(s, "trend_history", [])),
+        "occupancy": occ_pct,
+        "occupancy_w": _bar_width(80, occ_pct),
+        "public_support": public_support,
+        "public_support_w": _bar_width(_PS_BAR_W, public_support),
+        "economy_index": getattr(s, "economy_index", 0.0),
+        "legal_pressure": getattr(s, "legal_pressure", 0.0),
+    }
+    for field in ("pop_families", "pop_youth", "pop_chronic", "pop_veterans"):
+        value = getattr(s, field)
+        values[field] = value
+        values[field + "_w"] = _bar_width(_SUB_BAR_W, (value / total) * 100.0)
+    for i, attr in enumerate(_SUPPORT_ATTRS):
+        values[f"support{i}_w"] = _bar_width(160, float(getattr(s, attr, public_support)))
+    return _SKELETON.format_map(values)
+
+# ---------------- Render cache ----------------
+# Observers, reconnecting clients and replay viewers render the same state many times.
+# RenderCache sits in front of a renderer, keyed by exactly the fields the dashboard reads,
+# with LRU eviction bounded by entry count and total SVG bytes.
+
+def render_key(s):
+    # the repr of the fields, not the values: 5 == 5.0 and 0.0 == -0.0, but the template
+    # renders each of them differently
+    return repr((s.turn, s.round,
+            s.homeless_population, s.pop_families, s.pop_youth, s.pop_chronic, s.pop_veterans,
+            s.shelter_capacity, s.transitional_units, s.permanent_units,
+            tuple(getattr(s, "trend_history", ())),
+            getattr(s, "public_support", 0.0), getattr(s, "economy_index", 0.0),
+            getattr(s, "legal_pressure", 0.0), s.debt, s.policy_momentum,
+            s.last_action))
+
+class RenderCache:
+    def __init__(self, renderer=render_state_fast, max_entries=512, max_bytes=8 * 1024 * 1024):
+        self.renderer = renderer
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()   # key -> (svg, nbytes)
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def render(self, s, roles=None):
+        key = render_key(s)
+        entry = self._entries.get(key)
+        if entry is not None:
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return entry[0]
+        self.misses += 1
+        svg = self.renderer(s, roles)
+        nbytes = len(svg.encode("utf-8"))
+        if nbytes <= self.max_bytes:
+            self._entries[key] = (svg, nbytes)
+            self.bytes += nbytes
+            while len(self._entries) > self.max_entries or self.bytes > self.max_bytes:
+                _, (_, dropped) = self._entries.popitem(last=False)
+                self.bytes -= dropped
+                self.evictions += 1
+        return svg
+
+    __call__ = render
+
+    def clear(self):
+        self._entries.clear()
+        self.bytes = 0
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {"entries": len(self._entries), "bytes": self.bytes,
+                "max_entries": self.max_entries, "max_bytes": self.max_bytes,
+                "hits": self.hits, "misses": self.misses, "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0}
+
+RENDER_CACHE = RenderCache()
+
+def render_state_cached(s, roles=None):
+    return RENDER_CACHE.render(s, roles)
@@ -0,0 +1,335 @@
+'''CityWithoutWalls_SWEEP.py
+
+Parameter sensitivity sweeps over the game's balance constants.
+ - Parameters (see PARAMETERS):
+     a module constant of CityWithoutWalls, e.g. SHOCK_CHANCE, TAX_RATE, SUCCESS_BASE,
+     difficulty:<operator name>   absolute difficulty of one operator,
+     difficulty_offset            added to every operator's shipped difficulty,
+     cost:<operator name>         multiplier on one operator's shipped costs,
+     cost_scale                   multiplier on every operator's shipped costs.
+ - Designs: grid (levels values per parameter, full factorial) or a Latin hypercube of
+   n points, both over {name: (low, high)} ranges.
+ - Every design point plays the same seeded batch of games (common random numbers, so
+   differences between points are not seed noise) with the batch runner's play_game.
+   Points run in parallel on a process pool.
+ - Progress is a JSONL file: a spec line, then one line per finished point. Running
+   the same sweep again skips the points that are already in the file, so a multi-hour
+   sweep can be stopped at any time and restarted.
+ - sensitivity() fits each response (win rate, mean rounds, any final metric) linearly
+   on the parameters, with each parameter scaled to its range. main_effects() gives the
+   mean response per parameter level.
+
+    python CityWithoutWalls_SWEEP.py sweep.jsonl --param SHOCK_CHANCE=0.05:0.3 \\
+        --param cost_scale=0.7:1.3 --design lhs --points 40 --games 200
+    python CityWithoutWalls_SWEEP.py sweep.jsonl            # resume
+    python CityWithoutWalls_SWEEP.py sweep.jsonl --report
+'''
+
+import os, sys, json, random, itertools
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import CityWithoutWalls as prob
+import CityWithoutWalls_BATCH as batch
+
+# sweepable module constants of CityWithoutWalls
+CONSTANTS = ('SUCCESS_BASE', 'MOMENTUM_WEIGHT', 'SUPPORT_WEIGHT', 'SUPPORT_PIVOT', 'FATIGUE_PENALTY',
+             'SHOCK_CHANCE', 'GRANT_CHANCE', 'GRANT_MOMENTUM', 'INFLATION_FACTOR', 'TAX_RATE', 'FATIGUE_DECAY')
+OPERATOR_PARAMETERS = ('difficulty_offset', 'cost_scale')
+PARAMETERS = CONSTANTS + OPERATOR_PARAMETERS + ('difficulty:<operator name>', 'cost:<operator name>')
+
+DEFAULT_RESPONSES = ('win_rate', 'mean_rounds', 'homeless_population', 'public_support', 'debt')
+
+
+# ---------------- Applying parameters ----------------
+
+_BASELINE = None
+
+
+def baseline():
+    '''Shipped values: ({constant: value}, {operator name: (difficulty, cost_k)}), captured
+    the first time parameters are applied in this process.'''
+    global _BASELINE
+    if _BASELINE is None:
+        _BASELINE = ({name: getattr(prob, name) for name in CONSTANTS},
+                     {op.name: (op.difficulty, dict(op.cost_k)) for op in prob.OPERATORS})
+    return _BASELINE
+
+
+def check_parameter(name):
+    if name in CONSTANTS or name in OPERATOR_PARAMETERS:
+        return
+    kind, _, op_name = name.partition(':')
+    if kind in ('difficulty', 'cost') and op_name in baseline()[1]:
+        return
+    raise ValueError(f"unknown sweep parameter {name!r} (see PARAMETERS)")
+
+
+def apply_params(params):
+    '''Reset the rules to their shipped values, then apply params {name: value}.'''
+    constants, operators = baseline()
+    for name, value in constants.items():
+        setattr(prob, name, value)
+    offset = params.get('difficulty_offset', 0.0)
+    scale = params.get('cost_scale', 1.0)
+    for op in prob.OPERATORS:
+        difficulty, cost_k = operators[op.name]
+        difficulty = params.get('difficulty:' + op.name, difficulty) + offset
+        k = scale * params.get('cost:' + op.name, 1.0)
+        if k != 1.0:
+            cost_k = {bk: amt * k for bk, amt in cost_k.items()}
+        prob.tune_operator(op, difficulty, cost_k)
+    for name, value in params.items():
+        if name in CONSTANTS:
+            setattr(prob, name, value)
+        else:
+            check_parameter(name)
+
+
+# ---------------- Designs ----------------
+
+def grid_design(ranges, levels=3):
+    '''Full factorial design: levels evenly spaced values per parameter.'''
+    if levels < 2:
+        raise ValueError("a grid needs at least 2 levels")
+    names = list(ranges)
+    axes = [[lo + (hi - lo) * k / (levels - 1) for k in range(levels)] for lo, hi in ranges.values()]
+    return [dict(zip(names, values)) for values in itertools.product(*axes)]
+
+
+def latin_hypercube(ranges, n, seed=0):
+    '''n points; every parameter's range is cut into n strata and each stratum is used
+    exactly once (at a random position inside it).'''
+    rng = random.Random(seed)
+    columns = {}
+    for name, (lo, hi) in ranges.items():
+        strata = list(range(n))
+        rng.shuffle(strata)
+        columns[name] = [lo + (hi - lo) * (k + rng.random()) / n for k in strata]
+    return [{name: columns[name][i] for name in ranges} for i in range(n)]
+
+
+def make_design(spec):
+    ranges = {name: tuple(r) for name, r in spec['ranges'].items()}
+    if spec['design'] == 'grid':
+        return grid_design(ranges, spec['levels'])
+    if spec['design'] == 'lhs':
+        return latin_hypercube(ranges, spec['points'], spec['seed'])
+    raise ValueError(f"unknown design {spec['design']!r}")
+
+
+# ---------------- Running ----------------
+
+def run_point(params, games, base_seed, max_rounds, policy):
+    '''Play games seeded batch games under params; returns BatchSummary.as_dict().
+    Runs in a worker process (the rules are restored afterwards all the same).'''
+    policies = {role: batch.POLICIES[policy] for role in prob.PLAYABLE_ROLES}
+    summary = batch.BatchSummary()
+    try:
+        apply_params(params)
+        for seed in prob.spawn_seeds(base_seed, games):
+            summary.add(batch.play_game(seed, policies, max_rounds))
+    finally:
+        apply_params({})
+    return summary.as_dict()
+
+
+def load(path):
+    '''(spec, {point: record}) from a sweep file. A torn last line (the sweep was killed
+    while writing it) is ignored.'''
+    spec, records = None, {}
+    with open(path) as f:
+        for line in f:
+            if not line.endswith('\n'):
+                break
+            row = json.loads(line)
+            if 'sweep' in row:
+                spec = row['sweep']
+            else:
+                records[row['point']] = row
+    if spec is None:
+        raise ValueError(f"{path} is not a sweep file")
+    return spec, records
+
+
+class Sweep:
+    def __init__(self, path, ranges=None, design='lhs', points=20, levels=3, games=200,
+                 seed=0, max_rounds=batch.DEFAULT_MAX_ROUNDS, policy='random'):
+        '''Open the sweep stored at path, or start a new one there. ranges may be omitted
+        to resume an existing file; if given, it must match the file's spec.'''
+        self.path = path
+        stored = load(path)[0] if os.path.exists(path) and os.path.getsize(path) else None
+        if ranges is None:
+            if stored is None:
+                raise ValueError(f"{path} does not exist yet: give parameter ranges")
+            self.spec = stored
+        else:
+            for name in ranges:
+                check_parameter(name)
+            if policy not in batch.POLICIES:
+                raise ValueError(f"unknown policy {policy!r}")
+            self.spec = {
+                'problem_version': prob.PROBLEM_VERSION,
+                'ranges': {name: [float(lo), float(hi)] for name, (lo, hi) in ranges.items()},
+                'design': design, 'points': points, 'levels': levels,
+                'games': games, 'seed': seed, 'max_rounds': max_rounds, 'policy': policy,
+            }
+            if stored is not None and stored != self.spec:
+                raise ValueError(f"{path} holds a different sweep; use another file")
+        if self.spec['problem_version'] != prob.PROBLEM_VERSION:
+            raise ValueError(f"{path} was swept under PROBLEM_VERSION {self.spec['problem_version']}")
+        self.design = make_design(self.spec)
+
+    def completed(self):
+        if not os.path.exists(self.path) or not os.path.getsize(self.path):
+            return {}
+        return load(self.path)[1]
+
+    def pending(self):
+        done = self.completed()
+        return [i for i in range(len(self.design)) if i not in done]
+
+    def _open(self):
+        # start the file with the spec line, or cut off a torn last line before appending
+        if not os.path.exists(self.path) or not os.path.getsize(self.path):
+            f = open(self.path, 'w')
+            f.write(json.dumps({'sweep': self.spec}) + '\n')
+            return f
+        with open(self.path, 'rb') as f:
+            data = f.read()
+        end = data.rfind(b'\n') + 1
+        if end < len(data):
+            with open(self.path, 'r+b') as f:
+                f.truncate(end)
+        return open(self.path, 'a')
+
+    def run(self, workers=None):
+        '''Generator: run the pending points and yield each record as it is saved.
+        workers=1 runs in this process.'''
+        todo = self.pending()
+        spec = self.spec
+        args = (spec['games'], spec['seed'], spec['max_rounds'], spec['policy'])
+        with self._open() as out:
+            def save(i, result):
+                record = {'point': i, 'params': self.design[i], 'result': result}
+                out.write(json.dumps(record) + '\n')
+                out.flush()
+                return record
+            if workers == 1:
+                for i in todo:
+                    yield save(i, run_point(self.design[i], *args))
+                return
+            pool = ProcessPoolExecutor(max_workers=workers or os.cpu_count() or 1)
+            try:
+                futures = {pool.submit(run_point, self.design[i], *args): i for i in todo}
+                for fut in as_completed(futures):
+                    yield save(futures[fut], fut.result())
+            finally:
+                pool.shutdown(wait=True, cancel_futures=True)
+
+    def records(self):
+        done = self.completed()
+        return [done[i] for i in sorted(done)]
+
+
+# ---------------- Analysis ----------------
+
+def response_of(record, response):
+    result = record['result']
+    if response in result:
+        return result[response]
+    return result['mean_metrics'][response]
+
+
+def sensitivity(spec, records, response='win_rate'):
+    '''Least-squares fit of response on the parameters, each scaled to [0, 1] over its
+    range. Returns ({name: effect}, r2): effect is the fitted change in response from the
+    low to the high end of the parameter's range, all else equal.'''
+    import numpy as np
+    names = list(spec['ranges'])
+    if len(records) <= len(names):
+        raise ValueError(f"need more than {len(names)} finished points to fit {len(names)} parameters")
+    x = np.ones((len(records), len(names) + 1))
+    for j, name in enumerate(names):
+        lo, hi = spec['ranges'][name]
+        x[:, j + 1] = [(r['params'][name] - lo) / ((hi - lo) or 1.0) for r in records]
+    y = np.array([response_of(r, response) for r in records], dtype=float)
+    coef = np.linalg.lstsq(x, y, rcond=None)[0]
+    residual = y - x @ coef
+    total = ((y - y.mean()) ** 2).sum()
+    r2 = 1.0 - (residual ** 2).sum() / total if total > 0 else 1.0
+    return {name: float(coef[j + 1]) for j, name in enumerate(names)}, float(r2)
+
+
+def main_effects(spec, records, name, response='win_rate', bins=4):
+    '''Mean response per level of one parameter: [(level, mean, points)]. Grid designs use
+    their levels; other designs are cut into bins equal-width bins (bin midpoints).'''
+    groups = {}
+    if spec['design'] == 'grid':
+        for r in records:
+            groups.setdefault(r['params'][name], []).append(response_of(r, response))
+    else:
+        lo, hi = spec['ranges'][name]
+        width = (hi - lo) / bins or 1.0
+        for r in records:
+            k = min(bins - 1, int((r['params'][name] - lo) / width))
+            groups.setdefault(lo + (k + 0.5) * width, []).append(response_of(r, response))
+    return [(level, sum(v) / len(v), len(v)) for level, v in sorted(groups.items())]
+
+
+def report_text(spec, records, responses=DEFAULT_RESPONSES):
+    lines = [f"{len(records)} points, {spec['games']} games each ({spec['design']}, policy {spec['policy']})"]
+    names = list(spec['ranges'])
+    width = max(len(n) for n in names)
+    lines.append(f"  {'effect of low -> high':<{width}} " + " ".join(f"{r[:14]:>14}" for r in responses))
+    fits = [sensitivity(spec, records, r) for r in responses]
+    for name in names:
+        lines.append(f"  {name:<{width}} " + " ".join(f"{effects[name]:>14.4g}" for effects, _ in fits))
+    lines.append(f"  {'r2':<{width}} " + " ".join(f"{r2:>14.3f}" for _, r2 in fits))
+    return "\n".join(lines)
+
+
+def parse_param(text):
+    # NAME=LOW:HIGH (operator names may contain '=' or ':', so split from the right)
+    name, _, bounds = text.rpartition('=')
+    lo, _, hi = bounds.partition(':')
+    if not name or not hi:
+        raise ValueError(f"expected NAME=LOW:HIGH, got {text!r}")
+    return name, (float(lo), float(hi))
+
+
+def main(argv=None):
+    import argparse
+    ap = argparse.ArgumentParser(description="CityWithoutWalls parameter sensitivity sweep")
+    ap.add_argument('path', help="sweep progress file (JSONL); an existing sweep is resumed")
+    ap.add_argument('--param', action='append', default=[], help="NAME=LOW:HIGH (repeatable)")
+    ap.add_argument('--design', choices=['lhs', 'grid'], default='lhs')
+    ap.add_argument('--points', type=int, default=20, help="Latin hypercube points")
+    ap.add_argument('--levels', type=int, default=3, help="grid levels per parameter")
+    ap.add_argument('--games', type=int, default=200, help="games per point")
+    ap.add_argument('--seed', type=int, default=0)
+    ap.add_argument('--max-rounds', type=int, default=batch.DEFAULT_MAX_ROUNDS)
+    ap.add_argument('--policy', choices=sorted(batch.POLICIES), default='random')
+    ap.add_argument('--workers', type=int, default=None)
+    ap.add_argument('--report', action='store_true', help="only print the sensitivity report")
+    args = ap.parse_args(argv)
+
+    ranges = dict(parse_param(p) for p in args.param) or None
+    sweep = Sweep(args.path, ranges, args.design, args.points, args.levels, args.games,
+                  args.seed, args.max_rounds, args.policy)
+    if not args.report:
+        total = len(sweep.design)
+        done = total - len(sweep.pending())
+        try:
+            for record in sweep.run(args.workers):
+                done += 1
+                print(f"[{done}/{total}] point {record['point']}: win rate "
+                      f"{record['result']['win_rate']:.1%}", file=sys.stderr)
+        except KeyboardInterrupt:
+            print(f"interrupted after {done}/{total} points; run again to resume", file=sys.stderr)
+            return sweep
+    print(report_text(sweep.spec, sweep.records()))
+    return sweep
+
+
+if __name__ == '__main__':
+    main()
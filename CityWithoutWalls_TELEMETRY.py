@@ -0,0 +1,281 @@
+'''CityWithoutWalls_TELEMETRY.py
+
+Streaming per-move telemetry. Every operator application becomes one flat record (a tuple
+in COLUMNS order):
+    game, move (0-based within the game), round and turn (acting role) the move was
+    played in, role name, operator name, op_index (into OPERATORS), success, mult (the
+    applied effect multiplier), frac (the budget fraction), then every numeric State field
+    after the move (turn and round as after_turn / after_round).
+Records come from generators, so nothing holds a whole game or batch in memory:
+ - play_records(): one game played as the batch runner plays it (BATCH.iter_game),
+ - batch_records(): many games on a process pool, yielded in game order with a bounded
+   number of game chunks in flight,
+ - log_records() / archive_records(): replayed from CityWithoutWalls_LOG logs.
+Sinks buffer buffer_rows records and write them in bulk: CSVSink (a path, '.gz' path or
+'-' for stdout), and ParquetSink / ArrowSink (Arrow IPC file) when pyarrow is installed.
+
+    with open_sink('turns.parquet') as sink:
+        sink.write_many(batch_records(100000))
+
+    python CityWithoutWalls_TELEMETRY.py --games 100000 --out turns.parquet
+    python CityWithoutWalls_TELEMETRY.py --from-log games.cwwl --out - | ...
+'''
+
+import os, sys, csv, itertools, collections
+from concurrent.futures import ProcessPoolExecutor
+
+import CityWithoutWalls as prob
+import CityWithoutWalls_BATCH as batch
+
+META_COLUMNS = ('game', 'move', 'round', 'turn', 'role', 'operator', 'op_index', 'success', 'mult', 'frac')
+STATE_COLUMNS = tuple('after_' + f if f in ('turn', 'round') else f for f in prob.STATE_FIELDS)
+COLUMNS = META_COLUMNS + STATE_COLUMNS
+
+DEFAULT_BUFFER_ROWS = 65536
+DEFAULT_CHUNK_GAMES = 20
+
+
+# ---------------- Record streams ----------------
+
+def game_records(game, moves):
+    '''Records of one game from (op index, state) pairs, (None, initial state) first,
+    as yielded by BATCH.iter_game.'''
+    ops = prob.OPERATORS
+    move = 0
+    played_round = None
+    for op_index, s in moves:
+        if op_index is not None:
+            op = ops[op_index]
+            success, mult, frac = s.last_outcome
+            yield (game, move, played_round, op.role, op.role_name, op.name, op_index,
+                   success, mult, frac) + tuple(s._v)
+            move += 1
+        played_round = s.round
+
+
+def play_records(game, seed, policies=None, max_rounds=batch.DEFAULT_MAX_ROUNDS):
+    return game_records(game, batch.iter_game(seed, policies, max_rounds))
+
+
+def log_records(game, log):
+    '''Records of a logged game (CityWithoutWalls_LOG.GameLog), by replaying it.'''
+    import CityWithoutWalls_LOG
+    ops = itertools.chain([None], log.operators())
+    return game_records(game, zip(ops, CityWithoutWalls_LOG.Replayer(log).states()))
+
+
+def archive_records(path):
+    '''Records of every game in a log archive; game ids are positions in the archive.'''
+    import CityWithoutWalls_LOG
+    for game, log in enumerate(CityWithoutWalls_LOG.LogReader(path)):
+        yield from log_records(game, log)
+
+
+def _chunk_records(first_game, seeds, policies, max_rounds):
+    out = []
+    for k, seed in enumerate(seeds):
+        out.extend(play_records(first_game + k, seed, policies, max_rounds))
+    return out
+
+
+def batch_records(n_games, policies=None, max_rounds=batch.DEFAULT_MAX_ROUNDS, base_seed=0,
+                  workers=None, chunk_games=DEFAULT_CHUNK_GAMES):
+    '''Records of n_games games played on a process pool (workers=1: in this process).
+    Game i uses seed derive_seed(base_seed, i), as in BATCH.run_batch. Records are yielded
+    in game order; at most two chunks of chunk_games games per worker are in flight.'''
+    seeds = prob.spawn_seeds(base_seed, n_games)
+    starts = range(0, n_games, chunk_games)
+    if workers == 1:
+        for start in starts:
+            yield from _chunk_records(start, seeds[start:start + chunk_games], policies, max_rounds)
+        return
+    workers = workers or os.cpu_count() or 1
+    pool = ProcessPoolExecutor(max_workers=workers)
+    try:
+        starts = iter(starts)
+        in_flight = collections.deque()
+        def submit(start):
+            in_flight.append(pool.submit(_chunk_records, start, seeds[start:start + chunk_games],
+                                         policies, max_rounds))
+        for start in itertools.islice(starts, 2 * workers):
+            submit(start)
+        while in_flight:
+            records = in_flight.popleft().result()
+            start = next(starts, None)
+            if start is not None:
+                submit(start)
+            yield from records
+    finally:
+        pool.shutdown(wait=True, cancel_futures=True)
+
+
+# ---------------- Sinks ----------------
+
+class Sink:
+    '''Buffers records and hands them to _write_rows in blocks of buffer_rows.'''
+
+    def __init__(self, buffer_rows=DEFAULT_BUFFER_ROWS):
+        self.buffer_rows = buffer_rows
+        self.rows = 0
+        self._buffer = []
+
+    def write(self, record):
+        self._buffer.append(record)
+        if len(self._buffer) >= self.buffer_rows:
+            self.flush()
+
+    def write_many(self, records):
+        records = iter(records)
+        buffer = self._buffer
+        while True:
+            block = list(itertools.islice(records, self.buffer_rows - len(buffer)))
+            if not block:
+                return self.rows + len(buffer)
+            buffer.extend(block)
+            if len(buffer) >= self.buffer_rows:
+                self.flush()
+
+    def flush(self):
+        if self._buffer:
+            self._write_rows(self._buffer)
+            self.rows += len(self._buffer)
+            self._buffer.clear()
+
+    def close(self):
+        self.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+
+class CSVSink(Sink):
+    '''CSV with a header row. target: a path ('.gz' is compressed), '-' (stdout) or an
+    open text file.'''
+
+    def __init__(self, target, buffer_rows=DEFAULT_BUFFER_ROWS):
+        Sink.__init__(self, buffer_rows)
+        self._owned = isinstance(target, str) and target != '-'
+        if target == '-':
+            self.f = sys.stdout
+        elif not self._owned:
+            self.f = target
+        elif target.endswith('.gz'):
+            import gzip
+            self.f = gzip.open(target, 'wt', newline='')
+        else:
+            self.f = open(target, 'w', newline='')
+        self.writer = csv.writer(self.f)
+        self.writer.writerow(COLUMNS)
+
+    def _write_rows(self, rows):
+        self.writer.writerows(rows)
+
+    def close(self):
+        Sink.close(self)
+        if self._owned:
+            self.f.close()
+        else:
+            self.f.flush()
+
+
+def arrow_schema():
+    import pyarrow as pa
+    meta = [('game', pa.int64()), ('move', pa.int32()), ('round', pa.int32()), ('turn', pa.int8()),
+            ('role', pa.string()), ('operator', pa.string()), ('op_index', pa.int16()),
+            ('success', pa.bool_()), ('mult', pa.float64()), ('frac', pa.float64())]
+    return pa.schema(meta + [(c, pa.float64()) for c in STATE_COLUMNS])
+
+
+class _ArrowTableSink(Sink):
+    def __init__(self, buffer_rows=DEFAULT_BUFFER_ROWS):
+        Sink.__init__(self, buffer_rows)
+        try:
+            import pyarrow
+        except ImportError:
+            raise ImportError(f"{type(self).__name__} needs pyarrow (pip install pyarrow); "
+                              "CSVSink works without it") from None
+        self.pa = pyarrow
+        self.schema = arrow_schema()
+
+    def _table(self, rows):
+        pa = self.pa
+        columns = zip(*rows)
+        return pa.Table.from_arrays([pa.array(c, type=f.type) for c, f in zip(columns, self.schema)],
+                                    schema=self.schema)
+
+
+class ParquetSink(_ArrowTableSink):
+    '''Parquet file; every flushed block becomes a row group.'''
+
+    def __init__(self, path, buffer_rows=DEFAULT_BUFFER_ROWS, compression='snappy'):
+        _ArrowTableSink.__init__(self, buffer_rows)
+        import pyarrow.parquet as pq
+        self.writer = pq.ParquetWriter(path, self.schema, compression=compression)
+
+    def _write_rows(self, rows):
+        self.writer.write_table(self._table(rows))
+
+    def close(self):
+        Sink.close(self)
+        self.writer.close()
+
+
+class ArrowSink(_ArrowTableSink):
+    '''Arrow IPC file (Feather v2); every flushed block becomes a record batch.'''
+
+    def __init__(self, path, buffer_rows=DEFAULT_BUFFER_ROWS):
+        _ArrowTableSink.__init__(self, buffer_rows)
+        self.file = self.pa.OSFile(path, 'wb')
+        self.writer = self.pa.ipc.new_file(self.file, self.schema)
+
+    def _write_rows(self, rows):
+        self.writer.write_table(self._table(rows))
+
+    def close(self):
+        Sink.close(self)
+        self.writer.close()
+        self.file.close()
+
+
+def open_sink(path, buffer_rows=DEFAULT_BUFFER_ROWS):
+    '''Sink chosen by extension: .parquet, .arrow / .feather, otherwise CSV ('-' is stdout).'''
+    ext = os.path.splitext(path)[1].lower()
+    if ext == '.parquet':
+        return ParquetSink(path, buffer_rows)
+    if ext in ('.arrow', '.feather'):
+        return ArrowSink(path, buffer_rows)
+    return CSVSink(path, buffer_rows)
+
+
+def main(argv=None):
+    import argparse, time
+    ap = argparse.ArgumentParser(description="Export per-move CityWithoutWalls telemetry")
+    ap.add_argument('--out', default='-', help="output file (.csv[.gz], .parquet, .arrow) or - for stdout")
+    ap.add_argument('--from-log', help="replay the games of this log archive instead of playing new ones")
+    ap.add_argument('--games', type=int, default=1000)
+    ap.add_argument('--max-rounds', type=int, default=batch.DEFAULT_MAX_ROUNDS)
+    ap.add_argument('--seed', type=int, default=0)
+    ap.add_argument('--workers', type=int, default=None)
+    ap.add_argument('--policy', choices=sorted(batch.POLICIES), default='random')
+    ap.add_argument('--buffer-rows', type=int, default=DEFAULT_BUFFER_ROWS)
+    args = ap.parse_args(argv)
+
+    if args.from_log:
+        records = archive_records(args.from_log)
+    else:
+        policies = {role: batch.POLICIES[args.policy] for role in prob.PLAYABLE_ROLES}
+        records = batch_records(args.games, policies, args.max_rounds, args.seed, args.workers)
+    start = time.perf_counter()
+    with open_sink(args.out, args.buffer_rows) as sink:
+        sink.write_many(records)
+    elapsed = time.perf_counter() - start
+    print(f"{sink.rows} records in {elapsed:.1f}s ({sink.rows / max(elapsed, 1e-9):.0f}/s)", file=sys.stderr)
+    return sink.rows
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,207 @@
+'''CityWithoutWalls_TRAJ.py
+
+Fixed-width on-disk store for state trajectories: one row per state, with the game id,
+the step within the game and every numeric State field (STATE_FIELDS) as columns, plus
+the units still pending in the construction pipeline per kind.
+
+File layout:
+    HEADER_SIZE bytes : b'CWWTRAJ\\n' + JSON header (format version, PROBLEM_VERSION, dtype),
+                        zero padded to a fixed size
+    rows              : packed records of ROW_DTYPE (ROW_DTYPE.itemsize bytes each, no
+                        alignment padding), appended to the end of the file
+The row count is implied by the file size, so appending never rewrites the header.
+A partial last row left by an interrupted write is cut off when a writer reopens the file.
+Readers map the file with numpy.memmap and never load it as a whole:
+
+    with TrajectoryWriter('runs.traj') as w:
+        w.append_game(game_id, states)       # e.g. Replayer(log).states()
+    t = TrajectoryReader('runs.traj')
+    t.column('homeless_population').mean()
+    t.game(17)                               # rows of one game (a view)
+'''
+
+import os, json
+
+import numpy as np
+
+import CityWithoutWalls as prob
+
+MAGIC = b'CWWTRAJ\n'
+FORMAT_VERSION = 1
+HEADER_SIZE = 4096
+WRITE_BUFFER_ROWS = 65536   # rows buffered by the writer before they go to disk
+
+PIPELINE_COLUMNS = ('pipeline_shelter', 'pipeline_trans', 'pipeline_perm')
+ROW_DTYPE = np.dtype([('game', '<u8'), ('step', '<u4')] +
+                     [(name, '<f8') for name in prob.STATE_FIELDS] +
+                     [(name, '<f8') for name in PIPELINE_COLUMNS])
+
+
+def _header():
+    meta = {
+        'format_version': FORMAT_VERSION,
+        'problem_name': prob.PROBLEM_NAME,
+        'problem_version': prob.PROBLEM_VERSION,
+        'dtype': ROW_DTYPE.descr,
+    }
+    data = MAGIC + json.dumps(meta).encode()
+    if len(data) > HEADER_SIZE:
+        raise ValueError("trajectory header does not fit in HEADER_SIZE")
+    return data.ljust(HEADER_SIZE, b'\0')
+
+
+def read_header(path):
+    with open(path, 'rb') as f:
+        data = f.read(HEADER_SIZE)
+    if not data.startswith(MAGIC):
+        raise ValueError(f"{path} is not a CityWithoutWalls trajectory file")
+    meta = json.loads(data[len(MAGIC):].rstrip(b'\0').decode())
+    if meta['format_version'] != FORMAT_VERSION:
+        raise ValueError(f"unsupported trajectory format version {meta['format_version']}")
+    return meta
+
+
+def _check_version(meta, path):
+    if meta['problem_version'] != prob.PROBLEM_VERSION:
+        raise ValueError(f"{path} was written for PROBLEM_VERSION {meta['problem_version']}, "
+                         f"this is {prob.PROBLEM_VERSION}")
+
+
+def states_to_rows(game, states, first_step=0):
+    '''Pack states into a ROW_DTYPE array (step numbers start at first_step).'''
+    states = list(states)
+    rows = np.zeros(len(states), dtype=ROW_DTYPE)
+    if not states:
+        return rows
+    values = np.array([s._v for s in states], dtype=np.float64)
+    rows['game'] = game
+    rows['step'] = np.arange(first_step, first_step + len(states))
+    for i, name in enumerate(prob.STATE_FIELDS):
+        rows[name] = values[:, i]
+    pending = np.zeros((len(states), len(PIPELINE_COLUMNS)))
+    kinds = {'shelter': 0, 'trans': 1, 'perm': 2}
+    for r, s in enumerate(states):
+        for (t, units, rounds) in s.construction_pipeline:
+            k = kinds.get(t)
+            if k is not None:
+                pending[r, k] += units
+    for k, name in enumerate(PIPELINE_COLUMNS):
+        rows[name] = pending[:, k]
+    return rows
+
+
+class TrajectoryWriter:
+    '''Append rows in bulk. A new file gets the header; an existing one must have been
+    written for the same PROBLEM_VERSION and row layout.'''
+
+    def __init__(self, path, buffer_rows=WRITE_BUFFER_ROWS):
+        self.path = path
+        self.buffer_rows = buffer_rows
+        self._pending = []
+        self._pending_rows = 0
+        new = not os.path.exists(path) or os.path.getsize(path) == 0
+        if not new:
+            meta = read_header(path)
+            _check_version(meta, path)
+            if np.dtype([tuple(d) for d in meta['dtype']]) != ROW_DTYPE:
+                raise ValueError(f"{path} has a different row layout")
+            # drop a partial row left by a crash, or every later row would be shifted
+            rows = (os.path.getsize(path) - HEADER_SIZE) // ROW_DTYPE.itemsize
+            end = HEADER_SIZE + rows * ROW_DTYPE.itemsize
+            if os.path.getsize(path) != end:
+                os.truncate(path, end)
+        self.f = open(path, 'ab')
+        if new:
+            self.f.write(_header())
+
+    def append_rows(self, rows):
+        if rows.dtype != ROW_DTYPE:
+            raise ValueError("rows must use ROW_DTYPE")
+        self._pending.append(rows)
+        self._pending_rows += len(rows)
+        if self._pending_rows >= self.buffer_rows:
+            self.flush()
+
+    def append_game(self, game, states, first_step=0):
+        self.append_rows(states_to_rows(game, states, first_step))
+
+    def flush(self):
+        if self._pending:
+            self.f.write(np.concatenate(self._pending).tobytes())
+            self._pending = []
+            self._pending_rows = 0
+        self.f.flush()
+
+    def close(self):
+        self.flush()
+        self.f.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+
+class TrajectoryReader:
+    '''Memory-mapped, read-only view of a trajectory file; rows is a structured memmap.'''
+
+    def __init__(self, path, check_version=True):
+        self.path = path
+        self.meta = read_header(path)
+        if check_version:
+            _check_version(self.meta, path)
+        self.dtype = np.dtype([tuple(d) for d in self.meta['dtype']])
+        n = (os.path.getsize(path) - HEADER_SIZE) // self.dtype.itemsize
+        if n > 0:
+            self.rows = np.memmap(path, dtype=self.dtype, mode='r', offset=HEADER_SIZE, shape=(n,))
+        else:
+            self.rows = np.zeros(0, dtype=self.dtype)
+        self._games_sorted = None   # games appended in id order; checked on the first game() call
+
+    def __len__(self):
+        return len(self.rows)
+
+    @property
+    def columns(self):
+        return self.dtype.names
+
+    def column(self, name):
+        return self.rows[name]
+
+    def game(self, game):
+        '''Rows of one game. Uses a binary search when games were appended in id order (the
+        order is checked once, by the first call; opening the file never scans it).'''
+        ids = self.rows['game']
+        if self._games_sorted is None:
+            self._games_sorted = bool(np.all(ids[1:] >= ids[:-1]))
+        if self._games_sorted:
+            lo = np.searchsorted(ids, game, 'left')
+            hi = np.searchsorted(ids, game, 'right')
+            return self.rows[lo:hi]
+        return self.rows[ids == game]
+
+    def iter_chunks(self, rows=1 << 20):
+        '''Yield consecutive slices of at most rows rows (for scans of very large files).'''
+        for start in range(0, len(self.rows), rows):
+            yield self.rows[start:start + rows]
+
+    def to_state(self, i):
+        '''Rebuild the numeric part of row i as a State (pipeline and history are not stored).'''
+        row = self.rows[i]
+        s = prob.State()
+        template = list(s._v)
+        for k, name in enumerate(prob.STATE_FIELDS):
+            v = float(row[name])
+            if isinstance(template[k], int) and v.is_integer():
+                v = int(v)
+            s._v[k] = v
+        s.trend_history = [int(s.homeless_population)] * prob.TREND_LENGTH
+        return s
+
+
+def write_log(writer, game, log):
+    '''Replay a CityWithoutWalls_LOG.GameLog and append its full trajectory.'''
+    import CityWithoutWalls_LOG
+    writer.append_game(game, CityWithoutWalls_LOG.Replayer(log).states())
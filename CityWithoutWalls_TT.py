@@ -0,0 +1,154 @@
+'''CityWithoutWalls_TT.py
+
+Bounded transposition table keyed by State.fingerprint(), for planners and caches that
+want to deduplicate equivalent states reached by different orders of the same actions.
+ - max_entries caps memory; when full an entry is evicted according to the policy:
+     'lru'   : least recently used entry goes first,
+     'depth' : depth-preferred; the shallowest entry is replaced, and a new entry that is
+               shallower than everything stored is not admitted.
+ - include_action / include_trend choose whether last_action(_url) and trend_history
+   are part of the key.
+ - Entries stored from a State keep its state_key() and a probe with a State compares
+   it, so two states whose fingerprints collide never read each other's value (the
+   probe counts as a miss and a collision). Probes and stores by a bare fingerprint
+   (an int) skip that check.
+'''
+
+import heapq
+from collections import OrderedDict
+
+DEFAULT_MAX_ENTRIES = 100000
+POLICIES = ('lru', 'depth')
+
+
+class TranspositionTable:
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES, policy='lru', include_action=False, include_trend=False):
+        if policy not in POLICIES:
+            raise ValueError(f"unknown eviction policy {policy!r}; expected one of {POLICIES}")
+        if max_entries < 1:
+            raise ValueError("max_entries must be at least 1")
+        self.max_entries = max_entries
+        self.policy = policy
+        self.include_action = include_action
+        self.include_trend = include_trend
+        # fingerprint -> [depth, seq, value, state_key or None]
+        self._entries = OrderedDict() if policy == 'lru' else {}
+        self._heap = []   # depth policy only: (depth, seq, key), stale items skipped lazily
+        self._seq = 0
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.evictions = 0
+        self.rejections = 0
+        self.collisions = 0
+
+    def key_of(self, state_or_key):
+        return self._keys(state_or_key)[0]
+
+    def _keys(self, state_or_key):
+        # (fingerprint, state_key); state_key is None for a bare fingerprint
+        if isinstance(state_or_key, int):
+            return state_or_key, None
+        check = state_or_key.state_key(self.include_action, self.include_trend)
+        return hash(check), check
+
+    def _lookup(self, state_or_key):
+        # (fingerprint, entry); entry is None when absent or held by a colliding state
+        key, check = self._keys(state_or_key)
+        entry = self._entries.get(key)
+        if entry is not None and check is not None and entry[3] is not None and entry[3] != check:
+            self.collisions += 1
+            entry = None
+        return key, entry
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, state_or_key):
+        return self._lookup(state_or_key)[1] is not None
+
+    def get(self, state_or_key, default=None):
+        key, entry = self._lookup(state_or_key)
+        if entry is None:
+            self.misses += 1
+            return default
+        self.hits += 1
+        if self.policy == 'lru':
+            self._entries.move_to_end(key)
+        return entry[2]
+
+    def depth(self, state_or_key):
+        entry = self._lookup(state_or_key)[1]
+        return None if entry is None else entry[0]
+
+    def put(self, state_or_key, value, depth=0):
+        '''Store value for the state; returns False if the depth policy declined it. A
+        colliding state already in the slot is replaced like an entry for the same state.'''
+        key, check = self._keys(state_or_key)
+        entries = self._entries
+        self._seq += 1
+        old = entries.get(key)
+        if self.policy == 'lru':
+            if old is not None:
+                entries.move_to_end(key)
+            elif len(entries) >= self.max_entries:
+                entries.popitem(last=False)
+                self.evictions += 1
+            entries[key] = [depth, self._seq, value, check]
+        else:
+            if old is not None:
+                if depth < old[0]:
+                    self.rejections += 1
+                    return False
+            elif len(entries) >= self.max_entries:
+                victim = self._shallowest()
+                if depth < entries[victim][0]:
+                    self.rejections += 1
+                    return False
+                del entries[victim]
+                heapq.heappop(self._heap)
+                self.evictions += 1
+            entries[key] = [depth, self._seq, value, check]
+            heapq.heappush(self._heap, (depth, self._seq, key))
+            if len(self._heap) > 2 * self.max_entries:
+                self._rebuild_heap()
+        self.stores += 1
+        return True
+
+    def _shallowest(self):
+        # drop heap items whose entry was replaced or removed, then return the live minimum
+        heap = self._heap
+        while True:
+            depth, seq, key = heap[0]
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] == seq:
+                return key
+            heapq.heappop(heap)
+
+    def _rebuild_heap(self):
+        self._heap = [(e[0], e[1], k) for k, e in self._entries.items()]
+        heapq.heapify(self._heap)
+
+    def discard(self, state_or_key):
+        key, entry = self._lookup(state_or_key)
+        if entry is not None:
+            del self._entries[key]
+
+    def clear(self):
+        self._entries.clear()
+        self._heap = []
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            'entries': len(self._entries),
+            'max_entries': self.max_entries,
+            'policy': self.policy,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'stores': self.stores,
+            'evictions': self.evictions,
+            'rejections': self.rejections,
+            'collisions': self.collisions,
+        }
@@ -0,0 +1,521 @@
+'''CityWithoutWalls_VECTOR.py
+
+Vectorized lockstep engine: N independent cities held as structure-of-arrays NumPy
+columns (one float64 array per numeric State field). apply() plays one operator in
+every city at once, reproducing make_op's op_fn:
+ - charge_budget partial spending and the resulting budget fraction,
+ - the success-chance formula (momentum, support, fatigue, difficulty, budget fraction),
+ - the partial-success multiplier frac * uniform(0.25, 0.75),
+ - numeric deltas and the cut_pct / displace_pct / build_units effects of OPERATOR_TABLE,
+ - record_trend pipeline completion / operating-obligation degradation,
+ - update_turn round-boundary macro updates (taxes, grants, shocks, fatigue decay).
+Every city draws its own random numbers, so results match the scalar game in
+distribution (not draw-for-draw). All cities share the same turn and round.
+apply_each() lets every city play a different operator of the acting role in the same
+pass (the operators' plans as an OperatorTable of dense arrays); lookahead() uses it to
+evaluate all of a role's operators over many samples at once.
+fast_forward() / project() advance cities whole rounds under a null policy (background
+dynamics only: taxes, grants, shocks, fatigue decay, pipeline completions and obligation
+degradation) or a fixed operator per role, recording a per-round trajectory.
+
+Example: evaluate a policy over 100k stochastic rollouts
+    batch = CityBatch(100000, seed=1)
+    result = batch.run(random_policy, max_rounds=50)
+Advisor panel: outcome distributions of each of the acting role's operators
+    for op_index, d in lookahead(state, samples=64).items():
+        describe(d['homeless_reduction'])
+Do-nothing baseline: 1000 seeds, 50 rounds
+    cities, trajectory = project(state, 50)
+    trajectory['homeless_population'].mean(axis=1)
+'''
+
+import numpy as np
+
+import CityWithoutWalls as prob
+
+BUILD_KINDS = ('shelter', 'trans', 'perm')
+BUILD_TARGETS = ('shelter_capacity', 'transitional_units', 'permanent_units')
+PIPELINE_SLOTS = 64   # ring of future record_trend ticks; construction delays must stay below this
+
+BUDGETS = ('shelter_budget', 'neighborhood_budget', 'business_budget', 'medical_budget', 'university_budget')
+POPULATIONS = ('pop_families', 'pop_youth', 'pop_chronic', 'pop_veterans')
+
+# turn and round are shared by every city in lockstep; everything else is a column
+COLUMNS = tuple(f for f in prob.STATE_FIELDS if f not in ('turn', 'round'))
+
+DEFAULT_TRACK = ('homeless_population', 'public_support', 'legal_pressure', 'economy_index')
+
+
+# ---------------- Operator plans ----------------
+# An operator's compiled execution plan (op.plan, from make_op) is turned once into
+# (role, cost items, cost total, difficulty, steps).
+
+_PLANS = {}
+
+
+def operator_plan(op):
+    plan = _PLANS.get(id(op))
+    cost = tuple(op.cost_k.items())
+    # rebuilt when tune_operator changed the operator
+    if plan is not None and plan[1] == cost and plan[3] == op.difficulty:
+        return plan
+    steps = []
+    for step in op.plan:
+        if step[0] == 'call':
+            raise TypeError(f"operator {op.name!r}: custom callable deltas cannot be vectorized")
+        if step[0] != 'add' or step[1] in COLUMNS:
+            steps.append(step)
+    plan = (op.role, cost, float(sum(op.cost_k.values())) if op.cost_k else 0.0, op.difficulty, tuple(steps))
+    _PLANS[id(op)] = plan
+    return plan
+
+
+def _resolve(op):
+    return prob.OPERATORS[op] if isinstance(op, (int, np.integer)) else op
+
+
+class OperatorTable:
+    '''The plans of several operators as dense arrays (row j describes ops[j]), so that
+    every city of a batch can play a different operator in one pass (apply_each).
+    Effects of one operator are applied grouped by kind (adds, cuts, displacement, builds),
+    which matches op_fn because no operator reads a field another of its steps writes.'''
+
+    def __init__(self, ops):
+        self.ops = tuple(_resolve(op) for op in ops)
+        self.plans = tuple(operator_plan(op) for op in self.ops)
+        m = len(self.ops)
+        cost_fields, add_fields, cut_fields = {}, {}, {}
+        for op, (role, cost, cost_total, difficulty, steps) in zip(self.ops, self.plans):
+            _check_independent(op, steps)
+            for bk, _ in cost:
+                cost_fields.setdefault(bk, len(cost_fields))
+            for step in steps:
+                if step[0] == 'add':
+                    add_fields.setdefault(step[1], (len(add_fields), step[3]))
+                elif step[0] == 'cut':
+                    cut_fields.setdefault(step[1], len(cut_fields))
+        self.cost_fields = tuple(cost_fields)
+        self.add_fields = tuple(add_fields)
+        self.add_int = tuple(as_int for _, as_int in add_fields.values())
+        self.cut_fields = tuple(cut_fields)
+        self.cost = np.zeros((m, len(cost_fields)))
+        self.charged = np.zeros((m, len(cost_fields)), dtype=bool)
+        self.difficulty = np.array([op.difficulty for op in self.ops], dtype=float)
+        self.fatigue = np.array([op.fatigue_step for op in self.ops], dtype=float)
+        self.add = np.zeros((m, len(add_fields)))
+        self.cut = np.zeros((m, len(cut_fields)))
+        self.displace = np.zeros(m)
+        self.build = np.zeros((m, len(BUILD_KINDS)))
+        for j, (role, cost, cost_total, difficulty, steps) in enumerate(self.plans):
+            for bk, amt in cost:
+                self.cost[j, cost_fields[bk]] = amt
+                self.charged[j, cost_fields[bk]] = True
+            for step in steps:
+                kind = step[0]
+                if kind == 'add':
+                    self.add[j, add_fields[step[1]][0]] = step[2]
+                elif kind == 'cut':
+                    self.cut[j, cut_fields[step[1]]] = step[2]
+                elif kind == 'displace':
+                    self.displace[j] = step[1]
+                elif kind == 'build':
+                    self.build[j, BUILD_KINDS.index(step[1])] = step[2]
+
+    def current(self):
+        # False once tune_operator changed one of the operators
+        return all(operator_plan(op) is plan for op, plan in zip(self.ops, self.plans))
+
+
+def _check_independent(op, steps):
+    # every field is written by at most one step, and displacement / builds do not read a
+    # field the operator writes (cuts read only their own field)
+    written = []
+    reads = set()
+    for step in steps:
+        kind = step[0]
+        if kind in ('add', 'cut'):
+            written.append(step[1])
+        elif kind == 'displace':
+            written.append('pop_chronic')
+            reads.add('homeless_population')
+        elif kind == 'build':
+            reads.add('construction_delay_factor')
+        else:
+            raise TypeError(f"operator {op.name!r}: {kind!r} steps cannot be vectorized")
+    if len(set(written)) < len(written) or reads & set(written):
+        raise ValueError(f"operator {op.name!r}: its steps depend on each other's order")
+
+
+_TABLES = {}
+
+
+def operator_table(ops):
+    '''Cached OperatorTable for a sequence of operators (indices or Operators).'''
+    key = tuple(id(_resolve(op)) for op in ops)
+    table = _TABLES.get(key)
+    if table is None or not table.current():
+        table = _TABLES[key] = OperatorTable(ops)
+    return table
+
+
+# ---------------- Batch of cities ----------------
+
+class CityBatch:
+    def __init__(self, n, state=None, seed=None):
+        if state is None:
+            state = prob.create_initial_state()
+        self.n = n
+        self.rng = np.random.default_rng(seed)
+        self.turn = state.turn
+        self.round = state.round
+        for name in COLUMNS:
+            setattr(self, name, np.full(n, float(getattr(state, name))))
+        # pipeline[kind, slot, city]: units finishing at record_trend tick == slot (mod PIPELINE_SLOTS)
+        self.tick = 0
+        self.pipeline = np.zeros((len(BUILD_KINDS), PIPELINE_SLOTS, n))
+        self._load_pipeline(state, slice(None))
+
+    @classmethod
+    def from_states(cls, states, seed=None):
+        '''Build a batch from distinct states that share the same turn and round.'''
+        states = list(states)
+        batch = cls(len(states), states[0], seed)
+        for i, s in enumerate(states[1:], 1):
+            if s.turn != batch.turn or s.round != batch.round:
+                raise ValueError("all states in a lockstep batch must share turn and round")
+            for name in COLUMNS:
+                getattr(batch, name)[i] = getattr(s, name)
+            batch.pipeline[:, :, i] = 0.0
+            batch._load_pipeline(s, i)
+        return batch
+
+    def _load_pipeline(self, state, cities):
+        for (t, units, rounds) in state.construction_pipeline:
+            if rounds >= PIPELINE_SLOTS:
+                raise ValueError("construction delay exceeds PIPELINE_SLOTS")
+            self.pipeline[BUILD_KINDS.index(t), (self.tick + rounds) % PIPELINE_SLOTS, cities] += units
+
+    def to_state(self, i):
+        '''Materialize city i as a regular State (pipeline jobs are merged per finishing tick).'''
+        s = prob.State()
+        s.turn = self.turn
+        s.round = self.round
+        for name in COLUMNS:
+            v = float(getattr(self, name)[i])
+            if isinstance(getattr(s, name), int) and v.is_integer():
+                v = int(v)
+            setattr(s, name, v)
+        jobs = []
+        for ahead in range(1, PIPELINE_SLOTS):
+            slot = (self.tick + ahead) % PIPELINE_SLOTS
+            for k, kind in enumerate(BUILD_KINDS):
+                units = self.pipeline[k, slot, i]
+                if units:
+                    jobs.append((kind, int(units), ahead))
+        s.construction_pipeline = jobs
+        s.trend_history = [int(s.homeless_population)] * 10
+        return s
+
+    # ---------- operator step ----------
+
+    def apply(self, op):
+        '''Play one operator (index into OPERATORS or an Operator) in every city.
+        Returns (success, applied_multiplier, budget_fraction) arrays.'''
+        return self.apply_each(operator_table((op,)), np.zeros(self.n, dtype=np.intp))
+
+    def apply_indices(self, op_indices):
+        '''Play OPERATORS[op_indices[i]] in city i (all of the acting role) in one pass.'''
+        ops, rows = np.unique(np.asarray(op_indices), return_inverse=True)
+        return self.apply_each(operator_table(ops.tolist()), rows)
+
+    def apply_each(self, table, rows):
+        '''Play a different operator per city in one pass: city i plays table.ops[rows[i]]
+        (every operator of the table must belong to the acting role).
+        Returns (success, applied_multiplier, budget_fraction) arrays.'''
+        for op in table.ops:
+            if op.role != self.turn:
+                raise ValueError(f"{op.name!r} belongs to {prob.int_to_name(op.role)}, but it is {prob.int_to_name(self.turn)}'s turn")
+        n = self.n
+        rng = self.rng
+        rows = np.asarray(rows)
+
+        # charge budgets (allow partial)
+        frac = np.ones(n)
+        cost = table.cost[rows]
+        charged = table.charged[rows]
+        for j, bk in enumerate(table.cost_fields):
+            amt = cost[:, j]
+            on = charged[:, j]
+            avail = getattr(self, bk)
+            full = avail >= amt
+            part = ~full & (avail > 0)
+            share = np.divide(avail, amt, out=np.zeros(n), where=amt > 0)
+            frac = np.minimum(frac, np.where(on, np.where(full, 1.0, np.where(part, share, 0.0)), 1.0))
+            setattr(self, bk, np.where(on, np.where(full, avail - amt, np.where(part, 0.0, avail)), avail))
+        acting = frac > 0.0
+
+        # success chance and applied multiplier
+        base = (prob.SUCCESS_BASE + self.policy_momentum * prob.MOMENTUM_WEIGHT +
+                (self.public_support - prob.SUPPORT_PIVOT) * prob.SUPPORT_WEIGHT)
+        base -= self.policy_fatigue * prob.FATIGUE_PENALTY
+        chance = np.clip(base - table.difficulty[rows], 0.05, 0.98) * (0.5 + 0.5 * frac)
+        success = rng.random(n) <= chance
+        lo, hi = prob.PARTIAL_MULT_RANGE
+        mult = np.where(success, 1.0, frac * rng.uniform(lo, hi, n))
+        mult[~acting] = 0.0
+        success &= acting
+
+        # effects (a zero multiplier, or a zero entry in the table, leaves a city untouched)
+        for j, k in enumerate(table.add_fields):
+            delta = table.add[rows, j] * mult
+            if table.add_int[j]:
+                delta = np.rint(delta)
+            setattr(self, k, getattr(self, k) + delta)
+        for j, attr in enumerate(table.cut_fields):
+            pct = table.cut[rows, j]
+            before = getattr(self, attr)
+            reduction = np.rint(np.maximum(0.0, np.rint(before * (pct / 100.0))) * mult)
+            setattr(self, attr, np.where(pct > 0, np.maximum(0.0, before - reduction), before))
+        if table.displace.any():
+            pct = table.displace[rows]
+            added = np.rint(np.maximum(0.0, np.rint(self.homeless_population * (pct / 100.0))) * mult)
+            self.pop_chronic = self.pop_chronic + added
+        for k in range(len(BUILD_KINDS)):
+            if not table.build[:, k].any():
+                continue
+            built = np.rint(table.build[rows, k] * mult)
+            delay = np.maximum(1.0, np.rint((built / 100.0) * self.construction_delay_factor))
+            if delay.max() >= PIPELINE_SLOTS:
+                raise ValueError("construction delay exceeds PIPELINE_SLOTS")
+            slots = (self.tick + delay.astype(np.int64)) % PIPELINE_SLOTS
+            np.add.at(self.pipeline[k], (slots, np.arange(n)), built)
+
+        self._recalc_population()
+        self.policy_fatigue = np.where(acting, self.policy_fatigue + table.fatigue[rows], self.policy_fatigue)
+        self.policy_momentum = np.where(acting, np.clip(self.policy_momentum + 0.5 * mult, -10.0, 50.0),
+                                        self.policy_momentum)
+
+        # op_fn runs record_trend before update_turn, except when no budget was available
+        self._complete_pipeline()
+        loss_before = self._obligation_loss()
+        self._update_turn()
+        loss_after = self._obligation_loss()
+        self.shelter_capacity = np.maximum(0.0, self.shelter_capacity - np.where(acting, loss_before, loss_after))
+        return success, mult, frac
+
+    def idle(self, turns=1):
+        '''Play turns turns in which the acting role applies nothing (op_fn's path when no
+        budget is available: update_turn, then record_trend). Budgets and obligations only
+        change at round boundaries here, so the capacity degradation is worked out once per
+        round and skipped while no city is short.'''
+        degrade = r = None
+        for _ in range(turns):
+            self._update_turn()
+            if self.round != r:
+                r = self.round
+                degrade = self._degrade()
+            self._complete_pipeline()
+            if degrade is not None:
+                self.shelter_capacity = np.maximum(0.0, self.shelter_capacity -
+                                                   np.floor(self.shelter_capacity * degrade * 0.05))
+
+    def fast_forward(self, rounds, policy=None, track=DEFAULT_TRACK):
+        '''Advance every city by rounds round boundaries without States, banners or op_fn
+        calls. policy: None (every role idles) or {role: operator index / Operator / None},
+        a fixed operator per role (missing roles idle). Returns {field: array of shape
+        (rounds + 1, n)} with the tracked fields now and after each round boundary.'''
+        moves = {}
+        for role, op in (policy or {}).items():
+            if role not in prob.PLAYABLE_ROLES:
+                raise ValueError(f"{role!r} is not a playable role")
+            if op is not None:
+                op = _resolve(op)
+                if op.role != role:
+                    raise ValueError(f"{op.name!r} belongs to {prob.int_to_name(op.role)}, not {prob.int_to_name(role)}")
+                moves[role] = op
+        out = {name: np.empty((rounds + 1, self.n)) for name in track}
+        for name in track:
+            out[name][0] = getattr(self, name)
+        target = self.round + rounds
+        while self.round < target:
+            op = moves.get(self.turn)
+            r = self.round
+            if op is None:
+                # idle up to the next move or the end of the round, whichever comes first
+                k = 1
+                role = self.turn
+                while role != prob.PLAYABLE_ROLES[-1] and moves.get(prob.next_player_index(role)) is None:
+                    role = prob.next_player_index(role)
+                    k += 1
+                self.idle(k)
+            else:
+                self.apply(op)
+            if self.round != r:
+                for name in track:
+                    out[name][self.round + rounds - target] = getattr(self, name)
+        return out
+
+    # ---------- record_trend / update_turn ----------
+
+    def _recalc_population(self):
+        self.homeless_population = np.maximum(0.0, self.pop_families + self.pop_youth +
+                                              self.pop_chronic + self.pop_veterans)
+
+    def _complete_pipeline(self):
+        self.tick += 1
+        slot = self.tick % PIPELINE_SLOTS
+        if not self.pipeline[:, slot].any():
+            return
+        for k, target in enumerate(BUILD_TARGETS):
+            done = self.pipeline[k, slot]
+            setattr(self, target, getattr(self, target) + done)
+            done[:] = 0.0
+
+    def _degrade(self):
+        # degradation fraction of cities whose budgets can't cover obligations (None: none short)
+        total = (self.shelter_budget + self.neighborhood_budget + self.business_budget +
+                 self.medical_budget + self.university_budget)
+        short = self.operating_obligations - total
+        if not (short > 0).any():
+            return None
+        return np.where(short > 0, np.clip(short / np.maximum(1.0, self.operating_obligations), 0.0, 0.9), 0.0)
+
+    def _obligation_loss(self):
+        total = (self.shelter_budget + self.neighborhood_budget + self.business_budget +
+                 self.medical_budget + self.university_budget)
+        short = self.operating_obligations - total
+        degrade = np.clip(short / np.maximum(1.0, self.operating_obligations), 0.0, 0.9)
+        return np.where(total < self.operating_obligations,
+                        np.floor(self.shelter_capacity * degrade * 0.05), 0.0)
+
+    def _update_turn(self):
+        self.turn = prob.next_player_index(self.turn)
+        if self.turn != prob.PLAYABLE_ROLES[0]:
+            return
+        n = self.n
+        rng = self.rng
+        self.round += 1
+        split = np.maximum(0.0, self.economy_index * prob.TAX_RATE) / 5.0
+        for bk in BUDGETS:
+            setattr(self, bk, getattr(self, bk) + split)
+        grant = (self.policy_momentum > prob.GRANT_MOMENTUM) & (rng.random(n) < prob.GRANT_CHANCE)
+        self.shelter_budget = self.shelter_budget + 300.0 * grant
+        self.debt = self.debt - 50.0 * grant
+        shock = rng.random(n) < prob.SHOCK_CHANCE
+        kind = rng.integers(0, 3, n)
+        recession = shock & (kind == 0)
+        boom = shock & (kind == 1)
+        inflation = shock & (kind == 2)
+        self.economy_index = np.where(recession, np.maximum(50.0, self.economy_index - rng.uniform(6.0, 15.0, n)),
+                             np.where(boom, np.minimum(150.0, self.economy_index + rng.uniform(5.0, 20.0, n)),
+                                      self.economy_index))
+        self.public_support = np.where(recession, np.maximum(0.0, self.public_support - rng.uniform(1.0, 4.0, n)),
+                              np.where(boom, np.minimum(100.0, self.public_support + rng.uniform(0.5, 3.0, n)),
+                                       self.public_support))
+        self.operating_obligations = np.where(inflation, self.operating_obligations * prob.INFLATION_FACTOR, self.operating_obligations)
+        self.policy_fatigue = np.maximum(0.0, self.policy_fatigue - prob.FATIGUE_DECAY)
+
+    # ---------- queries ----------
+
+    def goal_mask(self):
+        # vectorized State.is_goal
+        return ((self.homeless_population <= int(0.7 * 10700)) &
+                (self.public_support >= 50.0) &
+                (self.legal_pressure < 20.0))
+
+    def role_operators(self):
+        return prob.role_operator_indices(self.turn)
+
+    def run(self, policy, max_rounds=50):
+        '''Play policy(batch) until max_rounds complete. The policy returns an operator index
+        played in every city, or an array of operator indices, one per city. A city counts as
+        won from the first time it reaches the goal (like the batch runner, which stops there).
+        Returns a dict with per-city won flags, rounds-to-win and mean final metrics.'''
+        won = self.goal_mask()
+        win_round = np.where(won, self.round, -1)
+        while self.round < max_rounds:
+            choice = policy(self)
+            if np.ndim(choice):
+                self.apply_indices(choice)
+            else:
+                self.apply(choice)
+            reached = self.goal_mask() & ~won
+            win_round[reached] = self.round
+            won |= reached
+        return {
+            'n': self.n,
+            'won': won,
+            'win_rate': float(won.mean()),
+            'win_round': win_round,
+            'mean_metrics': {name: float(getattr(self, name).mean()) for name in COLUMNS},
+        }
+
+
+def random_policy(batch):
+    # every city plays an operator chosen uniformly from the acting role's operators
+    ops = np.asarray(batch.role_operators())
+    return ops[batch.rng.integers(len(ops), size=batch.n)]
+
+
+def shared_random_policy(batch):
+    # shared-action policy: one operator, chosen uniformly from the acting role's
+    # operators, is played in every city of the batch
+    ops = batch.role_operators()
+    return ops[batch.rng.integers(len(ops))]
+
+
+# ---------------- Lookahead ----------------
+
+DEFAULT_LOOKAHEAD_SAMPLES = 64
+
+
+def lookahead(state, samples=DEFAULT_LOOKAHEAD_SAMPLES, seed=None, ops=None):
+    '''One-step "what if" for every operator of the acting role (or the operator indices
+    in ops): each is played from state in samples cities, all in one apply_each pass.
+    Returns {op index: {...}} with, per operator,
+        'operator', 'success_rate', 'win_rate' (goal reached after the move),
+        'budget_fraction' and 'budget_spend' (k$; both are deterministic),
+        'homeless_reduction', 'support_change', 'legal_change' (arrays, one value per sample).'''
+    ops = list(ops) if ops is not None else list(prob.role_operator_indices(state.turn))
+    table = operator_table(ops)
+    m = len(ops)
+    cities = CityBatch(m * samples, state, seed)
+    success, mult, frac = cities.apply_each(table, np.repeat(np.arange(m), samples))
+    won = cities.goal_mask()
+    budgets = sum(getattr(state, bk) for bk in BUDGETS)
+    out = {}
+    for j, op_index in enumerate(ops):
+        op = table.ops[j]
+        charged = prob.State(state)
+        prob.charge_budget(charged, op.cost_k)
+        block = slice(j * samples, (j + 1) * samples)
+        out[op_index] = {
+            'operator': op.name,
+            'success_rate': float(success[block].mean()),
+            'win_rate': float(won[block].mean()),
+            'budget_fraction': float(frac[block][0]),
+            'budget_spend': budgets - sum(getattr(charged, bk) for bk in BUDGETS),
+            'homeless_reduction': state.homeless_population - cities.homeless_population[block],
+            'support_change': cities.public_support[block] - state.public_support,
+            'legal_change': cities.legal_pressure[block] - state.legal_pressure,
+        }
+    return out
+
+
+def describe(values):
+    # summary of one lookahead distribution for an advisor panel
+    p10, p50, p90 = np.percentile(values, (10, 50, 90))
+    return {'mean': float(np.mean(values)), 'p10': float(p10), 'p50': float(p50), 'p90': float(p90)}
+
+
+# ---------------- Fast-forward ----------------
+
+DEFAULT_PROJECTION_SEEDS = 1000
+
+
+def project(state, rounds, n=DEFAULT_PROJECTION_SEEDS, seed=None, policy=None, track=DEFAULT_TRACK):
+    '''Long-horizon projection of state: n cities (one random stream each) fast-forwarded
+    rounds rounds under policy (see CityBatch.fast_forward; None is the do-nothing baseline).
+    Returns (cities, {field: array (rounds + 1, n)}).'''
+    cities = CityBatch(n, state, seed)
+    return cities, cities.fast_forward(rounds, policy, track)